@@ -1,13 +1,11 @@
 import pint
 
-# TODO -- remove this
-# bad hacky way to include the calculator...
-# must be modified to use __init__.py
+# make the repository root importable when running from the examples directory
 import sys, os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lib', 'calculator'))
-from link_budget_calculator import LinkBudgetCalculator
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from lib.calculator import LinkBudgetCalculator
 
 ureg = pint.UnitRegistry()
 lcalc = LinkBudgetCalculator(ureg)
 
-print(lcalc)
\ No newline at end of file
+print(lcalc)
@@ -1,3 +1,5 @@
 from .link_budget_calculator import LinkBudgetCalculator
+from .duplex import DuplexLinkBudgetCalculator
+from .records import LinkBudgetInputs, LinkBudgetResult
 
-__all__ = ["LinkBudgetCalculator"]
\ No newline at end of file
+__all__ = ["LinkBudgetCalculator", "DuplexLinkBudgetCalculator", "LinkBudgetInputs", "LinkBudgetResult"]
@@ -0,0 +1,167 @@
+import math
+import numpy as np
+
+from . import batch
+from .units import to_magnitude
+
+# gain relative to boresight of the far sidelobes, in dB, below which the
+# gaussian main lobe is not extended
+DEFAULT_SIDELOBE_LEVEL = -30.0
+
+# half power beamwidth in degrees of a parabolic dish, times its diameter
+# over the wavelength
+BEAMWIDTH_FACTOR = 70.0
+
+# gaussian main lobe exponent, the gain is exp(-_LOBE * (theta / theta_3dB)^2)
+_LOBE = 1.2 * math.log(10)
+
+
+def gaussian_beam_loss(off_axis_angle, beamwidth, sidelobe_level=DEFAULT_SIDELOBE_LEVEL):
+    """
+    Gain relative to boresight of a gaussian main lobe
+
+    -12 (theta / theta_3dB)^2 dB, i.e. -3 dB at half the beamwidth off axis,
+    floored at a flat sidelobe level.
+
+    @type  off_axis_angle: pint angle or array (degrees)
+    @param off_axis_angle: angle between the boresight and the direction
+    @type  beamwidth: pint angle or array (degrees)
+    @param beamwidth: full half power beamwidth
+    @type  sidelobe_level: number
+    @param sidelobe_level: lowest gain relative to boresight in dB, None for
+                           the bare main lobe
+
+    @rtype:  numpy array
+    @return: pattern loss in dB (negative)
+
+    """
+    ratio = (to_magnitude(off_axis_angle, 'degree', 'off_axis_angle')
+             / to_magnitude(beamwidth, 'degree', 'beamwidth'))
+    loss = -12.0 * ratio * ratio
+    if sidelobe_level is None:
+        return loss
+    return np.maximum(loss, sidelobe_level)
+
+
+def off_axis_angle(origin, boresight_target, target):
+    """
+    Angle at an antenna between its boresight and the direction of targets
+
+    @type  origin: pint length or array (meters), shape (..., 3)
+    @param origin: antenna positions
+    @type  boresight_target: pint length or array (meters), shape (..., 3)
+    @param boresight_target: positions the antennas point at
+    @type  target: pint length or array (meters), shape (..., 3)
+    @param target: positions seen by the antennas, same frame
+
+    @rtype:  numpy array
+    @return: off axis angles in degrees, between 0 and 180
+
+    """
+    o = to_magnitude(origin, 'meter', 'origin')
+    boresight = to_magnitude(boresight_target, 'meter', 'boresight_target') - o
+    direction = to_magnitude(target, 'meter', 'target') - o
+    norm = np.sqrt(np.einsum('...i,...i->...', boresight, boresight)
+                   * np.einsum('...i,...i->...', direction, direction))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cosine = np.einsum('...i,...i->...', boresight, direction) / norm
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+
+def beamwidth(diameter, frequency, speed_of_light=batch.SPEED_OF_LIGHT):
+    """
+    Half power beamwidth of a parabolic dish, about 70 wavelengths over the
+    diameter in degrees
+
+    @type  diameter: pint length or array (meters)
+    @param diameter: dish diameter
+    @type  frequency: pint frequency or array (Hertz)
+    @param frequency: carrier frequency
+    @type  speed_of_light: number
+    @param speed_of_light: speed of light in meters per second
+
+    @rtype:  numpy array
+    @return: full half power beamwidth in degrees
+
+    """
+    wavelength = batch.downlink_wavelength(to_magnitude(frequency, 'hertz', 'frequency'), speed_of_light)
+    return BEAMWIDTH_FACTOR * wavelength / to_magnitude(diameter, 'meter', 'diameter')
+
+
+def pointing_loss(pointing_error, beamwidth):
+    """
+    Loss of a gaussian main lobe for a given pointing error
+
+    @type  pointing_error: pint angle or array (degrees)
+    @param pointing_error: angle between the boresight and the link
+    @type  beamwidth: pint angle or array (degrees)
+    @param beamwidth: full half power beamwidth
+
+    @rtype:  numpy array
+    @return: pointing loss in dB (negative), as taken by
+             transmit_pointing_loss and receiving_pointing_loss
+
+    """
+    return gaussian_beam_loss(pointing_error, beamwidth, sidelobe_level=None)
+
+
+def sample_pointing_loss(beamwidth, bias=0.0, sigma=0.0, size=None, rng=None):
+    """
+    Pointing losses of random pointing errors
+
+    The error has a fixed bias along one axis plus independent normal jitter
+    of standard deviation sigma along both axes, so its magnitude follows a
+    Rice distribution (Rayleigh without bias).
+
+    @type  beamwidth: pint angle or array (degrees)
+    @param beamwidth: full half power beamwidth
+    @type  bias: pint angle or array (degrees)
+    @param bias: static pointing error
+    @type  sigma: pint angle or array (degrees)
+    @param sigma: standard deviation of the jitter per axis
+    @type  size: int or tuple
+    @param size: shape of the samples, the broadcast shape of the
+                 parameters when None
+    @type  rng: numpy Generator
+    @param rng: random generator, a new unseeded one when None
+
+    @rtype:  numpy array
+    @return: pointing losses in dB (negative)
+
+    """
+    width = to_magnitude(beamwidth, 'degree', 'beamwidth')
+    bias = to_magnitude(bias, 'degree', 'bias')
+    sigma = to_magnitude(sigma, 'degree', 'sigma')
+    if rng is None:
+        rng = np.random.default_rng()
+    if size is None:
+        size = np.broadcast_shapes(np.shape(width), np.shape(bias), np.shape(sigma))
+    along = bias + sigma * rng.standard_normal(size)
+    across = sigma * rng.standard_normal(size)
+    return pointing_loss(np.hypot(along, across), width)
+
+
+def mean_pointing_loss(beamwidth, bias=0.0, sigma=0.0):
+    """
+    Pointing loss of the mean received power under random pointing errors
+
+    Closed form expectation over the distribution of sample_pointing_loss(),
+    for budgets made on average power rather than per sample.
+
+    @type  beamwidth: pint angle or array (degrees)
+    @param beamwidth: full half power beamwidth
+    @type  bias: pint angle or array (degrees)
+    @param bias: static pointing error
+    @type  sigma: pint angle or array (degrees)
+    @param sigma: standard deviation of the jitter per axis
+
+    @rtype:  numpy array
+    @return: pointing loss in dB (negative)
+
+    """
+    width = to_magnitude(beamwidth, 'degree', 'beamwidth')
+    bias = to_magnitude(bias, 'degree', 'bias')
+    sigma = to_magnitude(sigma, 'degree', 'sigma')
+    a = _LOBE / (width * width)
+    spread = 1 + 2 * a * sigma * sigma
+    return -10 * (np.log10(spread) + a * bias * bias / spread / math.log(10))
@@ -0,0 +1,320 @@
+import collections
+import numpy as np
+
+# default range of the margin histogram in dB
+DEFAULT_RANGE = (-50.0, 50.0)
+
+# default width of the histogram bins in dB
+DEFAULT_RESOLUTION = 0.01
+
+
+class AvailabilityStatistics():
+    """
+    Streaming link availability, margin quantiles and outage durations
+
+    Margins are consumed chunk by chunk and never stored. They are counted
+    in a fixed-bin histogram, so quantiles within the histogram range are
+    within one bin width (error_bound) of the exact ones, and two
+    accumulators with the same bins merge exactly. Outages are runs of
+    consecutive in-view samples with a negative margin; NaN samples are out
+    of view, end runs and are not counted. Runs crossing chunk boundaries
+    are carried over, and so are runs crossing the boundary between two
+    accumulators merged in time order.
+
+    Steps to use this class:
+        1) Instantiate an accumulator per worker with the same bins
+        2) Call update() with margin chunks in time order, time along the
+           last axis and one independent stream (e.g. ground station) per
+           row
+        3) merge() the accumulators of later time ranges or other streams
+        4) Read availability, quantile() and outage_durations()
+
+    """
+
+    def __init__(self, margin_range=DEFAULT_RANGE, resolution=DEFAULT_RESOLUTION, step=1.0):
+        """
+        AvailabilityStatistics Constructor
+
+        @type  margin_range: tuple
+        @param margin_range: (lowest, highest) margin of the histogram in dB,
+                             margins outside are counted but not binned
+        @type  resolution: number
+        @param resolution: bin width in dB
+        @type  step: number
+        @param step: time between samples in seconds
+
+        """
+        low, high = margin_range
+        self._bins = int(np.ceil((high - low) / resolution))
+        self._low = float(low)
+        self._resolution = float(resolution)
+        self._step = float(step)
+        # underflow, bins, overflow
+        self._histogram = np.zeros(self._bins + 2, dtype=np.int64)
+        self._available = 0
+        self._minimum = np.inf
+        self._maximum = -np.inf
+        self._total = 0.0
+        # completed outage length in samples to number of outages
+        self._outages = collections.Counter()
+        # per stream: outage run still open at the end, run completed before
+        # any available or out of view sample, and whether one was seen
+        self._open = None
+        self._leading = None
+        self._started = None
+
+    # ---------------- count ----------------
+    @property
+    def count(self):
+        """
+        Get the number of in-view samples
+
+        @rtype:  int
+        @return: samples with a margin, NaN excluded
+
+        """
+        return int(self._histogram.sum())
+
+    # ---------------- availability ----------------
+    @property
+    def availability(self):
+        """
+        Get the fraction of in-view samples with a margin of at least 0 dB
+
+        @rtype:  number
+        @return: availability between 0 and 1, NaN without samples
+
+        """
+        count = self.count
+        return self._available / count if count else np.nan
+
+    # ---------------- mean ----------------
+    @property
+    def mean(self):
+        """
+        Get the mean margin in dB
+
+        @rtype:  number
+        @return: exact mean of the in-view margins, NaN without samples
+
+        """
+        count = self.count
+        return self._total / count if count else np.nan
+
+    # ---------------- minimum ----------------
+    @property
+    def minimum(self):
+        """
+        Get the lowest margin in dB
+
+        @rtype:  number
+        @return: exact lowest in-view margin
+
+        """
+        return self._minimum
+
+    # ---------------- maximum ----------------
+    @property
+    def maximum(self):
+        """
+        Get the highest margin in dB
+
+        @rtype:  number
+        @return: exact highest in-view margin
+
+        """
+        return self._maximum
+
+    # ---------------- error_bound ----------------
+    @property
+    def error_bound(self):
+        """
+        Get the largest quantile error within the histogram range
+
+        @rtype:  number
+        @return: bin width in dB
+
+        """
+        return self._resolution
+
+    # ---------------- histogram ----------------
+    @property
+    def histogram(self):
+        """
+        Get the margin histogram
+
+        @rtype:  tuple
+        @return: (counts, bin edges in dB), samples outside the edges
+                 excluded
+
+        """
+        return (self._histogram[1:-1].copy(),
+                self._low + self._resolution * np.arange(self._bins + 1))
+
+    # --------------------------------------------------
+    # ----------------    functions     ----------------
+    # --------------------------------------------------
+
+    def update(self, margins):
+        """
+        Add a chunk of margins
+
+        @type  margins: numpy array
+        @param margins: margins in dB, time along the last axis, NaN where
+                        out of view or invalid; the other axes must keep the
+                        same size from one chunk to the next
+
+        """
+        margins = np.asarray(margins, dtype=float)
+        margins = margins.reshape(-1, margins.shape[-1]) if margins.ndim else margins.reshape(1, 1)
+        self._check_streams(len(margins))
+
+        in_view = ~np.isnan(margins)
+        values = margins[in_view]
+        index = np.floor((values - self._low) / self._resolution).astype(np.int64) + 1
+        self._histogram += np.bincount(np.clip(index, 0, self._bins + 1), minlength=self._bins + 2)
+        self._available += int(np.count_nonzero(values >= 0))
+        if len(values):
+            self._minimum = min(self._minimum, float(values.min()))
+            self._maximum = max(self._maximum, float(values.max()))
+            self._total += float(values.sum())
+        self._runs(in_view & (margins < 0))
+
+    def _check_streams(self, streams):
+        """
+        Allocate the per stream run state, or check it matches
+        """
+        if self._open is None:
+            self._open = np.zeros(streams, dtype=np.int64)
+            self._leading = np.zeros(streams, dtype=np.int64)
+            self._started = np.zeros(streams, dtype=bool)
+        elif len(self._open) != streams:
+            raise ValueError('Expected %d streams, received %d' % (len(self._open), streams))
+
+    def _runs(self, outage):
+        """
+        Count the outage runs of a chunk, carrying open runs over
+        """
+        streams, length = outage.shape
+        padded = np.zeros((streams, length + 2), dtype=np.int8)
+        padded[:, 1:-1] = outage
+        rows, starts = np.nonzero(np.diff(padded, axis=1) == 1)
+        _, ends = np.nonzero(np.diff(padded, axis=1) == -1)
+        lengths = ends - starts
+
+        # runs at the start of the chunk continue the open runs, open runs
+        # followed by a sample that is not an outage end at the boundary
+        first = starts == 0
+        lengths[first] += self._open[rows[first]]
+        ended = (self._open > 0) & ~outage[:, 0] if length else np.zeros(streams, dtype=bool)
+        # runs ending before any sample that is not an outage are leading
+        self._leading[ended & ~self._started] = self._open[ended & ~self._started]
+        closed = ends < length
+        is_leading = first & closed & ~self._started[rows]
+        self._leading[rows[is_leading]] = lengths[is_leading]
+        self._count(np.concatenate([self._open[ended & self._started], lengths[closed & ~is_leading]]))
+
+        self._open[:] = 0
+        self._open[rows[~closed]] = lengths[~closed]
+        self._started |= ~outage.all(axis=1)
+
+    def _count(self, lengths):
+        """
+        Add completed outages of the given lengths in samples
+        """
+        for value, number in zip(*np.unique(lengths, return_counts=True)):
+            self._outages[int(value)] += int(number)
+
+    def merge(self, other, sequential=True):
+        """
+        Add the samples of another accumulator with the same bins and step
+
+        @type  other: AvailabilityStatistics
+        @param other: accumulator to add, left unchanged
+        @type  sequential: bool
+        @param sequential: True when other holds the same streams right
+                           after the samples of this one, outages running
+                           across the boundary are then joined; False when
+                           it holds other streams
+
+        """
+        if (other._bins, other._low, other._resolution, other._step) != \
+                (self._bins, self._low, self._resolution, self._step):
+            raise ValueError('Cannot merge statistics with different bins or steps')
+        self._histogram += other._histogram
+        self._available += other._available
+        self._minimum = min(self._minimum, other._minimum)
+        self._maximum = max(self._maximum, other._maximum)
+        self._total += other._total
+        self._outages.update(other._outages)
+        if other._open is None:
+            return
+        if self._open is None:
+            self._open, self._leading, self._started = (other._open.copy(), other._leading.copy(),
+                                                        other._started.copy())
+            return
+        if not sequential:
+            self._open = np.concatenate([self._open, other._open])
+            self._leading = np.concatenate([self._leading, other._leading])
+            self._started = np.concatenate([self._started, other._started])
+            return
+        if len(other._open) != len(self._open):
+            raise ValueError('Expected %d streams, received %d' % (len(self._open), len(other._open)))
+
+        # other without any sample that is not an outage extends the open runs
+        joined = self._open + np.where(other._started, other._leading, other._open)
+        ended = other._started & (joined > 0)
+        self._count(joined[ended & self._started])
+        leading = ended & ~self._started
+        self._leading[leading] = joined[leading]
+        self._open = np.where(other._started, other._open, joined)
+        self._started = self._started | other._started
+
+    def quantile(self, q):
+        """
+        Margin quantiles from the histogram
+
+        Within the histogram range the error is at most error_bound, beyond
+        it the quantile is clamped to the exact minimum or maximum.
+
+        @type  q: number or array
+        @param q: quantiles between 0 and 1
+
+        @rtype:  numpy array
+        @return: margins in dB, NaN without samples
+
+        """
+        q = np.asarray(q, dtype=float)
+        count = self.count
+        if not count:
+            return np.full(q.shape, np.nan)
+        cumulative = np.cumsum(self._histogram)
+        rank = q * count
+        index = np.clip(np.searchsorted(cumulative, rank, side='left'), 0, self._bins + 1)
+        below = np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0)
+        inside = self._histogram[index]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.clip(np.where(inside > 0, (rank - below) / inside, 0.0), 0.0, 1.0)
+        value = self._low + self._resolution * (index - 1 + fraction)
+        value = np.where(index == 0, self._minimum, np.where(index == self._bins + 1, self._maximum, value))
+        return np.clip(value, self._minimum, self._maximum)
+
+    def outage_durations(self):
+        """
+        Durations of all outages
+
+        Outages still running at the start or the end of the samples are
+        included with the duration seen.
+
+        @rtype:  tuple
+        @return: (durations in seconds, increasing, number of outages of
+                 each duration)
+
+        """
+        outages = collections.Counter(self._outages)
+        if self._open is not None:
+            for lengths in (self._leading, self._open):
+                for value in lengths[lengths > 0]:
+                    outages[int(value)] += 1
+        lengths = np.array(sorted(outages), dtype=np.int64)
+        return lengths * self._step, np.array([outages[value] for value in lengths], dtype=np.int64)
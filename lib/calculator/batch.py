@@ -0,0 +1,223 @@
+import numpy as np
+
+from . import validation
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS, ground_slant_range
+
+# version of the evaluation engine, stored alongside persisted results
+ENGINE_VERSION = '2'
+
+# Speed of light in meters per second, same value as LinkBudgetCalculator.c
+SPEED_OF_LIGHT = 2.9979e8
+
+# inputs of the link budget and the units their magnitudes are expressed in
+INPUT_UNITS = {
+    'altitude_ground_station':   'meter',
+    'altitude_satellite':        'meter',
+    'orbit_elevation_angle':     'degree',
+    'downlink_frequency':        'hertz',
+    'target_energy_noise_ratio': 'dB',
+    'implementation_loss':       'dB',
+    'transmit_power':            'watt',
+    'transmit_losses':           'dB',
+    'transmit_antenna_gain':     'dB',
+    'transmit_pointing_loss':    'dB',
+    'polarization_losses':       'dB',
+    'atmospheric_loss':          'dB',
+    'receive_antenna_gain':      'dB',
+    'receiving_pointing_loss':   'dB',
+    'system_noise_figure':       'dB',
+    'noise_bandwidth':           'hertz',
+}
+
+# intermediates and outputs of the link budget and their units
+OUTPUT_UNITS = {
+    'downlink_wavelength':       'meter',
+    'link_distance':             'meter',
+    'required_ebno':             'dB',
+    'transmit_power_dBm':        'dBm',
+    'transmit_eirp':             'dBm',
+    'downlink_path_loss':        'dB',
+    'received_power':            'dBm',
+    'minimum_detectable_signal': 'dBm',
+    'energy_noise_ratio':        'dB',
+    'link_margin':               'dB',
+}
+
+
+def columns_from_calculator(calculator):
+    """
+    Extract the inputs of a configured calculator as plain magnitudes
+
+    @type  calculator: LinkBudgetCalculator
+    @param calculator: calculator holding the inputs
+
+    @rtype:  dict
+    @return: input name to float magnitude in the units of INPUT_UNITS
+
+    """
+    return dict((name, to_magnitude(getattr(calculator, name), units, name))
+                for name, units in INPUT_UNITS.items())
+
+
+def downlink_wavelength(downlink_frequency, speed_of_light=SPEED_OF_LIGHT):
+    """
+    Wavelength in meters of a signal given its frequency in Hertz
+    """
+    return speed_of_light / downlink_frequency
+
+
+def path_loss(link_distance, wavelength):
+    """
+    Free space path loss in dB (negative) for a distance and wavelength in meters
+    """
+    return -20 * np.log10(4 * np.pi * link_distance / wavelength)
+
+
+def power_to_dBm(power):
+    """
+    Convert a power in Watts to dBm
+    """
+    return 10 * np.log10(power * 1000.0)
+
+
+def minimum_detectable_signal(noise_bandwidth, system_noise_figure):
+    """
+    Minimum detectable signal in dBm for a bandwidth in Hertz and noise figure in dB
+    """
+    return -174 + 10 * np.log10(noise_bandwidth) + system_noise_figure
+
+
+def evaluate(columns, link_distance=None, speed_of_light=SPEED_OF_LIGHT, earth_radius=EARTH_RADIUS):
+    """
+    Evaluate many link budgets at once
+
+    Performs the same calculations as LinkBudgetCalculator.run() on arrays.
+    All columns are broadcast against each other, so constant inputs can be
+    given as scalars. Missing inputs take the LinkBudgetCalculator defaults.
+
+    Instead of raising on the first invalid input, every rule of run() is
+    checked over the whole columns; only valid rows are computed and the
+    outputs of invalid rows are NaN.
+
+    @type  columns: dict
+    @param columns: input name to pint quantity, number or array, plain
+                    values are expressed in the units of INPUT_UNITS
+    @type  link_distance: pint length or array (meters)
+    @param link_distance: slant ranges to use instead of the ground station
+                          geometry, e.g. from geometry.slant_range()
+    @type  speed_of_light: number
+    @param speed_of_light: speed of light in meters per second
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  dict
+    @return: output name to numpy array, in the units of OUTPUT_UNITS, plus
+             an is_valid boolean array and an invalid_reasons array of
+             validation reason codes
+
+    """
+    values = dict((name, to_magnitude(columns.get(name, 0.0), units, name))
+                  for name, units in INPUT_UNITS.items())
+    if link_distance is not None:
+        values['link_distance'] = to_magnitude(link_distance, 'meter', 'link_distance')
+    names = list(values)
+    values = dict(zip(names, np.broadcast_arrays(*[values[name] for name in names])))
+    distance = values.pop('link_distance', None)
+    shape = np.shape(values['downlink_frequency'])
+
+    is_valid, reasons = validation.validate(values, distance)
+    if not is_valid.all():
+        rows = np.flatnonzero(is_valid)
+        values = dict((name, np.ravel(value)[rows]) for name, value in values.items())
+        if distance is not None:
+            distance = np.ravel(distance)[rows]
+    computed = _compute(values, distance, speed_of_light, earth_radius)
+
+    if is_valid.all():
+        results = dict((name, np.array(value, dtype=float).reshape(shape)) for name, value in computed.items())
+    else:
+        results = {}
+        for name, value in computed.items():
+            result = np.full(is_valid.size, np.nan)
+            result[rows] = value
+            results[name] = result.reshape(shape)
+    results['is_valid'] = is_valid
+    results['invalid_reasons'] = reasons
+    return results
+
+
+def shared_link_distance(columns, earth_radius=EARTH_RADIUS):
+    """
+    Slant range of the ground station geometry, for evaluations sharing it
+
+    The range is computed once and passed as the link_distance of several
+    evaluate() calls, which then skip the geometry rules; merge the reasons
+    returned here into their results with merge_geometry_reasons().
+
+    @type  columns: dict
+    @param columns: input name to pint quantity, number or array, only the
+                    altitudes and the elevation are read
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  tuple
+    @return: (slant range in meters, NaN where the geometry is invalid,
+             uint32 array of geometry reason codes)
+
+    """
+    values = dict((name, to_magnitude(columns.get(name, 0.0), INPUT_UNITS[name], name))
+                  for name in ('altitude_ground_station',) + validation.GEOMETRY_INPUTS)
+    reasons = validation.validate_geometry(values)
+    link_distance = ground_slant_range(values['orbit_elevation_angle'], values['altitude_ground_station'],
+                                       values['altitude_satellite'], earth_radius)
+    return np.where(reasons == 0, link_distance, np.nan), reasons
+
+
+def merge_geometry_reasons(results, geometry_reasons):
+    """
+    Report geometry reasons in results evaluated with a shared link distance
+
+    Rows with an invalid geometry get its reasons instead of the invalid
+    link distance they caused. results is changed in place.
+
+    @type  results: dict
+    @param results: results of evaluate()
+    @type  geometry_reasons: numpy array
+    @param geometry_reasons: reasons from shared_link_distance(), broadcast
+                             against the results
+
+    """
+    reasons = results['invalid_reasons']
+    results['invalid_reasons'] = np.where(geometry_reasons != 0,
+                                          (reasons & ~np.uint32(validation.INVALID_LINK_DISTANCE))
+                                          | geometry_reasons, reasons).astype(np.uint32)
+
+
+def _compute(values, link_distance, speed_of_light, earth_radius):
+    """
+    Evaluate the link budget stages on valid input arrays
+    """
+    results = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results['downlink_wavelength'] = downlink_wavelength(values['downlink_frequency'], speed_of_light)
+        if link_distance is None:
+            results['link_distance'] = ground_slant_range(values['orbit_elevation_angle'],
+                                                          values['altitude_ground_station'],
+                                                          values['altitude_satellite'],
+                                                          earth_radius)
+        else:
+            results['link_distance'] = link_distance
+        results['required_ebno'] = values['target_energy_noise_ratio'] - values['implementation_loss']
+        results['transmit_power_dBm'] = power_to_dBm(values['transmit_power'])
+        results['transmit_eirp'] = (results['transmit_power_dBm'] + values['transmit_losses']
+                                    + values['transmit_antenna_gain'] + values['transmit_pointing_loss'])
+        results['downlink_path_loss'] = path_loss(results['link_distance'], results['downlink_wavelength'])
+        results['received_power'] = (results['transmit_eirp'] + results['downlink_path_loss']
+                                     + values['polarization_losses'] + values['atmospheric_loss']
+                                     + values['receive_antenna_gain'] + values['receiving_pointing_loss'])
+        results['minimum_detectable_signal'] = minimum_detectable_signal(values['noise_bandwidth'],
+                                                                         values['system_noise_figure'])
+        results['energy_noise_ratio'] = results['received_power'] - results['minimum_detectable_signal']
+        results['link_margin'] = results['energy_noise_ratio'] - results['required_ebno']
+    return results
@@ -0,0 +1,263 @@
+import time
+import struct
+import sqlite3
+import hashlib
+import numpy as np
+
+from . import batch
+from .units import to_magnitude
+
+# default size limit of the cache file
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# results stored for every cached scenario
+RESULT_FIELDS = list(batch.OUTPUT_UNITS) + ['is_valid', 'invalid_reasons']
+
+# largest number of keys sent in a single SQLite statement
+_SQL_CHUNK = 500
+
+_INPUT_FORMAT = struct.Struct('<%dd' % len(batch.INPUT_UNITS))
+_RESULT_FORMAT = struct.Struct('<%dd?I' % len(batch.OUTPUT_UNITS))
+
+# result types that are not floats
+_RESULT_DTYPES = {'is_valid': bool, 'invalid_reasons': np.uint32}
+
+# bytes stored per entry: SHA-256 key, packed results and access time
+ENTRY_BYTES = 32 + _RESULT_FORMAT.size + 8
+
+
+def scenario_key(values):
+    """
+    Canonical hash of one scenario
+
+    The key covers every input in the units of batch.INPUT_UNITS, in a fixed
+    order, and batch.ENGINE_VERSION, so the same scenario expressed in other
+    units maps to the same key and results from another engine never match.
+
+    @type  values: sequence
+    @param values: input magnitudes in the order of batch.INPUT_UNITS
+
+    @rtype:  bytes
+    @return: SHA-256 digest
+
+    """
+    # + 0.0 folds negative zero into zero
+    packed = _INPUT_FORMAT.pack(*[value + 0.0 for value in values])
+    return hashlib.sha256(batch.ENGINE_VERSION.encode() + packed).digest()
+
+
+def scenario_keys(columns):
+    """
+    Canonical hashes of the scenarios in a set of columns
+
+    @type  columns: dict
+    @param columns: input name to pint quantity, number or array, missing
+                    inputs take the LinkBudgetCalculator defaults
+
+    @rtype:  tuple
+    @return: (list of keys, broadcast shape of the columns)
+
+    """
+    values = [to_magnitude(columns.get(name, 0.0), units, name) for name, units in batch.INPUT_UNITS.items()]
+    values = np.broadcast_arrays(*values)
+    shape = values[0].shape
+    rows = np.stack([np.ravel(value) for value in values], axis=-1)
+    return [scenario_key(row) for row in rows.tolist()], shape
+
+
+def calculator_key(calculator):
+    """
+    Canonical hash of the inputs of a configured calculator
+
+    @type  calculator: LinkBudgetCalculator
+    @param calculator: calculator holding the inputs
+
+    @rtype:  bytes
+    @return: SHA-256 digest
+
+    """
+    columns = batch.columns_from_calculator(calculator)
+    return scenario_key([columns[name] for name in batch.INPUT_UNITS])
+
+
+class ResultCache():
+    """
+    Persistent link budget result cache stored in a local SQLite file
+
+    Results are keyed by scenario_key(), so they can be shared between
+    processes and kept across runs. The least recently used entries are
+    evicted once the entries take more than max_bytes. Each instance keeps a
+    running count of the entries instead of counting them on every insert;
+    it is recounted when opening and evicting, so entries added by other
+    processes are seen at the latest on the next eviction.
+
+    Steps to use this class:
+        1) Instantiate a cache with the path of its SQLite file
+        2) Use evaluate() in place of batch.evaluate(), or get_many() and
+           put_many() to manage entries directly
+        3) Close the cache, or use it as a context manager
+
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        ResultCache Constructor
+
+        @type  path: string
+        @param path: SQLite file, created if needed
+        @type  max_bytes: int
+        @param max_bytes: size of the entries above which the least
+                          recently used ones are evicted
+
+        """
+        self._max_bytes = max_bytes
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                                 'key BLOB PRIMARY KEY, value BLOB NOT NULL, last_used REAL NOT NULL'
+                                 ') WITHOUT ROWID')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self._connection.commit()
+        # upper bound of the entries, replaced keys are counted as added
+        self._count = len(self)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    # ---------------- size ----------------
+    @property
+    def size(self):
+        """
+        Get the number of bytes of cached entries
+
+        This is the payload bound by max_bytes, the SQLite file itself is
+        larger by its page and index overhead.
+
+        @rtype:  int
+        @return: bytes of stored entries
+
+        """
+        return len(self) * ENTRY_BYTES
+
+    # --------------------------------------------------
+    # ----------------    functions     ----------------
+    # --------------------------------------------------
+
+    def get_many(self, keys):
+        """
+        Look up many scenarios at once
+
+        @type  keys: list
+        @param keys: keys from scenario_key()
+
+        @rtype:  dict
+        @return: key to result dict for the keys found in the cache
+
+        """
+        found = {}
+        keys = list(set(keys))
+        for start in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[start:start + _SQL_CHUNK]
+            rows = self._connection.execute('SELECT key, value FROM results WHERE key IN (%s)'
+                                            % ','.join('?' * len(chunk)), chunk).fetchall()
+            for key, value in rows:
+                found[key] = dict(zip(RESULT_FIELDS, _RESULT_FORMAT.unpack(value)))
+        if found:
+            now = time.time()
+            self._connection.executemany('UPDATE results SET last_used = ? WHERE key = ?',
+                                         [(now, key) for key in found])
+            self._connection.commit()
+        return found
+
+    def put_many(self, keys, results):
+        """
+        Store many scenarios at once
+
+        @type  keys: list
+        @param keys: keys from scenario_key()
+        @type  results: dict
+        @param results: result name to array with one value per key, e.g.
+                        from batch.evaluate()
+
+        """
+        columns = [np.ravel(results[name]).tolist() for name in RESULT_FIELDS]
+        now = time.time()
+        self._connection.executemany('INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)',
+                                     [(key, _RESULT_FORMAT.pack(*row), now)
+                                      for key, row in zip(keys, zip(*columns))])
+        self._connection.commit()
+        self._count += len(set(keys))
+        if self._count * ENTRY_BYTES > self._max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes=None):
+        """
+        Remove the least recently used entries
+
+        @type  target_bytes: int
+        @param target_bytes: size to shrink to, 90% of max_bytes when None
+
+        """
+        if target_bytes is None:
+            target_bytes = int(self._max_bytes * 0.9)
+        self._count = len(self)
+        remove = self._count - target_bytes // ENTRY_BYTES
+        if remove <= 0:
+            return
+        self._connection.execute('DELETE FROM results WHERE key IN '
+                                 '(SELECT key FROM results ORDER BY last_used LIMIT ?)', (remove,))
+        self._connection.commit()
+        self._count -= remove
+
+    def evaluate(self, columns):
+        """
+        Evaluate link budgets, reusing cached results
+
+        Behaves like batch.evaluate(), only the scenarios missing from the
+        cache are evaluated and then stored. Hits and misses count distinct
+        scenarios, repeats within the columns are counted once.
+
+        @type  columns: dict
+        @param columns: input name to pint quantity, number or array
+
+        @rtype:  dict
+        @return: result name to numpy array, as batch.evaluate()
+
+        """
+        keys, shape = scenario_keys(columns)
+        found = self.get_many(keys)
+        missing = {}
+        for index, key in enumerate(keys):
+            if key not in found and key not in missing:
+                missing[key] = index
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            rows = np.array(list(missing.values()))
+            subset = {}
+            for name, units in batch.INPUT_UNITS.items():
+                value = np.broadcast_to(to_magnitude(columns.get(name, 0.0), units, name), shape)
+                subset[name] = np.ravel(value)[rows]
+            computed = batch.evaluate(subset)
+            self.put_many(list(missing), computed)
+            for position, key in enumerate(missing):
+                found[key] = dict((name, computed[name][position]) for name in RESULT_FIELDS)
+        results = {}
+        for name in RESULT_FIELDS:
+            dtype = _RESULT_DTYPES.get(name, float)
+            results[name] = np.array([found[key][name] for key in keys], dtype=dtype).reshape(shape)
+        return results
+
+    def close(self):
+        """
+        Close the SQLite connection
+        """
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,94 @@
+import numpy as np
+
+from . import batch, validation
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS
+
+# per channel adjustments of the shared configuration and their units
+CHANNEL_OFFSETS = {
+    'power_offset':         'dB',
+    'transmit_gain_offset': 'dB',
+    'receive_gain_offset':  'dB',
+}
+
+
+def evaluate(columns, channels, link_distance=None, speed_of_light=batch.SPEED_OF_LIGHT,
+             earth_radius=EARTH_RADIUS):
+    """
+    Evaluate several channels of one link over whole arrays at once
+
+    The geometry and receive chain of columns are shared by every channel,
+    the slant range is computed once. Channels are appended as a last axis
+    and evaluated in a single broadcast call to batch.evaluate().
+
+    @type  columns: dict
+    @param columns: input name to pint quantity, number or array, as
+                    accepted by batch.evaluate(), e.g. from
+                    batch.columns_from_calculator()
+    @type  channels: dict
+    @param channels: per channel values, one dimensional and of the same
+                     length: any non geometry name of batch.INPUT_UNITS
+                     (typically downlink_frequency and noise_bandwidth)
+                     replacing the shared input, or CHANNEL_OFFSETS names
+                     in dB added to the transmit power and antenna gains
+    @type  link_distance: pint length or array (meters)
+    @param link_distance: slant ranges to use instead of the ground station
+                          geometry
+    @type  speed_of_light: number
+    @param speed_of_light: speed of light in meters per second
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  dict
+    @return: the results of batch.evaluate() with a last channel axis, plus
+             limiting_channel, index of the channel with the smallest valid
+             margin (-1 when none is valid), and limiting_margin (dB, NaN
+             when none is valid), without the channel axis
+
+    """
+    unknown = set(channels) - (set(batch.INPUT_UNITS) | set(CHANNEL_OFFSETS))
+    if unknown:
+        raise TypeError('Unknown channel inputs: %s' % ', '.join(sorted(unknown)))
+    shared = set(channels) & (set(validation.GEOMETRY_INPUTS) | {'altitude_ground_station'})
+    if shared:
+        raise ValueError('Geometry inputs cannot vary per channel: %s' % ', '.join(sorted(shared)))
+    units = dict(batch.INPUT_UNITS, **CHANNEL_OFFSETS)
+    channels = dict((name, np.asarray(to_magnitude(value, units[name], name), dtype=float))
+                    for name, value in channels.items())
+    if any(np.ndim(value) != 1 for value in channels.values()):
+        raise ValueError('Channel inputs must be one dimensional')
+    count = len(next(iter(channels.values()))) if channels else 1
+
+    geometry_reasons = 0
+    if link_distance is None:
+        link_distance, geometry_reasons = batch.shared_link_distance(columns, earth_radius)
+        geometry_reasons = np.expand_dims(geometry_reasons, -1)
+    else:
+        link_distance = to_magnitude(link_distance, 'meter', 'link_distance')
+    link_distance = np.expand_dims(link_distance, -1)
+
+    values = dict((name, np.expand_dims(to_magnitude(columns.get(name, 0.0), units, name), -1))
+                  for name, units in batch.INPUT_UNITS.items())
+    for name, value in channels.items():
+        if name not in CHANNEL_OFFSETS:
+            values[name] = value
+    if 'power_offset' in channels:
+        values['transmit_power'] = values['transmit_power'] * 10 ** (channels['power_offset'] / 10)
+    if 'transmit_gain_offset' in channels:
+        values['transmit_antenna_gain'] = values['transmit_antenna_gain'] + channels['transmit_gain_offset']
+    if 'receive_gain_offset' in channels:
+        values['receive_antenna_gain'] = values['receive_antenna_gain'] + channels['receive_gain_offset']
+    # every result gets the channel axis, even when no input varies per channel
+    values['downlink_frequency'] = np.broadcast_to(values['downlink_frequency'],
+                                                   np.shape(values['downlink_frequency'])[:-1] + (count,))
+
+    results = batch.evaluate(values, link_distance, speed_of_light, earth_radius)
+    batch.merge_geometry_reasons(results, geometry_reasons)
+
+    margins = np.where(results['is_valid'], results['link_margin'], np.inf)
+    limiting = np.argmin(margins, axis=-1)
+    limiting_margin = np.take_along_axis(margins, limiting[..., np.newaxis], axis=-1)[..., 0]
+    none_valid = ~results['is_valid'].any(axis=-1)
+    results['limiting_channel'] = np.where(none_valid, -1, limiting)
+    results['limiting_margin'] = np.where(none_valid, np.nan, limiting_margin)
+    return results
@@ -0,0 +1,140 @@
+import concurrent.futures
+import numpy as np
+
+from . import batch
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS, geodetic_to_ecef, slant_range, is_earth_blocked
+
+# default number of grid cells evaluated at once by one worker
+DEFAULT_TILE_CELLS = 1 << 20
+
+
+def ground_coverage(calculator, satellite_position, latitudes, longitudes, path, **kwargs):
+    """
+    Margin map of a satellite over a grid of ground station locations
+
+    Each grid cell holds a ground station at the calculator's
+    altitude_ground_station looking at the satellite.
+
+    @type  calculator: LinkBudgetCalculator
+    @param calculator: configuration of the link
+    @type  satellite_position: pint length or array (meters), shape (3,)
+    @param satellite_position: Earth-fixed position of the satellite
+    @type  latitudes: pint angle or array (degrees)
+    @param latitudes: latitudes of the grid rows
+    @type  longitudes: pint angle or array (degrees)
+    @param longitudes: longitudes of the grid columns
+    @type  path: string
+    @param path: .npy file receiving the map
+    @param kwargs: see coverage_map()
+
+    @rtype:  numpy memmap
+    @return: read only map of margin in dB, NaN where there is no link
+
+    """
+    return coverage_map(calculator, satellite_position, latitudes, longitudes,
+                        calculator.altitude_ground_station, path, **kwargs)
+
+
+def sky_coverage(calculator, station_position, latitudes, longitudes, path, **kwargs):
+    """
+    Margin map of a ground station over a grid of sub-satellite points
+
+    Each grid cell holds a satellite at the calculator's altitude_satellite
+    above the given latitude and longitude.
+
+    @type  calculator: LinkBudgetCalculator
+    @param calculator: configuration of the link
+    @type  station_position: pint length or array (meters), shape (3,)
+    @param station_position: Earth-fixed position of the ground station
+    @type  latitudes: pint angle or array (degrees)
+    @param latitudes: latitudes of the grid rows
+    @type  longitudes: pint angle or array (degrees)
+    @param longitudes: longitudes of the grid columns
+    @type  path: string
+    @param path: .npy file receiving the map
+    @param kwargs: see coverage_map()
+
+    @rtype:  numpy memmap
+    @return: read only map of margin in dB, NaN where there is no link
+
+    """
+    return coverage_map(calculator, station_position, latitudes, longitudes,
+                        calculator.altitude_satellite, path, **kwargs)
+
+
+def coverage_map(calculator, position, latitudes, longitudes, grid_altitude, path,
+                 tile_cells=DEFAULT_TILE_CELLS, jobs=1, dtype=np.float32, earth_radius=EARTH_RADIUS):
+    """
+    Margin map between a fixed position and every cell of a latitude and
+    longitude grid
+
+    The grid is evaluated in tiles of whole rows holding at most tile_cells
+    cells, so memory use does not depend on the grid size. Each tile is
+    written straight into a memory mapped .npy file, by up to jobs worker
+    processes.
+
+    @type  calculator: LinkBudgetCalculator
+    @param calculator: configuration of the link
+    @type  position: pint length or array (meters), shape (3,)
+    @param position: Earth-fixed position of the fixed end of the link
+    @type  latitudes: pint angle or array (degrees)
+    @param latitudes: latitudes of the grid rows
+    @type  longitudes: pint angle or array (degrees)
+    @param longitudes: longitudes of the grid columns
+    @type  grid_altitude: pint length or number (meters)
+    @param grid_altitude: altitude of the grid end of the link
+    @type  path: string
+    @param path: .npy file receiving the map
+    @type  tile_cells: int
+    @param tile_cells: maximum number of cells evaluated at once
+    @type  jobs: int
+    @param jobs: number of worker processes
+    @type  dtype: numpy dtype
+    @param dtype: type of the stored margins
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  numpy memmap
+    @return: read only map of margin in dB, shape (latitudes, longitudes),
+             NaN where the link is blocked by the Earth or invalid
+
+    """
+    columns = batch.columns_from_calculator(calculator)
+    position = to_magnitude(position, 'meter', 'position')
+    latitudes = np.atleast_1d(to_magnitude(latitudes, 'degree', 'latitudes'))
+    longitudes = np.atleast_1d(to_magnitude(longitudes, 'degree', 'longitudes'))
+    grid_altitude = to_magnitude(grid_altitude, 'meter', 'grid_altitude')
+
+    shape = (len(latitudes), len(longitudes))
+    output = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+    del output
+
+    rows = max(1, tile_cells // max(1, shape[1]))
+    tiles = [(path, columns, position, latitudes[start:start + rows], longitudes, grid_altitude,
+              start, earth_radius) for start in range(0, shape[0], rows)]
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            for future in [executor.submit(_evaluate_tile, *tile) for tile in tiles]:
+                future.result()
+    else:
+        for tile in tiles:
+            _evaluate_tile(*tile)
+    return np.load(path, mmap_mode='r')
+
+
+def _evaluate_tile(path, columns, position, latitudes, longitudes, grid_altitude, row_start, earth_radius):
+    """
+    Evaluate one tile of rows and write it into the memory mapped output
+    """
+    lat, lon = np.meshgrid(latitudes, longitudes, indexing='ij')
+    cells = geodetic_to_ecef(lat, lon, grid_altitude, earth_radius)
+    distance = slant_range(position, cells)
+    blocked = is_earth_blocked(position, cells, earth_radius)
+    results = batch.evaluate(columns, link_distance=distance)
+    margin = np.where(blocked | ~results['is_valid'], np.nan, results['link_margin'])
+
+    output = np.load(path, mmap_mode='r+')
+    output[row_start:row_start + len(latitudes)] = margin
+    output.flush()
+    del output
@@ -0,0 +1,131 @@
+import numpy as np
+
+from . import batch
+from .units import to_magnitude
+
+
+def range_and_rate(station_position, satellite_positions, satellite_velocities):
+    """
+    Slant range and range-rate from a station to satellites
+
+    @type  station_position: pint length or array (meters), shape (..., 3)
+    @param station_position: Earth-fixed station positions
+    @type  satellite_positions: pint length or array (meters), shape (..., 3)
+    @param satellite_positions: Earth-fixed satellite positions
+    @type  satellite_velocities: pint velocity or array (meters per second),
+                                 shape (..., 3)
+    @param satellite_velocities: Earth-fixed satellite velocities
+
+    @rtype:  tuple
+    @return: (slant range in meters, range-rate in meters per second,
+             positive when receding, line of sight vectors in meters)
+
+    """
+    station = to_magnitude(station_position, 'meter', 'station_position')
+    positions = to_magnitude(satellite_positions, 'meter', 'satellite_positions')
+    velocities = to_magnitude(satellite_velocities, 'meter / second', 'satellite_velocities')
+    line_of_sight = positions - station
+    distance = np.sqrt(np.einsum('...i,...i->...', line_of_sight, line_of_sight))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.einsum('...i,...i->...', line_of_sight, velocities) / distance
+    return distance, rate, line_of_sight
+
+
+def doppler_shift(range_rate, frequency, speed_of_light=batch.SPEED_OF_LIGHT):
+    """
+    Doppler shift of a carrier, first order in range-rate
+
+    @type  range_rate: numpy array
+    @param range_rate: range-rate in meters per second
+    @type  frequency: pint frequency or number (Hertz)
+    @param frequency: transmitted carrier frequency
+    @type  speed_of_light: number
+    @param speed_of_light: speed of light in meters per second
+
+    @rtype:  numpy array
+    @return: received minus transmitted frequency in Hertz
+
+    """
+    return -to_magnitude(frequency, 'hertz', 'frequency') * np.asarray(range_rate) / speed_of_light
+
+
+def doppler_rate(shift, times):
+    """
+    Time derivative of a Doppler shift profile
+
+    Second order differences over the time grid, which need not be regular.
+
+    @type  shift: numpy array, time along the last axis
+    @param shift: Doppler shift in Hertz
+    @type  times: numpy array
+    @param times: POSIX UTC seconds of the samples
+
+    @rtype:  numpy array
+    @return: Doppler rate in Hertz per second
+
+    """
+    if np.shape(shift)[-1] < 2:
+        return np.zeros(np.shape(shift))
+    return np.gradient(shift, np.asarray(times, dtype=float), axis=-1)
+
+
+def pass_profile(calculator, station_position, times, satellite_positions, satellite_velocities=None,
+                 minimum_elevation=0.0, speed_of_light=batch.SPEED_OF_LIGHT):
+    """
+    Link margin, range, range-rate and Doppler over a schedule of passes
+
+    The line of sight is computed once per sample and shared by the
+    elevation, the link distance fed to batch.evaluate() and the range-rate,
+    so a multi-day schedule is a single pass over the time grid.
+
+    @type  calculator: LinkBudgetCalculator
+    @param calculator: configuration of the link, its elevation and
+                       altitudes are replaced by the geometry
+    @type  station_position: pint length or array (meters), shape (3,)
+    @param station_position: Earth-fixed ground station position
+    @type  times: numpy array
+    @param times: POSIX UTC seconds of the samples, increasing
+    @type  satellite_positions: pint length or array (meters), shape (..., T, 3)
+    @param satellite_positions: Earth-fixed satellite positions at the times
+    @type  satellite_velocities: pint velocity or array (meters per second)
+    @param satellite_velocities: Earth-fixed velocities, differentiated from
+                                 the positions when None
+    @type  minimum_elevation: pint angle or number (degrees)
+    @param minimum_elevation: elevation below which the satellite is not in
+                              view
+    @type  speed_of_light: number
+    @param speed_of_light: speed of light in meters per second
+
+    @rtype:  dict
+    @return: arrays of shape (..., T): elevation (degrees), link_distance
+             (meters), range_rate (meters per second), doppler_shift (Hertz),
+             doppler_rate (Hertz per second), link_margin (dB, NaN when out
+             of view or invalid) and is_visible
+
+    """
+    times = np.asarray(times, dtype=float)
+    positions = to_magnitude(satellite_positions, 'meter', 'satellite_positions')
+    if satellite_velocities is None:
+        velocities = np.gradient(positions, times, axis=-2) if len(times) > 1 else np.zeros(positions.shape)
+    else:
+        velocities = to_magnitude(satellite_velocities, 'meter / second', 'satellite_velocities')
+    station = to_magnitude(station_position, 'meter', 'station_position')
+    distance, rate, line_of_sight = range_and_rate(station, positions, velocities)
+
+    up = np.einsum('i,...i->...', station, line_of_sight) / np.sqrt(np.dot(station, station))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        elevation = np.degrees(np.arcsin(np.clip(up / distance, -1.0, 1.0)))
+    is_visible = elevation > to_magnitude(minimum_elevation, 'degree', 'minimum_elevation')
+
+    columns = batch.columns_from_calculator(calculator)
+    results = batch.evaluate(columns, link_distance=distance, speed_of_light=speed_of_light)
+    shift = doppler_shift(rate, columns['downlink_frequency'], speed_of_light)
+    return {
+        'elevation': elevation,
+        'link_distance': distance,
+        'range_rate': rate,
+        'doppler_shift': shift,
+        'doppler_rate': doppler_rate(shift, times),
+        'link_margin': np.where(is_visible & results['is_valid'], results['link_margin'], np.nan),
+        'is_visible': is_visible,
+    }
@@ -0,0 +1,270 @@
+from . import batch, records
+from .units import DECIBEL_UNITS, conversion_factor
+from .geometry import EARTH_RADIUS
+from .link_budget_calculator import LinkBudgetCalculator
+
+# uplink inputs, the downlink input each one stands for and its units
+UPLINK_INPUTS = {
+    'uplink_frequency':                 ('downlink_frequency', 'hertz'),
+    'uplink_target_energy_noise_ratio': ('target_energy_noise_ratio', 'dB'),
+    'uplink_implementation_loss':       ('implementation_loss', 'dB'),
+    'uplink_transmit_power':            ('transmit_power', 'watt'),
+    'uplink_transmit_losses':           ('transmit_losses', 'dB'),
+    'uplink_transmit_antenna_gain':     ('transmit_antenna_gain', 'dB'),
+    'uplink_transmit_pointing_loss':    ('transmit_pointing_loss', 'dB'),
+    'uplink_receive_antenna_gain':      ('receive_antenna_gain', 'dB'),
+    'uplink_receiving_pointing_loss':   ('receiving_pointing_loss', 'dB'),
+    'uplink_system_noise_figure':       ('system_noise_figure', 'dB'),
+    'uplink_noise_bandwidth':           ('noise_bandwidth', 'hertz'),
+}
+
+# uplink intermediates and outputs and the downlink output each one stands for
+UPLINK_OUTPUTS = {
+    'uplink_wavelength':                ('downlink_wavelength', 'meter'),
+    'uplink_required_ebno':             ('required_ebno', 'dB'),
+    'uplink_transmit_power_dBm':        ('transmit_power_dBm', 'dBm'),
+    'uplink_transmit_eirp':             ('transmit_eirp', 'dBm'),
+    'uplink_path_loss':                 ('downlink_path_loss', 'dB'),
+    'uplink_received_power':            ('received_power', 'dBm'),
+    'uplink_minimum_detectable_signal': ('minimum_detectable_signal', 'dBm'),
+    'uplink_energy_noise_ratio':        ('energy_noise_ratio', 'dB'),
+    'uplink_link_margin':               ('link_margin', 'dB'),
+}
+
+# inputs shared by both directions: the geometry and the propagation losses
+SHARED_INPUTS = ('altitude_ground_station', 'altitude_satellite', 'orbit_elevation_angle',
+                 'polarization_losses', 'atmospheric_loss')
+
+# pint dimensionality checked by the setters of each pint unit
+_DIMENSIONS = {'hertz': ('[frequency]', 'frequency'), 'watt': ('[power]', 'power')}
+
+
+def uplink_columns(columns):
+    """
+    Map duplex input columns to the inputs of the uplink budget
+
+    @type  columns: dict
+    @param columns: input name to value, batch.INPUT_UNITS and UPLINK_INPUTS
+                    names
+
+    @rtype:  dict
+    @return: batch.INPUT_UNITS name to value for the uplink direction
+
+    """
+    uplink = dict((name, columns[name]) for name in SHARED_INPUTS if name in columns)
+    for name, (downlink_name, _) in UPLINK_INPUTS.items():
+        if name in columns:
+            uplink[downlink_name] = columns[name]
+    return uplink
+
+
+def evaluate(columns, link_distance=None, speed_of_light=batch.SPEED_OF_LIGHT, earth_radius=EARTH_RADIUS):
+    """
+    Evaluate downlink and uplink budgets over whole arrays in one pass
+
+    The slant range is computed once and shared by both directions. Each
+    direction is validated separately, rows with an invalid geometry are
+    invalid in both.
+
+    @type  columns: dict
+    @param columns: input name to pint quantity, number or array, with the
+                    names of batch.INPUT_UNITS and UPLINK_INPUTS
+    @type  link_distance: pint length or array (meters)
+    @param link_distance: slant ranges to use instead of the ground station
+                          geometry
+    @type  speed_of_light: number
+    @param speed_of_light: speed of light in meters per second
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  dict
+    @return: the results of batch.evaluate() for the downlink, plus the
+             UPLINK_OUTPUTS names, uplink_is_valid and uplink_invalid_reasons
+
+    """
+    geometry_reasons = 0
+    if link_distance is None:
+        link_distance, geometry_reasons = batch.shared_link_distance(columns, earth_radius)
+
+    results = batch.evaluate(columns, link_distance, speed_of_light, earth_radius)
+    uplink = batch.evaluate(uplink_columns(columns), link_distance, speed_of_light, earth_radius)
+    batch.merge_geometry_reasons(results, geometry_reasons)
+    batch.merge_geometry_reasons(uplink, geometry_reasons)
+    for name, (downlink_name, _) in UPLINK_OUTPUTS.items():
+        results[name] = uplink[downlink_name]
+    results['uplink_is_valid'] = uplink['is_valid']
+    results['uplink_invalid_reasons'] = uplink['invalid_reasons']
+    return results
+
+
+def _uplink_input(name):
+    """
+    Property of one uplink input, checking pint dimensions like the
+    LinkBudgetCalculator setters
+    """
+    downlink_name, units = UPLINK_INPUTS[name]
+
+    def getter(self):
+        return getattr(self, '_' + name)
+
+    def setter(self, value):
+        if units in _DIMENSIONS:
+            dimension, kind = _DIMENSIONS[units]
+            if not value.check(dimension):
+                raise TypeError('%s expected Pint %s, received %s' % (name, kind, str(value)))
+        setattr(self, '_' + name, value)
+
+    unit_text = 'Hertz' if units == 'hertz' else 'Watts' if units == 'watt' else units
+    getter.__doc__ = """
+        Get the uplink counterpart of %s in %s
+        """ % (downlink_name, unit_text)
+    setter.__doc__ = """
+        Change the uplink counterpart of %s in %s
+        """ % (downlink_name, unit_text)
+    return property(getter, setter)
+
+
+def _uplink_output(name):
+    """
+    Read only property of one uplink intermediate or output
+    """
+    downlink_name, units = UPLINK_OUTPUTS[name]
+
+    def getter(self):
+        return getattr(self, '_' + name)
+
+    getter.__doc__ = """
+        Get the uplink counterpart of %s in %s
+        """ % (downlink_name, units)
+    return property(getter)
+
+
+class DuplexLinkBudgetCalculator(LinkBudgetCalculator):
+    """
+    Calculator for the downlink and the uplink of one link
+
+    The inherited inputs and outputs describe the downlink. The uplink has
+    its own frequency, transmitter, antenna gains and receiver, named with
+    an uplink_ prefix, and shares the geometry, polarization and
+    atmospheric losses with the downlink. The slant range is computed once
+    per run() for both directions.
+
+    Steps to use this class:
+        1) Instantiate a calculator with a valid pint unit registry
+        2) Change downlink and uplink input variables to match desired link
+           budget values
+        3) Use the run function to update outputs of both directions
+        4) Use getters to access output and intermediate values, uplink ones
+           carry the uplink_ prefix
+
+    """
+
+    def __init__(self, ureg):
+        """
+        DuplexLinkBudgetCalculator Constructor
+
+        @type  ureg: pint Unit Registry
+        @param ureg: pint unit registry for calculations and conversions
+
+        """
+        super().__init__(ureg)
+        # uplink inputs
+        for name, (_, units) in UPLINK_INPUTS.items():
+            setattr(self, '_' + name, 0 * ureg(units) if units in _DIMENSIONS else 0.0)
+        # uplink intermediates and outputs
+        for name, (_, units) in UPLINK_OUTPUTS.items():
+            setattr(self, '_' + name, 0 * ureg.meter if units == 'meter' else 0.0)
+        self._uplink_is_valid = False
+
+    # ---------------- uplink_is_valid ----------------
+    @property
+    def uplink_is_valid(self):
+        """
+        Get the uplink_is_valid flag to determine if the run() function
+        successfully calculated an uplink margin
+
+        @rtype:  bool
+        @return: validity of uplink output variables
+
+        """
+        return self._uplink_is_valid
+
+    # ---------------- uplink_inputs ----------------
+    @property
+    def uplink_inputs(self):
+        """
+        Get an immutable snapshot of the uplink inputs, under the downlink
+        input names
+
+        @rtype:  LinkBudgetInputs
+        @return: inputs record that can be evaluated with records.evaluate()
+
+        """
+        return self.inputs.replace(**dict((downlink_name, getattr(self, name))
+                                          for name, (downlink_name, _) in UPLINK_INPUTS.items()))
+
+    # --------------------------------------------------
+    # ----------------    functions     ----------------
+    # --------------------------------------------------
+
+    def configure(self, values=None, **kwargs):
+        """
+        Change many downlink and uplink inputs in one call
+
+        @type  values: dict
+        @param values: input name to pint quantity, or number for dB inputs,
+                       uplink inputs carry the uplink_ prefix
+        @param kwargs: more inputs, taking precedence over values
+
+        """
+        values = dict(values or {}, **kwargs)
+        uplink = dict((name, values.pop(name)) for name in list(values) if name in UPLINK_INPUTS)
+        for name, value in uplink.items():
+            units = UPLINK_INPUTS[name][1]
+            if units in DECIBEL_UNITS:
+                continue
+            if not hasattr(value, 'units'):
+                raise TypeError('%s expected Pint quantity in %s, received %s' % (name, units, str(value)))
+            conversion_factor(value.units, units, name)
+        super().configure(values)
+        for name, value in uplink.items():
+            setattr(self, '_' + name, value)
+
+    def run(self):
+        """
+        Run function to perform calculations of both directions
+
+        The downlink is computed first and raises like
+        LinkBudgetCalculator.run(); the uplink reuses its link distance.
+        is_valid and uplink_is_valid are True once each direction succeeded.
+
+        """
+        self._uplink_is_valid = False
+        super().run()
+
+        result = records.evaluate(self.uplink_inputs,
+                                  self.c.to('meter / second').magnitude,
+                                  self.Re.to('meter').magnitude,
+                                  link_distance=self._link_distance.to('meter').magnitude)
+        for name, (downlink_name, units) in UPLINK_OUTPUTS.items():
+            value = getattr(result, downlink_name)
+            setattr(self, '_' + name, value * self._ureg.meter if units == 'meter' else value)
+        self._uplink_is_valid = True
+
+    def __str__(self):
+        val = super().__str__()
+        val = val + '---------------- uplink ----------------\n'
+        for name in UPLINK_INPUTS:
+            val = val + '{}:\t {}\n'.format(name, str(getattr(self, name)))
+        for name in UPLINK_OUTPUTS:
+            val = val + '{}:\t {}\n'.format(name, str(getattr(self, name)))
+        val = val + 'Uplink Valid Calculation:\t {}\n'.format(str(self._uplink_is_valid))
+        return val
+
+
+# uplink inputs and outputs, read and written like the downlink ones
+for _name in UPLINK_INPUTS:
+    setattr(DuplexLinkBudgetCalculator, _name, _uplink_input(_name))
+for _name in UPLINK_OUTPUTS:
+    setattr(DuplexLinkBudgetCalculator, _name, _uplink_output(_name))
+del _name
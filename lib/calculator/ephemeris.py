@@ -0,0 +1,268 @@
+import re
+import calendar
+import numpy as np
+
+from . import batch, orbit
+from .store import ResultStore
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS, geodetic_to_ecef
+
+# default number of ephemeris lines parsed at once
+DEFAULT_CHUNK_SIZE = 1 << 14
+
+# reference frames whose states are already Earth-fixed
+FIXED_FRAMES = ('ITRF', 'ITRF-93', 'ITRF-97', 'ITRF2000', 'ITRF2005', 'ITRF2008', 'ITRF2014', 'ITRF2020',
+                'ITRF1993', 'ITRF1997', 'IAU_EARTH')
+
+# inertial reference frames and the orbit.INERTIAL_FRAMES they are rotated
+# from, GCRF and ICRF differ from J2000 by a frame bias of milliarcseconds
+INERTIAL_FRAMES = {
+    'TEME':    'TEME',
+    'TOD':     'TOD',
+    'MOD':     'MOD',
+    'EME2000': 'J2000',
+    'J2000':   'J2000',
+    'GCRF':    'J2000',
+    'ICRF':    'J2000',
+}
+
+# columns written by ingest_oem()
+TIMELINE_COLUMNS = {
+    'elevation':     'degree',
+    'link_distance': 'meter',
+    'link_margin':   'dB',
+    'is_visible':    '',
+}
+
+_DAY_OF_YEAR = re.compile(r'^(\d{4})-(\d{3})T(\d{2}):(\d{2}):(\d+(?:\.\d*)?)Z?$')
+
+
+def parse_epochs(epochs):
+    """
+    Convert CCSDS epochs to POSIX seconds
+
+    @type  epochs: list
+    @param epochs: strings as YYYY-MM-DDThh:mm:ss[.d] or YYYY-DDDThh:mm:ss[.d]
+
+    @rtype:  numpy array
+    @return: POSIX seconds
+
+    """
+    try:
+        stamps = np.array([epoch.rstrip('Z') for epoch in epochs], dtype='datetime64[ns]')
+        return stamps.astype(np.int64) / 1e9
+    except ValueError:
+        seconds = []
+        for epoch in epochs:
+            match = _DAY_OF_YEAR.match(epoch)
+            if match is None:
+                raise ValueError('Invalid epoch: %s' % epoch)
+            year, day, hour, minute, second = match.groups()
+            seconds.append(calendar.timegm((int(year), 1, 1, int(hour), int(minute), 0))
+                           + (int(day) - 1) * 86400.0 + float(second))
+        return np.array(seconds)
+
+
+def read_oem(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parse a CCSDS Orbit Ephemeris Message in KVN form, one chunk at a time
+
+    Only chunk_size state lines are held at once, covariance sections and
+    comments are skipped. Epochs must be in UTC and states centred on the
+    Earth, in one of FIXED_FRAMES or INERTIAL_FRAMES.
+
+    @type  stream: file
+    @param stream: text stream of the message
+    @type  chunk_size: int
+    @param chunk_size: largest number of states per chunk
+
+    @rtype:  generator
+    @return: (metadata dict, times in POSIX seconds, positions in meters,
+             velocities in meters per second) per chunk, the metadata dict is
+             the same object for every chunk of a segment
+
+    """
+    metadata = None
+    section = None
+    epochs = []
+    states = []
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('COMMENT'):
+            continue
+        if line in ('META_START', 'COVARIANCE_START'):
+            if epochs:
+                yield _chunk(metadata, epochs, states)
+                epochs, states = [], []
+            section = line
+            if line == 'META_START':
+                metadata = {}
+            continue
+        if line in ('META_STOP', 'COVARIANCE_STOP'):
+            if line == 'META_STOP':
+                _check_metadata(metadata)
+            section = 'DATA' if line == 'META_STOP' else None
+            continue
+        if section == 'META_START':
+            key, _, value = line.partition('=')
+            metadata[key.strip()] = value.strip()
+        elif section == 'DATA':
+            fields = line.split()
+            if len(fields) < 7:
+                raise ValueError('Invalid ephemeris line: %s' % line)
+            epochs.append(fields[0])
+            states.append(fields[1:7])
+            if len(epochs) >= chunk_size:
+                yield _chunk(metadata, epochs, states)
+                epochs, states = [], []
+    if epochs:
+        yield _chunk(metadata, epochs, states)
+
+
+def _check_metadata(metadata):
+    """
+    Reject segments in time systems, centres or frames that are not handled
+    """
+    if metadata.get('TIME_SYSTEM', 'UTC') != 'UTC':
+        raise ValueError('Unsupported time system: %s' % metadata['TIME_SYSTEM'])
+    if metadata.get('CENTER_NAME', 'EARTH').upper() != 'EARTH':
+        raise ValueError('Unsupported center: %s' % metadata['CENTER_NAME'])
+    if metadata.get('REF_FRAME', '').upper() not in FIXED_FRAMES + tuple(INERTIAL_FRAMES):
+        raise ValueError('Unsupported reference frame: %s' % metadata.get('REF_FRAME', ''))
+
+
+def _chunk(metadata, epochs, states):
+    # OEM states are in kilometers and kilometers per second
+    states = np.array(states, dtype=float) * 1000.0
+    return metadata, parse_epochs(epochs), states[:, :3], states[:, 3:]
+
+
+def hermite(times, positions, velocities, targets):
+    """
+    Cubic Hermite interpolation of states between samples
+
+    @type  times: numpy array
+    @param times: sample times, increasing, shape (N,)
+    @type  positions: numpy array
+    @param positions: sample positions, shape (N, 3)
+    @type  velocities: numpy array
+    @param velocities: sample velocities, shape (N, 3)
+    @type  targets: numpy array
+    @param targets: times to interpolate at, within the samples
+
+    @rtype:  tuple
+    @return: (positions, velocities) at the targets
+
+    """
+    index = np.clip(np.searchsorted(times, targets, side='right') - 1, 0, len(times) - 2)
+    step = (times[index + 1] - times[index])[:, np.newaxis]
+    s = ((targets - times[index])[:, np.newaxis]) / step
+    s2 = s * s
+    s3 = s2 * s
+    p0, p1 = positions[index], positions[index + 1]
+    m0, m1 = velocities[index] * step, velocities[index + 1] * step
+    position = ((2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * m0
+                + (-2 * s3 + 3 * s2) * p1 + (s3 - s2) * m1)
+    velocity = ((6 * s2 - 6 * s) * p0 + (3 * s2 - 4 * s + 1) * m0
+                + (-6 * s2 + 6 * s) * p1 + (3 * s2 - 2 * s) * m1) / step
+    return position, velocity
+
+
+def resample(chunks, step, start=None):
+    """
+    Interpolate parsed chunks onto a regular time grid
+
+    The last sample of each chunk is kept to bridge to the next chunk of the
+    same segment; no time is interpolated across segments.
+
+    @type  chunks: iterable
+    @param chunks: chunks from read_oem()
+    @type  step: number
+    @param step: grid step in seconds
+    @type  start: number
+    @param start: POSIX seconds the grid is aligned on, the first epoch
+                  when None
+
+    @rtype:  generator
+    @return: (metadata, times, positions, velocities) on the grid per chunk,
+             times strictly increasing over all chunks
+
+    """
+    previous = None
+    last = -np.inf
+    for metadata, times, positions, velocities in chunks:
+        if start is None:
+            start = times[0]
+        if previous is not None and previous[0] is metadata:
+            times = np.concatenate([previous[1][-1:], times])
+            positions = np.concatenate([previous[2][-1:], positions])
+            velocities = np.concatenate([previous[3][-1:], velocities])
+        previous = (metadata, times, positions, velocities)
+        if len(times) < 2:
+            continue
+        first = max(np.ceil((times[0] - start) / step), np.floor((last - start) / step) + 1)
+        targets = start + step * np.arange(first, np.floor((times[-1] - start) / step) + 1)
+        if len(targets):
+            last = targets[-1]
+            yield (metadata, targets) + hermite(times, positions, velocities, targets)
+
+
+def ingest_oem(stream, calculator, stations, path, step, minimum_elevation=0.0,
+               chunk_size=DEFAULT_CHUNK_SIZE, earth_radius=EARTH_RADIUS):
+    """
+    Stream an OEM file into a margin timeline stored on disk
+
+    The message is parsed, resampled, converted to look angles and
+    evaluated chunk by chunk, every chunk being appended to a ResultStore
+    with a time axis and a station axis. States in INERTIAL_FRAMES are
+    rotated to Earth-fixed with orbit.inertial_to_fixed().
+
+    @type  stream: file
+    @param stream: text stream of the message
+    @type  calculator: LinkBudgetCalculator
+    @param calculator: configuration of the link, its elevation and
+                       altitudes are replaced by the geometry
+    @type  stations: tuple
+    @param stations: (latitudes, longitudes, altitudes) of the stations,
+                     pint quantities or degrees and meters
+    @type  path: string
+    @param path: store directory
+    @type  step: pint time or number (seconds)
+    @param step: timeline step
+    @type  minimum_elevation: pint angle or number (degrees)
+    @param minimum_elevation: elevation below which the satellite is not in
+                              view
+    @type  chunk_size: int
+    @param chunk_size: largest number of states parsed at once
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters of the station positions
+
+    @rtype:  ResultStore
+    @return: store opened read only, columns of TIMELINE_COLUMNS with shape
+             (times, stations)
+
+    """
+    latitudes, longitudes, altitudes = stations
+    station_positions = np.reshape(geodetic_to_ecef(latitudes, longitudes, altitudes, earth_radius), (-1, 3))
+    minimum_elevation = to_magnitude(minimum_elevation, 'degree', 'minimum_elevation')
+    step = to_magnitude(step, 'second', 'step')
+    columns = batch.columns_from_calculator(calculator)
+
+    store = ResultStore.create(path, [('time', [], 'second'),
+                                      ('station', np.arange(len(station_positions)), '')],
+                               columns=TIMELINE_COLUMNS,
+                               attributes={'step': step, 'minimum_elevation': minimum_elevation})
+    for metadata, times, positions, velocities in resample(read_oem(stream, chunk_size), step):
+        frame = metadata['REF_FRAME'].upper()
+        if frame in INERTIAL_FRAMES:
+            positions, velocities = orbit.inertial_to_fixed(positions, velocities, times, INERTIAL_FRAMES[frame])
+        elevation, distance = orbit.look_angles(station_positions, positions[np.newaxis])
+        elevation, distance = elevation[0].T, distance[0].T
+        results = batch.evaluate(columns, link_distance=distance)
+        is_visible = elevation > minimum_elevation
+        store.append({'elevation': elevation,
+                      'link_distance': distance,
+                      'link_margin': np.where(is_visible & results['is_valid'], results['link_margin'], np.nan),
+                      'is_visible': is_visible}, times)
+    store.close()
+    return ResultStore.open(path)
@@ -0,0 +1,147 @@
+import numpy as np
+
+from .units import to_magnitude
+
+# Average Earth radius in meters, same value as LinkBudgetCalculator.Re
+EARTH_RADIUS = 6371.0e3
+
+
+def geodetic_to_ecef(latitude, longitude, altitude, earth_radius=EARTH_RADIUS):
+    """
+    Convert latitude, longitude and altitude to Earth-fixed positions
+
+    The Earth is treated as a sphere of radius earth_radius, matching the
+    geometry used by LinkBudgetCalculator.run().
+
+    @type  latitude: pint angle or array (degrees)
+    @param latitude: geocentric latitude
+    @type  longitude: pint angle or array (degrees)
+    @param longitude: longitude
+    @type  altitude: pint length or array (meters)
+    @param altitude: altitude above the spherical Earth
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  numpy array
+    @return: positions in meters, shape (..., 3)
+
+    """
+    lat = np.radians(to_magnitude(latitude, 'degree', 'latitude'))
+    lon = np.radians(to_magnitude(longitude, 'degree', 'longitude'))
+    radius = earth_radius + to_magnitude(altitude, 'meter', 'altitude')
+    lat, lon, radius = np.broadcast_arrays(lat, lon, radius)
+    cos_lat = np.cos(lat)
+    return np.stack((radius * cos_lat * np.cos(lon),
+                     radius * cos_lat * np.sin(lon),
+                     radius * np.sin(lat)), axis=-1)
+
+
+def slant_range(position_a, position_b):
+    """
+    Distance between two sets of positions
+
+    Both position sets must be expressed in the same frame (ECEF or ECI),
+    the result does not depend on which one.
+
+    @type  position_a: pint length or array (meters), shape (..., 3)
+    @param position_a: first end of each link
+    @type  position_b: pint length or array (meters), shape (..., 3)
+    @param position_b: second end of each link
+
+    @rtype:  numpy array
+    @return: slant range of each link in meters
+
+    """
+    a = to_magnitude(position_a, 'meter', 'position_a')
+    b = to_magnitude(position_b, 'meter', 'position_b')
+    delta = b - a
+    return np.sqrt(np.einsum('...i,...i->...', delta, delta))
+
+
+def is_earth_blocked(position_a, position_b, earth_radius=EARTH_RADIUS, grazing_altitude=0.0):
+    """
+    Flag links whose line of sight passes through the Earth
+
+    A link is blocked when a point strictly between its two ends comes
+    closer to the Earth centre than earth_radius + grazing_altitude. The ends
+    themselves never block, so ground stations sitting on the surface see
+    everything above their horizon.
+
+    @type  position_a: pint length or array (meters), shape (..., 3)
+    @param position_a: first end of each link
+    @type  position_b: pint length or array (meters), shape (..., 3)
+    @param position_b: second end of each link
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+    @type  grazing_altitude: pint length or number (meters)
+    @param grazing_altitude: extra clearance above the surface, e.g. to
+                             exclude the lower atmosphere
+
+    @rtype:  numpy array of bool
+    @return: True where the link is blocked
+
+    """
+    a = to_magnitude(position_a, 'meter', 'position_a')
+    b = to_magnitude(position_b, 'meter', 'position_b')
+    limit = earth_radius + to_magnitude(grazing_altitude, 'meter', 'grazing_altitude')
+    delta = b - a
+    length_sq = np.einsum('...i,...i->...', delta, delta)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = -np.einsum('...i,...i->...', a, delta) / length_sq
+    interior = (t > 0) & (t < 1)
+    t = np.where(interior, t, 0.0)
+    closest = a + t[..., np.newaxis] * delta
+    return interior & (np.einsum('...i,...i->...', closest, closest) < limit * limit)
+
+
+def elevation_angle(station_position, target_position):
+    """
+    Elevation of targets above the local horizon of stations
+
+    The local vertical is the radial direction of the station, consistent
+    with the spherical Earth used elsewhere in the calculator.
+
+    @type  station_position: pint length or array (meters), shape (..., 3)
+    @param station_position: observer positions
+    @type  target_position: pint length or array (meters), shape (..., 3)
+    @param target_position: target positions, same frame as the stations
+
+    @rtype:  numpy array
+    @return: elevation angles in degrees
+
+    """
+    s = to_magnitude(station_position, 'meter', 'station_position')
+    t = to_magnitude(target_position, 'meter', 'target_position')
+    delta = t - s
+    up = np.einsum('...i,...i->...', s, delta)
+    norm = np.sqrt(np.einsum('...i,...i->...', s, s) * np.einsum('...i,...i->...', delta, delta))
+    return np.degrees(np.arcsin(np.clip(up / norm, -1.0, 1.0)))
+
+
+def ground_slant_range(orbit_elevation_angle, altitude_ground_station, altitude_satellite,
+                       earth_radius=EARTH_RADIUS):
+    """
+    Slant range from a ground station to a satellite seen at a given elevation
+
+    Vectorized form of the link distance in LinkBudgetCalculator.run(),
+    written so that it needs no special case at 90 degrees.
+
+    @type  orbit_elevation_angle: pint angle or array (degrees)
+    @param orbit_elevation_angle: elevation of the satellite seen from the station
+    @type  altitude_ground_station: pint length or array (meters)
+    @param altitude_ground_station: altitude of the ground station
+    @type  altitude_satellite: pint length or array (meters)
+    @param altitude_satellite: altitude of the satellite
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  numpy array
+    @return: slant range in meters
+
+    """
+    elevation = np.radians(to_magnitude(orbit_elevation_angle, 'degree', 'orbit_elevation_angle'))
+    r_station = earth_radius + to_magnitude(altitude_ground_station, 'meter', 'altitude_ground_station')
+    r_satellite = earth_radius + to_magnitude(altitude_satellite, 'meter', 'altitude_satellite')
+    horizontal = r_station * np.cos(elevation)
+    with np.errstate(invalid='ignore'):
+        return np.sqrt(r_satellite * r_satellite - horizontal * horizontal) - r_station * np.sin(elevation)
@@ -0,0 +1,139 @@
+import numpy as np
+
+from . import batch, antenna
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS, slant_range, is_earth_blocked
+
+# default number of victim links evaluated at once
+DEFAULT_CHUNK_SIZE = 1024
+
+
+def aggregate(calculator, receivers, transmitters, interferers, interferer_boresights, receive_beamwidth,
+              transmit_beamwidth, interferer_eirp=None, serving=None, chunk_size=DEFAULT_CHUNK_SIZE,
+              sidelobe_level=antenna.DEFAULT_SIDELOBE_LEVEL, speed_of_light=batch.SPEED_OF_LIGHT,
+              earth_radius=EARTH_RADIUS):
+    """
+    Carrier to noise plus interference of victim links among co-channel
+    transmitters
+
+    Every victim receiver points at its wanted transmitter and receives the
+    power of all interferers in view, through the same path loss and losses
+    as the wanted link plus a gaussian pattern at both antennas. Interferers
+    are culled before any loss is computed: a matrix product of unit
+    position vectors keeps those within the sum of both horizon angles, the
+    exact Earth blockage test then runs on the remaining pairs only. Victims
+    are processed in chunks, so memory grows with chunk_size times the
+    number of interferers.
+
+    @type  calculator: LinkBudgetCalculator
+    @param calculator: configuration of the victim links, its geometry is
+                       replaced by the positions
+    @type  receivers: pint length or array (meters), shape (V, 3)
+    @param receivers: Earth-fixed positions of the victim receivers
+    @type  transmitters: pint length or array (meters), shape (V, 3)
+    @param transmitters: Earth-fixed positions of the wanted transmitters
+    @type  interferers: pint length or array (meters), shape (I, 3)
+    @param interferers: Earth-fixed positions of the co-channel transmitters
+    @type  interferer_boresights: pint length or array (meters), shape (I, 3)
+    @param interferer_boresights: positions the interferers point at
+    @type  receive_beamwidth: pint angle or number (degrees)
+    @param receive_beamwidth: half power beamwidth of the victim receivers
+    @type  transmit_beamwidth: pint angle or number (degrees)
+    @param transmit_beamwidth: half power beamwidth of the interferers
+    @type  interferer_eirp: number or array, shape (I,)
+    @param interferer_eirp: boresight EIRP of the interferers in dBm, the
+                            EIRP of the wanted link when None
+    @type  serving: array of int, shape (V,)
+    @param serving: index among the interferers of the wanted transmitter
+                    of each victim, which does not interfere with itself,
+                    negative when it is not among them
+    @type  chunk_size: int
+    @param chunk_size: number of victims evaluated at once
+    @type  sidelobe_level: number
+    @param sidelobe_level: lowest antenna gain relative to boresight in dB
+    @type  speed_of_light: number
+    @param speed_of_light: speed of light in meters per second
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  dict
+    @return: arrays of shape (V,): the results of batch.evaluate() for the
+             wanted links, plus interference_power (dBm, -inf without
+             interferers), interferer_count, carrier_noise_interference (dB)
+             and interference_margin (dB), the link margin with the
+             interference added to the noise; is_valid is False and the
+             outputs are NaN where the wanted link is invalid or blocked by
+             the Earth
+
+    """
+    receivers = np.reshape(to_magnitude(receivers, 'meter', 'receivers'), (-1, 3))
+    transmitters = np.reshape(to_magnitude(transmitters, 'meter', 'transmitters'), (-1, 3))
+    interferers = np.reshape(to_magnitude(interferers, 'meter', 'interferers'), (-1, 3))
+    boresights = np.reshape(to_magnitude(interferer_boresights, 'meter', 'interferer_boresights'), (-1, 3))
+    receive_beamwidth = to_magnitude(receive_beamwidth, 'degree', 'receive_beamwidth')
+    transmit_beamwidth = to_magnitude(transmit_beamwidth, 'degree', 'transmit_beamwidth')
+    serving = np.full(len(receivers), -1) if serving is None else np.asarray(serving)
+
+    columns = batch.columns_from_calculator(calculator)
+    results = batch.evaluate(columns, slant_range(receivers, transmitters), speed_of_light, earth_radius)
+    is_valid = results['is_valid'] & ~is_earth_blocked(receivers, transmitters, earth_radius)
+    # blocked wanted links have no carrier, like invalid ones
+    for name in batch.OUTPUT_UNITS:
+        results[name] = np.where(is_valid, results[name], np.nan)
+    if interferer_eirp is None:
+        interferer_eirp = np.nanmax(results['transmit_eirp']) if is_valid.any() else 0.0
+    interferer_eirp = np.broadcast_to(np.asarray(interferer_eirp, dtype=float), (len(interferers),))
+
+    # losses of the interfering paths that do not depend on the geometry
+    wavelength = batch.downlink_wavelength(columns['downlink_frequency'], speed_of_light)
+    fixed_loss = (columns['polarization_losses'] + columns['atmospheric_loss']
+                  + columns['receive_antenna_gain'] + columns['receiving_pointing_loss'])
+
+    # horizon culling: both ends see each other only if their central angle
+    # is below the sum of their angles to the tangent point
+    receiver_radius = np.sqrt(np.einsum('ij,ij->i', receivers, receivers))
+    interferer_radius = np.sqrt(np.einsum('ij,ij->i', interferers, interferers))
+    receiver_horizon = np.arccos(np.clip(earth_radius / receiver_radius, -1.0, 1.0))
+    interferer_horizon = np.arccos(np.clip(earth_radius / interferer_radius, -1.0, 1.0))
+    receiver_unit = receivers / receiver_radius[:, np.newaxis]
+    interferer_unit = interferers / interferer_radius[:, np.newaxis]
+
+    interference = np.zeros(len(receivers))
+    count = np.zeros(len(receivers), dtype=np.int64)
+    # without interferers the loop is skipped and the result is C/N
+    for start in range(0, len(receivers) if len(interferers) else 0, chunk_size):
+        stop = min(start + chunk_size, len(receivers))
+        cosine = receiver_unit[start:stop] @ interferer_unit.T
+        limit = np.cos(np.minimum(receiver_horizon[start:stop, np.newaxis] + interferer_horizon, np.pi))
+        candidate = cosine >= limit
+        served = np.flatnonzero(serving[start:stop] >= 0)
+        candidate[served, serving[start:stop][served]] = False
+        rows, cols = np.nonzero(candidate)
+        victim = rows + start
+
+        visible = ~is_earth_blocked(receivers[victim], interferers[cols], earth_radius)
+        rows, cols, victim = rows[visible], cols[visible], victim[visible]
+
+        power = (interferer_eirp[cols]
+                 + antenna.gaussian_beam_loss(antenna.off_axis_angle(interferers[cols], boresights[cols],
+                                                                     receivers[victim]),
+                                              transmit_beamwidth, sidelobe_level)
+                 + batch.path_loss(slant_range(receivers[victim], interferers[cols]), wavelength)
+                 + antenna.gaussian_beam_loss(antenna.off_axis_angle(receivers[victim], transmitters[victim],
+                                                                     interferers[cols]),
+                                              receive_beamwidth, sidelobe_level)
+                 + fixed_loss)
+        interference[start:stop] = np.bincount(rows, weights=10 ** (power / 10), minlength=stop - start)
+        count[start:stop] = np.bincount(rows, minlength=stop - start)
+
+    with np.errstate(divide='ignore'):
+        interference_power = 10 * np.log10(interference)
+    noise = 10 ** (results['minimum_detectable_signal'] / 10)
+    carrier_noise_interference = results['received_power'] - 10 * np.log10(noise + interference)
+    results['is_valid'] = is_valid
+    results['interference_power'] = interference_power
+    results['interferer_count'] = count
+    results['carrier_noise_interference'] = np.where(is_valid, carrier_noise_interference, np.nan)
+    results['interference_margin'] = np.where(is_valid, carrier_noise_interference - results['required_ebno'],
+                                              np.nan)
+    return results
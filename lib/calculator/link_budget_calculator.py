@@ -3,6 +3,10 @@ import math
 import logging
 import warnings
 
+from . import records
+from .batch import INPUT_UNITS
+from .units import DECIBEL_UNITS, conversion_factor
+
 class LinkBudgetCalculator():
     """
     Calculator for link budgets
@@ -579,10 +583,67 @@ class LinkBudgetCalculator():
         """
         return self._is_valid
     
+    # ---------------- inputs ----------------
+    @property
+    def inputs(self):
+        """
+        Get an immutable snapshot of the current inputs
+        
+        @rtype:  LinkBudgetInputs
+        @return: inputs record that can be evaluated with records.evaluate()
+        
+        """
+        return records.LinkBudgetInputs.from_calculator(self)
+    
     # --------------------------------------------------
     # ----------------    functions     ----------------
     # --------------------------------------------------
     
+    @classmethod
+    def from_mapping(cls, ureg, values):
+        """
+        Build a calculator configured from a mapping of inputs
+        
+        @type  ureg: pint Unit Registry
+        @param ureg: pint unit registry for calculations and conversions
+        @type  values: dict
+        @param values: input name to value, as accepted by configure()
+        
+        @rtype:  LinkBudgetCalculator
+        @return: configured calculator
+        
+        """
+        calculator = cls(ureg)
+        calculator.configure(values)
+        return calculator
+    
+    def configure(self, values=None, **kwargs):
+        """
+        Change many inputs in one call
+        
+        Quantities are checked like the setters do, but the dimensionality
+        check runs once per unit rather than once per value. Nothing is
+        changed when any input is rejected.
+        
+        @type  values: dict
+        @param values: input name to pint quantity, or number for dB inputs
+        @param kwargs: more inputs, taking precedence over values
+        
+        """
+        values = dict(values or {}, **kwargs)
+        unknown = set(values) - set(INPUT_UNITS)
+        if unknown:
+            raise TypeError('Unknown link budget inputs: %s' % ', '.join(sorted(unknown)))
+        for name, value in values.items():
+            units = INPUT_UNITS[name]
+            if units in DECIBEL_UNITS:
+                continue
+            if not hasattr(value, 'units'):
+                raise TypeError('%s expected Pint quantity in %s, received %s' % (name, units, str(value)))
+            conversion_factor(value.units, units, name)
+        for name, value in values.items():
+            setattr(self, '_' + name, value)
+    
     def run(self):
         """
         Run function to perform calculations necessary to determine outputs
@@ -594,97 +655,69 @@ class LinkBudgetCalculator():
         # set is_valid to false every time a run is initiated
         self._is_valid = False
         
-        # raise exceptions for any errors
-        if (self._downlink_frequency.magnitude <= 0):
-            raise ValueError('Invalid Frequency')
-        if (self._altitude_satellite.magnitude <= 0):
-            raise ValueError('Invalid Satellite Altitude')
-        if (self._orbit_elevation_angle.magnitude <= 0):
-            raise ValueError('Invalid elevation angle')
-        if (self._system_noise_figure < 0):
-            raise ValueError('System Noise Figure is negative')
-        if (self._atmospheric_loss > 0):
-            raise ValueError('Atmospheric Loss is positive')
-        if (self._implementation_loss > 0):
-            raise ValueError('Implementation loss is positive')        
-        if (self._polarization_losses > 0):
-            raise ValueError('Polarization Loss is positive')
-        if (self._receiving_pointing_loss > 0):
-            raise ValueError('Receive Pointing Loss is positive')
-        if (self._transmit_losses > 0):
-            raise ValueError('Transmit Loss is positive')
-        if (self._transmit_pointing_loss > 0):
-            raise ValueError('Transmit Pointing Loss is positive')
-        if (self._noise_bandwidth.magnitude <= 0):
-            raise ValueError('Noise Bandwidth is negative')
-        if (self._system_noise_figure < 0):
-            raise ValueError('System Noise Figure is negative')
+        # evaluate the immutable record, raises exceptions for any errors
+        result = records.evaluate(self.inputs,
+                                  self.c.to('meter / second').magnitude,
+                                  self.Re.to('meter').magnitude)
     
         # Downlink Wavelength m
-        self._downlink_wavelength = self.c / self._downlink_frequency.to('1 / second')
+        self._downlink_wavelength = result.downlink_wavelength * self._ureg.meter
         
         # logging setup
         logger = logging.getLogger()
         logger.addHandler(logging.NullHandler())
         logging.debug('wavelength: {}'.format(self._downlink_wavelength))
         
-        # Link Distance m
-        if (self._orbit_elevation_angle.magnitude == 90):
-            self._link_distance = self._altitude_satellite - self._altitude_ground_station
-        else:
-            orbit_elevation_angle_rad = math.radians(self._orbit_elevation_angle.magnitude)
-            beta = orbit_elevation_angle_rad + (math.pi / 2)
-            alpha = math.asin(((self._altitude_ground_station + self.Re) / (self._altitude_satellite + self.Re)) * math.sin(beta))
-            theta = math.pi - alpha - beta
-            self._link_distance = math.sin(theta) * (self._altitude_satellite + self.Re) / math.sin(beta)
+        # Link Distance, in the units of the satellite altitude
+        self._link_distance = (result.link_distance * self._ureg.meter).to(self._altitude_satellite.units)
         
         # LOG
         logging.debug('link_distance: {}'.format(self._link_distance))
         
         # Transmit Power dBm
-        self._transmit_power_dBm = self.power_to_dBm(self._transmit_power)
+        self._transmit_power_dBm = result.transmit_power_dBm
         
         # LOG
         logging.debug('Tx power dBm: {}'.format(self._transmit_power_dBm))
         
         # Transmit EIRP dBm
-        self._transmit_eirp = self._transmit_power_dBm + self._transmit_losses + self._transmit_antenna_gain + self._transmit_pointing_loss
+        self._transmit_eirp = result.transmit_eirp
         
         # LOG
         logging.debug('Tx EIRP: {}'.format(self._transmit_eirp))
     
         # Downlink Path Loss dB
-        self._downlink_path_loss = -20 * math.log10(4 * math.pi * self._link_distance / self._downlink_wavelength)
+        self._downlink_path_loss = result.downlink_path_loss
         
         # LOG
         logging.debug('Path Loss : {}'.format(self._downlink_path_loss))
         
         # Required Eb/N0 dB
-        self._required_ebno = self._target_energy_noise_ratio - self._implementation_loss
+        self._required_ebno = result.required_ebno
         
         # LOG
         logging.debug('Req Eb/N0 : {}'.format(self._required_ebno))
         
         # Recieved Power dBm
-        self._received_power = self._transmit_eirp + self._downlink_path_loss + self._polarization_losses + self._atmospheric_loss + self._receive_antenna_gain + self._receiving_pointing_loss
+        self._received_power = result.received_power
         
         # LOG
         logging.debug('Rx Power : {}'.format(self._received_power))
         
         # MDS dBm
-        self._minimum_detectable_signal = -174 + 10 * math.log10(self._noise_bandwidth.to('hertz').magnitude) + self._system_noise_figure
+        self._minimum_detectable_signal = result.minimum_detectable_signal
         
         # LOG
         logging.debug('MDS : {}'.format(self._minimum_detectable_signal))
         
         # Eb/N0 Receieved dB
-        self._energy_noise_ratio = self._received_power - self._minimum_detectable_signal
+        self._energy_noise_ratio = result.energy_noise_ratio
         
         # LOG
         logging.debug('Eb/N0 : {}'.format(self._energy_noise_ratio))
     
         # Link Margin dB
-        self._link_margin = self._energy_noise_ratio - self._required_ebno
+        self._link_margin = result.link_margin
         
         # LOG
         logging.debug('Margin : {}'.format(self._link_margin))
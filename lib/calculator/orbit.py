@@ -0,0 +1,415 @@
+import csv
+import calendar
+import numpy as np
+
+from . import batch
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS, geodetic_to_ecef
+
+# Earth gravitational parameter in cubic meters per square second
+EARTH_MU = 3.986004418e14
+
+# second zonal harmonic and the equatorial radius, in meters, it refers to
+EARTH_J2 = 1.08262668e-3
+EARTH_EQUATORIAL_RADIUS = 6378137.0
+
+# Earth rotation rate in radians per second
+EARTH_ROTATION_RATE = 7.2921150e-5
+
+# POSIX time of the J2000 epoch, 2000-01-01 12:00 UTC
+J2000 = 946728000.0
+
+# inertial frames inertial_to_fixed() rotates from: true equator mean
+# equinox (the frame of element sets), true and mean of date, and the mean
+# equator and equinox of J2000
+INERTIAL_FRAMES = ('TEME', 'TOD', 'MOD', 'J2000')
+
+# leading terms of the IAU 1980 nutation, within half an arcsecond: (moon
+# node, sun and moon mean longitude multipliers, longitude sine and
+# obliquity cosine amplitudes in arcseconds)
+_NUTATION_TERMS = ((1, 0, 0, -17.20, 9.20),
+                   (0, 2, 0, -1.32, 0.57),
+                   (0, 0, 2, -0.23, 0.10),
+                   (2, 0, 0, 0.21, -0.09))
+
+# Newton iterations used to solve Kepler's equation
+KEPLER_ITERATIONS = 12
+
+# orbital elements held by every element set, in the units used throughout
+ELEMENT_UNITS = {
+    'epoch':               'second',   # POSIX UTC
+    'semi_major_axis':     'meter',
+    'eccentricity':        '',
+    'inclination':         'degree',
+    'raan':                'degree',
+    'argument_of_perigee': 'degree',
+    'mean_anomaly':        'degree',
+}
+
+
+def read_tle(stream):
+    """
+    Parse two line element sets
+
+    Lines 1 and 2 may be preceded by a name line. The mean elements are
+    used as osculating two-body elements, which is adequate for visibility
+    and link budgets but is not SGP4.
+
+    @type  stream: file
+    @param stream: text stream of element sets
+    @rtype:  tuple
+    @return: (list of names, dict of element name to numpy array)
+
+    """
+    lines = [line.rstrip() for line in stream if line.strip()]
+    names = []
+    rows = []
+    index = 0
+    while index < len(lines):
+        name = None
+        if not lines[index].startswith('1 '):
+            name = lines[index].strip()
+            if name.startswith('0 '):
+                name = name[2:]
+            index += 1
+        if index + 1 >= len(lines) or not lines[index].startswith('1 ') or not lines[index + 1].startswith('2 '):
+            raise ValueError('Incomplete element set near line %d' % (index + 1))
+        line1, line2 = lines[index], lines[index + 1]
+        for line in (line1, line2):
+            if len(line) < 69 or not line[68].isdigit():
+                raise ValueError('Truncated element set line: %s' % line)
+            if _tle_checksum(line) != int(line[68]):
+                raise ValueError('Bad checksum in element set line: %s' % line)
+        index += 2
+
+        try:
+            year = int(line1[18:20])
+            year += 1900 if year >= 57 else 2000
+            epoch = calendar.timegm((year, 1, 1, 0, 0, 0)) + (float(line1[20:32]) - 1) * 86400.0
+            mean_motion = float(line2[52:63]) * 2 * np.pi / 86400.0
+            rows.append((epoch,
+                         (EARTH_MU / mean_motion ** 2) ** (1.0 / 3.0),
+                         float('0.' + line2[26:33].strip()),
+                         float(line2[8:16]),
+                         float(line2[17:25]),
+                         float(line2[34:42]),
+                         float(line2[43:51])))
+        except (ValueError, ZeroDivisionError):
+            raise ValueError('Invalid element set: %s / %s' % (line1, line2))
+        names.append(name or line1[2:7].strip())
+    return names, _element_columns(rows)
+
+
+def read_elements(stream):
+    """
+    Parse a CSV file of orbital elements
+
+    The header holds a name column and the names of ELEMENT_UNITS, values
+    are in those units: POSIX UTC seconds, meters and degrees.
+
+    @type  stream: file
+    @param stream: text stream of CSV rows
+    @rtype:  tuple
+    @return: (list of names, dict of element name to numpy array)
+
+    """
+    names = []
+    rows = []
+    for record in csv.DictReader(stream):
+        names.append(record.get('name', str(len(names))))
+        rows.append([float(record[name]) for name in ELEMENT_UNITS])
+    return names, _element_columns(rows)
+
+
+def _element_columns(rows):
+    values = np.array(rows, dtype=float).reshape(-1, len(ELEMENT_UNITS))
+    return dict((name, values[:, index]) for index, name in enumerate(ELEMENT_UNITS))
+
+
+def _tle_checksum(line):
+    return sum(int(char) if char.isdigit() else 1 if char == '-' else 0 for char in line[:68]) % 10
+
+
+def propagate(elements, times, j2=True):
+    """
+    Two-body positions and velocities of many satellites over a time grid
+
+    With j2, the node, perigee and mean anomaly drift at the secular J2
+    rates. Kepler's equation is solved for all satellites and times at once.
+
+    @type  elements: dict
+    @param elements: element name to array of shape (S,), see ELEMENT_UNITS
+    @type  times: numpy array
+    @param times: POSIX UTC seconds, shape (T,)
+    @type  j2: bool
+    @param j2: apply the secular J2 perturbation
+
+    @rtype:  tuple
+    @return: (positions in meters, velocities in meters per second), both
+             inertial (true equator, mean equinox of date) with shape (S, T, 3)
+
+    """
+    a = np.asarray(elements['semi_major_axis'], dtype=float)[:, np.newaxis]
+    e = np.asarray(elements['eccentricity'], dtype=float)[:, np.newaxis]
+    inclination = np.radians(elements['inclination'])[:, np.newaxis]
+    dt = np.asarray(times, dtype=float)[np.newaxis, :] - np.asarray(elements['epoch'], dtype=float)[:, np.newaxis]
+
+    n = np.sqrt(EARTH_MU / a ** 3)
+    raan_rate = perigee_rate = anomaly_rate = 0.0
+    if j2:
+        factor = 0.75 * n * EARTH_J2 * (EARTH_EQUATORIAL_RADIUS / (a * (1 - e * e))) ** 2
+        cos_i = np.cos(inclination)
+        raan_rate = -2 * factor * cos_i
+        perigee_rate = factor * (5 * cos_i * cos_i - 1)
+        anomaly_rate = factor * np.sqrt(1 - e * e) * (3 * cos_i * cos_i - 1)
+    raan = np.radians(elements['raan'])[:, np.newaxis] + raan_rate * dt
+    perigee = np.radians(elements['argument_of_perigee'])[:, np.newaxis] + perigee_rate * dt
+    mean_anomaly = np.remainder(np.radians(elements['mean_anomaly'])[:, np.newaxis] + (n + anomaly_rate) * dt,
+                                2 * np.pi)
+
+    eccentric = np.where(e < 0.8, mean_anomaly, np.pi)
+    for _ in range(KEPLER_ITERATIONS):
+        eccentric = eccentric - ((eccentric - e * np.sin(eccentric) - mean_anomaly)
+                                 / (1 - e * np.cos(eccentric)))
+    cos_E = np.cos(eccentric)
+    sin_E = np.sin(eccentric)
+    root = np.sqrt(1 - e * e)
+    radius = a * (1 - e * cos_E)
+    x = a * (cos_E - e)
+    y = a * root * sin_E
+    speed = np.sqrt(EARTH_MU * a) / radius
+    vx = -speed * sin_E
+    vy = speed * root * cos_E
+
+    # perifocal to inertial
+    cos_O, sin_O = np.cos(raan), np.sin(raan)
+    cos_w, sin_w = np.cos(perigee), np.sin(perigee)
+    cos_i, sin_i = np.cos(inclination), np.sin(inclination)
+    p = np.stack([cos_O * cos_w - sin_O * sin_w * cos_i,
+                  sin_O * cos_w + cos_O * sin_w * cos_i,
+                  sin_w * sin_i * np.ones_like(cos_O)], axis=-1)
+    q = np.stack([-cos_O * sin_w - sin_O * cos_w * cos_i,
+                  -sin_O * sin_w + cos_O * cos_w * cos_i,
+                  cos_w * sin_i * np.ones_like(cos_O)], axis=-1)
+    positions = x[..., np.newaxis] * p + y[..., np.newaxis] * q
+
+    # the velocity includes the secular drift, so it stays the time
+    # derivative of the positions: the anomaly advances faster, the perigee
+    # turns the orbit plane axes and the node turns them about the pole
+    scale = ((n + anomaly_rate) / n)[..., np.newaxis]
+    perigee_rate = np.asarray(perigee_rate)[..., np.newaxis]
+    raan_rate = np.asarray(raan_rate)[..., np.newaxis]
+    p_dot = perigee_rate * q + raan_rate * np.stack([-p[..., 1], p[..., 0], np.zeros_like(p[..., 0])], axis=-1)
+    q_dot = -perigee_rate * p + raan_rate * np.stack([-q[..., 1], q[..., 0], np.zeros_like(q[..., 0])], axis=-1)
+    velocities = (scale * (vx[..., np.newaxis] * p + vy[..., np.newaxis] * q)
+                  + x[..., np.newaxis] * p_dot + y[..., np.newaxis] * q_dot)
+    return positions, velocities
+
+
+def sidereal_angle(times):
+    """
+    Greenwich mean sidereal angle
+
+    @type  times: numpy array
+    @param times: POSIX UTC seconds
+    @rtype:  numpy array
+    @return: angle in radians
+
+    """
+    days = (np.asarray(times, dtype=float) - J2000) / 86400.0
+    return np.radians(np.remainder(280.46061837 + 360.98564736629 * days, 360.0))
+
+
+def _rotation(axis, angle):
+    """
+    Frame rotation matrices about a coordinate axis, shape (T, 3, 3)
+    """
+    cos_a, sin_a = np.cos(angle), np.sin(angle)
+    zero, one = np.zeros_like(angle), np.ones_like(angle)
+    rows = {0: ((one, zero, zero), (zero, cos_a, sin_a), (zero, -sin_a, cos_a)),
+            1: ((cos_a, zero, -sin_a), (zero, one, zero), (sin_a, zero, cos_a)),
+            2: ((cos_a, sin_a, zero), (-sin_a, cos_a, zero), (zero, zero, one))}[axis]
+    return np.moveaxis(np.array(rows, dtype=float), (0, 1), (-2, -1))
+
+
+def precession(times):
+    """
+    IAU 1976 precession from the mean equator and equinox of J2000 to those
+    of date
+
+    @type  times: numpy array
+    @param times: POSIX UTC seconds, shape (T,)
+    @rtype:  numpy array
+    @return: rotation matrices, shape (T, 3, 3)
+
+    """
+    t = (np.asarray(times, dtype=float) - J2000) / (36525 * 86400.0)
+    zeta = np.radians((2306.2181 * t + 0.30188 * t ** 2 + 0.017998 * t ** 3) / 3600.0)
+    z = np.radians((2306.2181 * t + 1.09468 * t ** 2 + 0.018203 * t ** 3) / 3600.0)
+    theta = np.radians((2004.3109 * t - 0.42665 * t ** 2 - 0.041833 * t ** 3) / 3600.0)
+    return _rotation(2, -z) @ _rotation(1, theta) @ _rotation(2, -zeta)
+
+
+def nutation(times):
+    """
+    IAU 1980 nutation from the mean to the true equator and equinox of
+    date, leading terms only
+
+    @type  times: numpy array
+    @param times: POSIX UTC seconds, shape (T,)
+    @rtype:  tuple
+    @return: (rotation matrices of shape (T, 3, 3), equation of the
+             equinoxes in radians)
+
+    """
+    t = (np.asarray(times, dtype=float) - J2000) / (36525 * 86400.0)
+    node = np.radians(125.04452 - 1934.136261 * t)
+    sun = np.radians(280.4665 + 36000.7698 * t)
+    moon = np.radians(218.3165 + 481267.8813 * t)
+    longitude = np.zeros_like(t)
+    obliquity = np.radians((84381.448 - 46.8150 * t - 0.00059 * t ** 2 + 0.001813 * t ** 3) / 3600.0)
+    change = np.zeros_like(t)
+    for node_factor, sun_factor, moon_factor, sine, cosine in _NUTATION_TERMS:
+        argument = node_factor * node + sun_factor * sun + moon_factor * moon
+        longitude += np.radians(sine * np.sin(argument) / 3600.0)
+        change += np.radians(cosine * np.cos(argument) / 3600.0)
+    true_obliquity = obliquity + change
+    matrices = _rotation(0, -true_obliquity) @ _rotation(2, -longitude) @ _rotation(0, obliquity)
+    return matrices, longitude * np.cos(true_obliquity)
+
+
+def inertial_to_fixed(positions, velocities, times, frame='TEME'):
+    """
+    Rotate inertial states into the Earth-fixed frame
+
+    States of date are rotated by the sidereal angle, mean states are first
+    nutated and J2000 states precessed, so the mean sidereal angle applies
+    to TEME and the apparent one to the others. Polar motion and UT1 - UTC
+    are ignored, which keeps positions within a few hundred meters.
+
+    @type  positions: numpy array, shape (..., T, 3)
+    @param positions: inertial positions in meters
+    @type  velocities: numpy array, shape (..., T, 3)
+    @param velocities: inertial velocities in meters per second
+    @type  times: numpy array
+    @param times: POSIX UTC seconds, shape (T,)
+    @type  frame: string
+    @param frame: one of INERTIAL_FRAMES
+
+    @rtype:  tuple
+    @return: (Earth-fixed positions, Earth-fixed velocities), same shapes
+
+    """
+    if frame not in INERTIAL_FRAMES:
+        raise ValueError('Unknown inertial frame: %s' % frame)
+    angle = sidereal_angle(times)
+    if frame != 'TEME':
+        # precession and nutation change too slowly to affect velocities
+        rotation, equinoxes = nutation(times)
+        if frame == 'TOD':
+            rotation = np.broadcast_to(np.eye(3), rotation.shape)
+        elif frame == 'J2000':
+            rotation = rotation @ precession(times)
+        positions = np.einsum('tij,...tj->...ti', rotation, positions)
+        velocities = np.einsum('tij,...tj->...ti', rotation, velocities)
+        angle = angle + equinoxes
+    cos_t, sin_t = np.cos(angle), np.sin(angle)
+    x = cos_t * positions[..., 0] + sin_t * positions[..., 1]
+    y = -sin_t * positions[..., 0] + cos_t * positions[..., 1]
+    vx = cos_t * velocities[..., 0] + sin_t * velocities[..., 1] + EARTH_ROTATION_RATE * y
+    vy = -sin_t * velocities[..., 0] + cos_t * velocities[..., 1] - EARTH_ROTATION_RATE * x
+    return (np.stack([x, y, positions[..., 2]], axis=-1),
+            np.stack([vx, vy, velocities[..., 2]], axis=-1))
+
+
+def look_angles(station_positions, satellite_positions):
+    """
+    Topocentric elevation and range of satellites from ground stations
+
+    @type  station_positions: numpy array, shape (G, 3)
+    @param station_positions: Earth-fixed station positions in meters
+    @type  satellite_positions: numpy array, shape (S, T, 3)
+    @param satellite_positions: Earth-fixed satellite positions in meters
+
+    @rtype:  tuple
+    @return: (elevation in degrees, range in meters), shape (S, G, T)
+
+    """
+    stations = np.asarray(station_positions, dtype=float)[np.newaxis, :, np.newaxis, :]
+    line_of_sight = np.asarray(satellite_positions)[:, np.newaxis, :, :] - stations
+    distance = np.sqrt(np.einsum('...i,...i->...', line_of_sight, line_of_sight))
+    up = np.einsum('...i,...i->...', stations, line_of_sight) / np.sqrt(np.einsum('...i,...i->...',
+                                                                                   stations, stations))
+    elevation = np.degrees(np.arcsin(np.clip(up / distance, -1.0, 1.0)))
+    return elevation, distance
+
+
+def timeline_chunks(calculator, elements, stations, times, minimum_elevation=0.0, chunk_size=4096,
+                    j2=True, earth_radius=EARTH_RADIUS):
+    """
+    Margin timelines of a fleet seen from ground stations, by chunks of time
+
+    Each chunk is propagated, converted to look angles and evaluated with
+    batch.evaluate() in whole arrays, so memory depends on the chunk size
+    only.
+
+    @type  calculator: LinkBudgetCalculator
+    @param calculator: configuration of the link, its elevation and
+                       altitudes are replaced by the geometry
+    @type  elements: dict
+    @param elements: element name to array of shape (S,), see ELEMENT_UNITS
+    @type  stations: tuple
+    @param stations: (latitudes, longitudes, altitudes) of the G stations,
+                     pint quantities or degrees and meters
+    @type  times: numpy array
+    @param times: POSIX UTC seconds, shape (T,)
+    @type  minimum_elevation: pint angle or number (degrees)
+    @param minimum_elevation: elevation below which a satellite is not in view
+    @type  chunk_size: int
+    @param chunk_size: number of times evaluated at once
+    @type  j2: bool
+    @param j2: apply the secular J2 perturbation
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters of the station positions
+
+    @rtype:  generator
+    @return: (time slice, dict of arrays of shape (S, G, chunk)) per chunk,
+             with elevation, link_distance, link_margin (NaN out of view or
+             invalid) and is_visible; a single empty chunk without times
+
+    """
+    latitudes, longitudes, altitudes = stations
+    station_positions = np.reshape(geodetic_to_ecef(latitudes, longitudes, altitudes, earth_radius), (-1, 3))
+    minimum_elevation = to_magnitude(minimum_elevation, 'degree', 'minimum_elevation')
+    columns = batch.columns_from_calculator(calculator)
+    times = np.asarray(times, dtype=float)
+    for start in range(0, max(len(times), 1), chunk_size):
+        window = slice(start, min(start + chunk_size, len(times)))
+        positions, velocities = propagate(elements, times[window], j2)
+        positions, _ = inertial_to_fixed(positions, velocities, times[window])
+        elevation, distance = look_angles(station_positions, positions)
+        results = batch.evaluate(columns, link_distance=distance)
+        is_visible = elevation > minimum_elevation
+        yield window, {
+            'elevation': elevation,
+            'link_distance': distance,
+            'link_margin': np.where(is_visible & results['is_valid'], results['link_margin'], np.nan),
+            'is_visible': is_visible,
+        }
+
+
+def margin_timeline(calculator, elements, stations, times, **kwargs):
+    """
+    Margin timelines of a fleet seen from ground stations in one call
+
+    @param kwargs: see timeline_chunks()
+
+    @rtype:  dict
+    @return: elevation, link_distance, link_margin and is_visible arrays of
+             shape (satellites, stations, times), empty along the last axis
+             without times
+
+    """
+    chunks = [results for _, results in timeline_chunks(calculator, elements, stations, times, **kwargs)]
+    return dict((name, np.concatenate([chunk[name] for chunk in chunks], axis=-1))
+                for name in chunks[0])
@@ -0,0 +1,254 @@
+import collections
+import concurrent.futures
+from multiprocessing import shared_memory
+import numpy as np
+
+from . import batch
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS
+
+# default number of scenarios evaluated at once by one worker
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# results kept by sweep() when none are given
+DEFAULT_OUTPUTS = ('downlink_path_loss', 'received_power', 'minimum_detectable_signal',
+                   'energy_noise_ratio', 'link_margin', 'is_valid')
+
+# types of the results that are not stored as floats
+OUTPUT_DTYPES = {
+    'is_valid': np.dtype(bool),
+    'invalid_reasons': np.dtype(np.uint32),
+}
+
+# alignment of each column inside the shared block
+_ALIGNMENT = 64
+
+
+class SharedResults():
+    """
+    Result columns of a sweep held in one shared memory block
+
+    Worker processes attach to the block by name and write their slices in
+    place, so results never travel through pickling. Processes started by
+    multiprocessing share the resource tracker of their parent, where
+    attaching registers the block again without effect; a process started
+    otherwise registers it with its own tracker, which unlinks the block
+    when that process exits, so the creator must outlive such writers. Columns are numpy
+    views of the block; they stay valid until close() releases and unlinks
+    it.
+
+    Steps to use this class:
+        1) Get one from sweep(), or instantiate it with the columns to hold
+        2) Read columns by name, without copying
+        3) Close it, or use it as a context manager, once the views are no
+           longer needed
+
+    """
+
+    def __init__(self, outputs, shape):
+        """
+        SharedResults Constructor, allocates the shared block
+
+        @type  outputs: list
+        @param outputs: result names to hold, see batch.evaluate()
+        @type  shape: tuple
+        @param shape: shape of every column
+
+        """
+        size = int(np.prod(shape))
+        layout = {}
+        offset = 0
+        for name in outputs:
+            dtype = OUTPUT_DTYPES.get(name, np.dtype(np.float64))
+            layout[name] = (offset, dtype.str)
+            offset += -(-size * dtype.itemsize // _ALIGNMENT) * _ALIGNMENT
+        self._memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self._spec = (self._memory.name, layout, size)
+        self._shape = tuple(shape)
+        self._columns = dict((name, column.reshape(self._shape))
+                             for name, column in _views(self._memory, layout, size).items())
+
+    # ---------------- spec ----------------
+    @property
+    def spec(self):
+        """
+        Get what a worker needs to attach to the block
+
+        @rtype:  tuple
+        @return: (block name, column layout, rows), see write_chunk()
+
+        """
+        return self._spec
+
+    # ---------------- shape ----------------
+    @property
+    def shape(self):
+        """
+        Get the shape of the columns
+
+        @rtype:  tuple
+        @return: shape of every column
+
+        """
+        return self._shape
+
+    def __getitem__(self, name):
+        """
+        Return a column as a numpy view of the shared block
+        """
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    # --------------------------------------------------
+    # ----------------    functions     ----------------
+    # --------------------------------------------------
+
+    def copy(self):
+        """
+        Return private copies of the columns, which outlive close()
+
+        @rtype:  dict
+        @return: result name to numpy array
+        """
+        return dict((name, column.copy()) for name, column in self._columns.items())
+
+    def close(self):
+        """
+        Release the views and free the shared block, views obtained earlier
+        must not be used afterwards
+        """
+        if self._memory is None:
+            return
+        self._columns = {}
+        memory, self._memory = self._memory, None
+        try:
+            memory.close()
+        finally:
+            memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _views(memory, layout, size):
+    """
+    Flat numpy views of the columns of a shared block
+    """
+    return dict((name, np.ndarray((size,), dtype=np.dtype(dtype), buffer=memory.buf, offset=offset))
+                for name, (offset, dtype) in layout.items())
+
+
+def write_chunk(spec, start, results):
+    """
+    Write results into rows of a shared block, from any process
+
+    The block is not unregistered from the resource tracker after
+    attaching: workers of a sweep share the tracker of the creator, which
+    would then lose the registration of its own block.
+
+    @type  spec: tuple
+    @param spec: SharedResults.spec of the block
+    @type  start: int
+    @param start: first flat row receiving the results
+    @type  results: dict
+    @param results: result name to array, e.g. from batch.evaluate(),
+                    names that are not held are ignored
+
+    """
+    name, layout, size = spec
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        for column, (offset, dtype) in layout.items():
+            values = np.ravel(results[column])
+            # the view is dropped at once, a block cannot close while viewed
+            np.ndarray((size,), dtype=np.dtype(dtype), buffer=memory.buf,
+                       offset=offset)[start:start + len(values)] = values
+    finally:
+        memory.close()
+
+
+def _evaluate_chunk(spec, columns, link_distance, count, start, speed_of_light, earth_radius):
+    """
+    Evaluate one chunk of a sweep and write it into the shared block
+    """
+    results = batch.evaluate(columns, link_distance, speed_of_light, earth_radius)
+    # chunks of scalar inputs give scalar results
+    results = dict((name, np.broadcast_to(value, (count,))) for name, value in results.items())
+    write_chunk(spec, start, results)
+
+
+def sweep(columns, link_distance=None, outputs=DEFAULT_OUTPUTS, chunk_size=DEFAULT_CHUNK_SIZE, jobs=1,
+          speed_of_light=batch.SPEED_OF_LIGHT, earth_radius=EARTH_RADIUS):
+    """
+    Evaluate link budgets over many scenarios into shared memory
+
+    Behaves like batch.evaluate() split into chunks of flat rows. Workers
+    write their chunks straight into a SharedResults block, only the input
+    slices of each chunk are sent to them, and at most two chunks per worker
+    are sliced and in flight at any time. The block is freed if any chunk
+    fails.
+
+    @type  columns: dict
+    @param columns: input name to pint quantity, number or array, as
+                    accepted by batch.evaluate()
+    @type  link_distance: pint length or array (meters)
+    @param link_distance: slant ranges to use instead of the ground station
+                          geometry
+    @type  outputs: list
+    @param outputs: result names to keep, see batch.evaluate()
+    @type  chunk_size: int
+    @param chunk_size: number of scenarios evaluated at once
+    @type  jobs: int
+    @param jobs: number of worker processes
+    @type  speed_of_light: number
+    @param speed_of_light: speed of light in meters per second
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  SharedResults
+    @return: results with the broadcast shape of the inputs, to be closed
+             by the caller
+
+    """
+    values = dict((name, to_magnitude(columns.get(name, 0.0), units, name))
+                  for name, units in batch.INPUT_UNITS.items())
+    if link_distance is not None:
+        values['link_distance'] = to_magnitude(link_distance, 'meter', 'link_distance')
+    shape = np.broadcast_shapes(*[np.shape(value) for value in values.values()])
+    size = int(np.prod(shape))
+
+    def chunk(start):
+        # scalars are sent as they are, arrays as the flat rows of the chunk
+        sliced = dict((name, value if np.ndim(value) == 0 else
+                       np.broadcast_to(value, shape).flat[start:start + chunk_size])
+                      for name, value in values.items())
+        return sliced, sliced.pop('link_distance', None), min(chunk_size, size - start)
+
+    results = SharedResults(outputs, shape)
+    try:
+        starts = range(0, size, chunk_size)
+        if jobs > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                pending = collections.deque()
+                for start in starts:
+                    pending.append(executor.submit(_evaluate_chunk, results.spec, *chunk(start), start,
+                                                   speed_of_light, earth_radius))
+                    if len(pending) >= 2 * jobs:
+                        pending.popleft().result()
+                while pending:
+                    pending.popleft().result()
+        else:
+            for start in starts:
+                _evaluate_chunk(results.spec, *chunk(start), start, speed_of_light, earth_radius)
+    except BaseException:
+        results.close()
+        raise
+    return results
@@ -0,0 +1,379 @@
+import re
+import sys
+import csv
+import json
+import argparse
+import collections
+import multiprocessing
+import numpy as np
+import pint
+
+from . import batch
+from .units import DECIBEL_UNITS
+
+# number of scenario rows evaluated together
+DEFAULT_CHUNK_SIZE = 4096
+
+# formats understood by the pipeline
+FORMATS = ('csv', 'jsonl')
+
+# column header such as downlink_frequency[MHz]
+_HEADER_PATTERN = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:\[\s*([^\]]*?)\s*\])?\s*$')
+
+
+class ColumnParser():
+    """
+    Maps column headers with units to batch inputs
+
+    Headers are an input name optionally followed by units in square
+    brackets, e.g. downlink_frequency[MHz] or atmospheric_loss[dB]. Inputs
+    without units are read in the units of batch.INPUT_UNITS. Headers that
+    are not inputs are passed through untouched.
+
+    """
+
+    def __init__(self, ureg=None):
+        """
+        ColumnParser Constructor
+
+        @type  ureg: pint Unit Registry
+        @param ureg: registry used to convert units, a new one when None
+
+        """
+        self._ureg = ureg if ureg is not None else pint.UnitRegistry()
+        self._cache = {}
+
+    def parse(self, header):
+        """
+        Parse one column header
+
+        @type  header: string
+        @param header: column header
+
+        @rtype:  tuple
+        @return: (input name, scale factor to the batch units), or None when
+                 the column is not an input
+
+        """
+        if header not in self._cache:
+            self._cache[header] = self._parse(header)
+        return self._cache[header]
+
+    def _parse(self, header):
+        match = _HEADER_PATTERN.match(header)
+        if match is None or match.group(1) not in batch.INPUT_UNITS:
+            return None
+        name, units = match.groups()
+        target = batch.INPUT_UNITS[name]
+        if not units or units == target:
+            return name, 1.0
+        if target in DECIBEL_UNITS or units in DECIBEL_UNITS:
+            raise ValueError('Column %s expected units of %s, received %s' % (header, target, units))
+        try:
+            return name, self._ureg.Quantity(1.0, units).to(target).magnitude
+        except (pint.UndefinedUnitError, pint.DimensionalityError):
+            raise ValueError('Column %s expected units of %s, received %s' % (header, target, units))
+
+
+def output_headers():
+    """
+    Return the headers of the evaluated columns
+
+    @rtype:  list
+    @return: (result name, header) tuples
+
+    """
+    headers = [(name, '%s[%s]' % (name, units)) for name, units in batch.OUTPUT_UNITS.items()]
+    headers.append(('is_valid', 'is_valid'))
+    headers.append(('invalid_reasons', 'invalid_reasons'))
+    return headers
+
+
+def _to_float(value):
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def _check_headers(headers, parser):
+    """
+    Reject repeated headers and inputs given by more than one header
+    """
+    seen = {}
+    for header in headers:
+        parsed = parser.parse(header)
+        name = header if parsed is None else parsed[0]
+        if name in seen:
+            raise ValueError('Duplicate column %s: %s and %s' % (name, seen[name], header))
+        seen[name] = header
+
+
+def _columns(values, parser):
+    """
+    Build batch input columns from the per-header value lists of a chunk
+    """
+    columns = {}
+    for header, column in values.items():
+        parsed = parser.parse(header)
+        if parsed is not None:
+            name, factor = parsed
+            columns[name] = np.array([_to_float(value) for value in column]) * factor
+    return columns
+
+
+def read_csv_chunks(stream, parser, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read scenario rows from a CSV stream in chunks
+
+    A header row without any scenario gives a single empty chunk, so the
+    passed through columns still reach the output header.
+
+    @type  stream: file
+    @param stream: text stream with a header row
+    @type  parser: ColumnParser
+    @param parser: column header parser
+    @type  chunk_size: int
+    @param chunk_size: maximum number of rows per chunk
+
+    @rtype:  generator
+    @return: (input columns, passed through columns) per chunk
+
+    """
+    reader = csv.reader(stream)
+    headers = next(reader, None)
+    if headers is None:
+        return
+    _check_headers(headers, parser)
+    passthrough = [header for header in headers if parser.parse(header) is None]
+    rows = []
+    empty = True
+    for row in reader:
+        if row:
+            rows.append(row)
+        if len(rows) == chunk_size:
+            yield _csv_chunk(headers, rows, parser, passthrough)
+            rows = []
+            empty = False
+    if rows or empty:
+        yield _csv_chunk(headers, rows, parser, passthrough)
+
+
+def _csv_chunk(headers, rows, parser, passthrough):
+    values = dict((header, [row[index] if index < len(row) else None for row in rows])
+                  for index, header in enumerate(headers))
+    return _columns(values, parser), dict((header, values[header]) for header in passthrough)
+
+
+def read_jsonl_chunks(stream, parser, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read scenario rows from a JSON lines stream in chunks
+
+    Every line is an object whose keys follow the same header rules as CSV
+    columns. Inputs missing from a line take the LinkBudgetCalculator
+    defaults.
+
+    @type  stream: file
+    @param stream: text stream with one JSON object per line
+    @type  parser: ColumnParser
+    @param parser: column header parser
+    @type  chunk_size: int
+    @param chunk_size: maximum number of rows per chunk
+
+    @rtype:  generator
+    @return: (input columns, passed through columns) per chunk
+
+    """
+    rows = []
+    for line in stream:
+        if line.strip():
+            rows.append(json.loads(line))
+        if len(rows) == chunk_size:
+            yield _jsonl_chunk(rows, parser)
+            rows = []
+    if rows:
+        yield _jsonl_chunk(rows, parser)
+
+
+def _jsonl_chunk(rows, parser):
+    headers = []
+    for row in rows:
+        for header in row:
+            if header not in headers:
+                headers.append(header)
+    _check_headers(headers, parser)
+    values = dict((header, [row.get(header) for row in rows]) for header in headers)
+    columns = _columns(values, parser)
+    for header in headers:
+        parsed = parser.parse(header)
+        if parsed is not None:
+            missing = np.array([header not in row for row in rows])
+            columns[parsed[0]][missing] = 0.0
+    return columns, dict((header, values[header]) for header in headers if parser.parse(header) is None)
+
+
+def write_csv_chunks(stream, chunks):
+    """
+    Write evaluated chunks to a CSV stream, a header row of the results
+    alone without any chunk
+
+    @type  stream: file
+    @param stream: text stream
+    @type  chunks: iterable
+    @param chunks: (passed through columns, results) per chunk
+
+    """
+    writer = None
+    for passthrough, results in chunks:
+        if writer is None:
+            writer = csv.writer(stream, lineterminator='\n')
+            writer.writerow(list(passthrough) + [header for _, header in output_headers()])
+        columns = list(passthrough.values())
+        columns += [results[name].tolist() for name, _ in output_headers()]
+        writer.writerows(zip(*columns))
+    if writer is None:
+        csv.writer(stream, lineterminator='\n').writerow([header for _, header in output_headers()])
+
+
+def write_jsonl_chunks(stream, chunks):
+    """
+    Write evaluated chunks to a JSON lines stream, non finite values are
+    written as null
+
+    @type  stream: file
+    @param stream: text stream
+    @type  chunks: iterable
+    @param chunks: (passed through columns, results) per chunk
+
+    """
+    headers = output_headers()
+    for passthrough, results in chunks:
+        columns = [(header, values) for header, values in passthrough.items()]
+        columns += [(header, results[name].tolist()) for name, header in headers]
+        for row in zip(*[values for _, values in columns]):
+            record = {}
+            for (header, _), value in zip(columns, row):
+                if isinstance(value, float) and not np.isfinite(value):
+                    value = None
+                record[header] = value
+            stream.write(json.dumps(record))
+            stream.write('\n')
+
+
+def _evaluate_chunk(columns):
+    return batch.evaluate(columns)
+
+
+def _broadcast(columns, passthrough, results):
+    """
+    Give every result the row count of its chunk, results of a chunk without
+    input columns are scalars
+    """
+    values = list(passthrough.values()) + list(columns.values())
+    rows = len(values[0]) if values else 0
+    return dict((name, np.broadcast_to(value, (rows,))) for name, value in results.items())
+
+
+def evaluate_chunks(chunks, jobs=1):
+    """
+    Evaluate chunks of scenarios in order
+
+    With several jobs, at most two chunks per worker are in flight at any
+    time so memory use stays constant regardless of the input size.
+
+    @type  chunks: iterable
+    @param chunks: (input columns, passed through columns) per chunk
+    @type  jobs: int
+    @param jobs: number of worker processes
+
+    @rtype:  generator
+    @return: (passed through columns, results) per chunk, every result
+             with one value per row
+
+    """
+    if jobs <= 1:
+        for columns, passthrough in chunks:
+            yield passthrough, _broadcast(columns, passthrough, batch.evaluate(columns))
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        pending = collections.deque()
+        for columns, passthrough in chunks:
+            pending.append((columns, passthrough, pool.apply_async(_evaluate_chunk, (columns,))))
+            if len(pending) >= 2 * jobs:
+                columns, passthrough, result = pending.popleft()
+                yield passthrough, _broadcast(columns, passthrough, result.get())
+        while pending:
+            columns, passthrough, result = pending.popleft()
+            yield passthrough, _broadcast(columns, passthrough, result.get())
+
+
+def run_pipeline(input_stream, output_stream, input_format='csv', output_format=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, jobs=1, ureg=None):
+    """
+    Stream scenarios from one text stream through the calculator to another
+
+    @type  input_stream: file
+    @param input_stream: scenarios as CSV or JSON lines
+    @type  output_stream: file
+    @param output_stream: receives the results
+    @type  input_format: string
+    @param input_format: one of FORMATS
+    @type  output_format: string
+    @param output_format: one of FORMATS, input_format when None
+    @type  chunk_size: int
+    @param chunk_size: number of rows evaluated together
+    @type  jobs: int
+    @param jobs: number of worker processes
+    @type  ureg: pint Unit Registry
+    @param ureg: registry used to convert column units
+
+    """
+    parser = ColumnParser(ureg)
+    readers = {'csv': read_csv_chunks, 'jsonl': read_jsonl_chunks}
+    writers = {'csv': write_csv_chunks, 'jsonl': write_jsonl_chunks}
+    if output_format is None:
+        output_format = input_format
+    chunks = readers[input_format](input_stream, parser, chunk_size)
+    writers[output_format](output_stream, evaluate_chunks(chunks, jobs))
+
+
+def _guess_format(path, default='csv'):
+    if path.endswith('.jsonl') or path.endswith('.json'):
+        return 'jsonl'
+    if path.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def main(argv=None):
+    """
+    Command line entry point, see python -m lib.calculator --help
+    """
+    parser = argparse.ArgumentParser(prog='python -m lib.calculator',
+                                     description='Evaluate link budgets for a file of scenarios. '
+                                                 'Column headers are input names with optional units '
+                                                 'in square brackets, e.g. downlink_frequency[MHz].')
+    parser.add_argument('input', help='CSV or JSON lines file of scenarios, - for standard input')
+    parser.add_argument('-o', '--output', default='-', help='output file, - for standard output')
+    parser.add_argument('--format', choices=FORMATS, help='input format, guessed from the file name')
+    parser.add_argument('--output-format', choices=FORMATS, help='output format, same as input by default')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='rows evaluated together (default %d)' % DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--jobs', type=int, default=1, help='number of worker processes')
+    args = parser.parse_args(argv)
+
+    input_format = args.format or _guess_format(args.input)
+    output_format = args.output_format or _guess_format(args.output, input_format)
+    input_stream = sys.stdin if args.input == '-' else open(args.input, newline='')
+    output_stream = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        run_pipeline(input_stream, output_stream, input_format, output_format,
+                     args.chunk_size, args.jobs)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    return 0
@@ -0,0 +1,99 @@
+import numpy as np
+
+from .units import to_magnitude
+
+# largest mismatch loss in dB, the cross polar isolation of real antennas
+# keeps orthogonal polarizations from cancelling completely
+MAXIMUM_LOSS = -60.0
+
+# handedness of circular and elliptical polarizations
+RIGHT_HAND = 1
+LEFT_HAND = -1
+
+
+def ellipticity_angle(axial_ratio, handedness=RIGHT_HAND):
+    """
+    Ellipticity angle of a polarization ellipse
+
+    @type  axial_ratio: number or array (dB)
+    @param axial_ratio: major over minor axis, 0 dB for circular and inf for
+                        linear polarization
+    @type  handedness: int or array
+    @param handedness: RIGHT_HAND or LEFT_HAND, seen along the propagation
+
+    @rtype:  numpy array
+    @return: ellipticity angles in radians, +-pi/4 for circular and 0 for
+             linear polarization
+
+    """
+    ratio = 10 ** (np.asarray(axial_ratio, dtype=float) / 20)
+    return np.sign(handedness) * np.arctan(1 / ratio)
+
+
+def mismatch_loss(transmit_axial_ratio, receive_axial_ratio, tilt=0.0, transmit_handedness=RIGHT_HAND,
+                  receive_handedness=RIGHT_HAND, maximum_loss=MAXIMUM_LOSS):
+    """
+    Polarization mismatch loss between two elliptical polarizations
+
+    Power fraction p = 1/2 [1 + sin 2e1 sin 2e2 + cos 2e1 cos 2e2 cos 2dt],
+    from the distance between both states on the Poincare sphere, with
+    ellipticity angles e1, e2 and tilt dt between the major axes. All
+    parameters broadcast, so time varying tilts of a pass are evaluated in
+    one call.
+
+    @type  transmit_axial_ratio: number or array (dB)
+    @param transmit_axial_ratio: axial ratio of the transmitted wave
+    @type  receive_axial_ratio: number or array (dB)
+    @param receive_axial_ratio: axial ratio of the receive antenna
+    @type  tilt: pint angle or array (degrees)
+    @param tilt: angle between the major axes, e.g. from tilt_angle()
+    @type  transmit_handedness: int or array
+    @param transmit_handedness: RIGHT_HAND or LEFT_HAND
+    @type  receive_handedness: int or array
+    @param receive_handedness: RIGHT_HAND or LEFT_HAND
+    @type  maximum_loss: number
+    @param maximum_loss: lowest loss returned in dB, None for none
+
+    @rtype:  numpy array
+    @return: mismatch loss in dB (negative), as taken by polarization_losses
+
+    """
+    e1 = 2 * ellipticity_angle(transmit_axial_ratio, transmit_handedness)
+    e2 = 2 * ellipticity_angle(receive_axial_ratio, receive_handedness)
+    tilt = 2 * np.radians(to_magnitude(tilt, 'degree', 'tilt'))
+    fraction = 0.5 * (1 + np.sin(e1) * np.sin(e2) + np.cos(e1) * np.cos(e2) * np.cos(tilt))
+    with np.errstate(divide='ignore'):
+        loss = 10 * np.log10(np.clip(fraction, 0.0, 1.0))
+    if maximum_loss is None:
+        return loss
+    return np.maximum(loss, maximum_loss)
+
+
+def tilt_angle(line_of_sight, transmit_reference, receive_reference):
+    """
+    Angle between the polarization axes of two antennas seen along the link
+
+    Both reference directions are projected onto the plane normal to the
+    line of sight, so the tilt follows the geometry over a pass.
+
+    @type  line_of_sight: array, shape (..., 3)
+    @param line_of_sight: direction from the transmitter to the receiver
+    @type  transmit_reference: array, shape (..., 3)
+    @param transmit_reference: major axis direction of the transmitter
+    @type  receive_reference: array, shape (..., 3)
+    @param receive_reference: major axis direction of the receiver, same
+                              frame
+
+    @rtype:  numpy array
+    @return: tilt in degrees, between -90 and 90 as the axes have no sign
+
+    """
+    los = np.asarray(line_of_sight, dtype=float)
+    los = los / np.sqrt(np.einsum('...i,...i->...', los, los))[..., np.newaxis]
+    a = np.asarray(transmit_reference, dtype=float)
+    b = np.asarray(receive_reference, dtype=float)
+    a = a - np.einsum('...i,...i->...', a, los)[..., np.newaxis] * los
+    b = b - np.einsum('...i,...i->...', b, los)[..., np.newaxis] * los
+    angle = np.degrees(np.arctan2(np.einsum('...i,...i->...', np.cross(a, b), los),
+                                  np.einsum('...i,...i->...', a, b)))
+    return (angle + 90.0) % 180.0 - 90.0
@@ -0,0 +1,185 @@
+import math
+import numpy as np
+
+from . import batch, validation
+from .geometry import EARTH_RADIUS
+
+# inputs a real-time evaluator takes per call, the others are bound once
+REALTIME_INPUTS = ('orbit_elevation_angle',)
+
+# distance, in meters, standing in for invalid distances before the log
+_SMALLEST_DISTANCE = 1e-300
+
+
+class RealtimeEvaluator():
+    """
+    Link budget evaluator for tracking loops, bound once to a configuration
+
+    Every input except the elevation angle, or the link distance when it is
+    given directly, is folded into constants at construction. Output arrays
+    are allocated once and updated in place with numpy ufuncs writing into
+    them, so a steady-state update creates no arrays, quantities, strings or
+    other objects tracked by the garbage collector.
+
+    Steps to use this class:
+        1) Configure a LinkBudgetCalculator with the fixed inputs
+        2) Instantiate an evaluator with the number of tracked objects
+        3) Call update_elevation() or update_link_distance() every cycle
+        4) Read link_margin, received_power, link_distance and is_valid,
+           which are the same arrays after every update
+
+    """
+
+    def __init__(self, calculator, size=1, speed_of_light=batch.SPEED_OF_LIGHT, earth_radius=EARTH_RADIUS):
+        """
+        RealtimeEvaluator Constructor
+
+        @type  calculator: LinkBudgetCalculator
+        @param calculator: calculator holding the fixed inputs, its elevation
+                           angle is ignored
+        @type  size: int
+        @param size: number of budgets evaluated per update
+        @type  speed_of_light: number
+        @param speed_of_light: speed of light in meters per second
+        @type  earth_radius: number
+        @param earth_radius: Earth radius in meters
+
+        """
+        values = batch.columns_from_calculator(calculator)
+        message = validation.first_error(dict(values, **dict((name, 1.0) for name in REALTIME_INPUTS)))
+        if message is not None:
+            raise ValueError(message)
+        if not values['transmit_power'] > 0:
+            raise ValueError('Invalid Transmit Power')
+        if not values['altitude_satellite'] > values['altitude_ground_station']:
+            raise ValueError('Invalid Satellite Altitude')
+
+        wavelength = batch.downlink_wavelength(values['downlink_frequency'], speed_of_light)
+        self._received_constant = (batch.power_to_dBm(values['transmit_power']) + values['transmit_losses']
+                                   + values['transmit_antenna_gain'] + values['transmit_pointing_loss']
+                                   + values['polarization_losses'] + values['atmospheric_loss']
+                                   + values['receive_antenna_gain'] + values['receiving_pointing_loss']
+                                   - 20 * math.log10(4 * math.pi / wavelength))
+        self._margin_constant = -(batch.minimum_detectable_signal(values['noise_bandwidth'],
+                                                                  values['system_noise_figure'])
+                                  + values['target_energy_noise_ratio'] - values['implementation_loss'])
+        self._r_station = earth_radius + values['altitude_ground_station']
+        self._r_satellite_squared = (earth_radius + values['altitude_satellite']) ** 2
+
+        self._link_distance = np.zeros(size)
+        self._received_power = np.zeros(size)
+        self._link_margin = np.zeros(size)
+        self._is_valid = np.zeros(size, dtype=bool)
+        self._invalid = np.zeros(size, dtype=bool)
+        self._scratch = np.zeros(size)
+        self._angle = np.zeros(size)
+
+    def __len__(self):
+        return len(self._link_margin)
+
+    # ---------------- link_distance ----------------
+    @property
+    def link_distance(self):
+        """
+        Get the link distances of the last update
+
+        @rtype:  numpy array
+        @return: link distances in meters, updated in place
+        """
+        return self._link_distance
+
+    # ---------------- received_power ----------------
+    @property
+    def received_power(self):
+        """
+        Get the received powers of the last update
+
+        @rtype:  numpy array
+        @return: received powers in dBm, NaN for invalid inputs, updated in
+                 place
+        """
+        return self._received_power
+
+    # ---------------- link_margin ----------------
+    @property
+    def link_margin(self):
+        """
+        Get the link margins of the last update
+
+        @rtype:  numpy array
+        @return: link margins in dB, NaN for invalid inputs, updated in place
+        """
+        return self._link_margin
+
+    # ---------------- is_valid ----------------
+    @property
+    def is_valid(self):
+        """
+        Get the validity of the last update
+
+        @rtype:  numpy array
+        @return: boolean validity, updated in place
+        """
+        return self._is_valid
+
+    # --------------------------------------------------
+    # ----------------    functions     ----------------
+    # --------------------------------------------------
+
+    def update_elevation(self, orbit_elevation_angle):
+        """
+        Evaluate the budgets for new elevation angles
+
+        @type  orbit_elevation_angle: numpy array
+        @param orbit_elevation_angle: elevation angles in degrees, one per
+                                      budget, read before any output changes
+
+        @rtype:  numpy array
+        @return: link_margin
+        """
+        angle = self._angle
+        scratch = self._scratch
+        distance = self._link_distance
+        np.greater(orbit_elevation_angle, 0.0, out=self._is_valid)
+        np.radians(orbit_elevation_angle, out=angle)
+
+        # closed form slant range of geometry.ground_slant_range()
+        np.cos(angle, out=scratch)
+        np.multiply(scratch, self._r_station, out=scratch)
+        np.square(scratch, out=scratch)
+        np.subtract(self._r_satellite_squared, scratch, out=scratch)
+        np.sqrt(scratch, out=scratch)
+        np.sin(angle, out=angle)
+        np.multiply(angle, self._r_station, out=angle)
+        np.subtract(scratch, angle, out=distance)
+        return self._update()
+
+    def update_link_distance(self, link_distance):
+        """
+        Evaluate the budgets for new link distances, e.g. from tracking
+
+        @type  link_distance: numpy array
+        @param link_distance: link distances in meters, one per budget
+
+        @rtype:  numpy array
+        @return: link_margin
+        """
+        np.copyto(self._link_distance, link_distance)
+        np.greater(self._link_distance, 0.0, out=self._is_valid)
+        return self._update()
+
+    def _update(self):
+        """
+        Update received power and margin from the link distance buffer
+        """
+        received = self._received_power
+        # invalid distances are clamped to keep log10 quiet, they end up NaN
+        np.maximum(self._link_distance, _SMALLEST_DISTANCE, out=received)
+        np.log10(received, out=received)
+        np.multiply(received, -20.0, out=received)
+        np.add(received, self._received_constant, out=received)
+        np.add(received, self._margin_constant, out=self._link_margin)
+        np.logical_not(self._is_valid, out=self._invalid)
+        np.copyto(received, np.nan, where=self._invalid)
+        np.copyto(self._link_margin, np.nan, where=self._invalid)
+        return self._link_margin
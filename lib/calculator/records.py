@@ -0,0 +1,215 @@
+import math
+
+from . import validation
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS
+from .batch import SPEED_OF_LIGHT, INPUT_UNITS, OUTPUT_UNITS
+
+
+class _Record():
+    """
+    Immutable record of float fields, shared base of the input and result
+    records
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is immutable' % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError('%s is immutable' % type(self).__name__)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __reduce__(self):
+        return (_rebuild, (type(self), self.as_dict()))
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__,
+                           ', '.join('%s=%r' % (name, getattr(self, name)) for name in self.__slots__))
+
+    def as_dict(self):
+        """
+        Return the fields of the record
+
+        @rtype:  dict
+        @return: field name to value
+
+        """
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+
+def _rebuild(cls, values):
+    return cls(**values)
+
+
+class LinkBudgetInputs(_Record):
+    """
+    Immutable inputs of one link budget
+
+    Holds the same inputs as LinkBudgetCalculator, as floats in the units of
+    batch.INPUT_UNITS. Pint quantities given to the constructor are
+    converted. Records can be shared freely between threads; use replace()
+    to derive a modified configuration.
+
+    """
+
+    __slots__ = tuple(INPUT_UNITS)
+
+    def __init__(self, **values):
+        """
+        LinkBudgetInputs Constructor
+
+        @param values: input name to pint quantity or number, missing inputs
+                       take the LinkBudgetCalculator defaults
+
+        """
+        unknown = set(values) - set(INPUT_UNITS)
+        if unknown:
+            raise TypeError('Unknown link budget inputs: %s' % ', '.join(sorted(unknown)))
+        for name, units in INPUT_UNITS.items():
+            object.__setattr__(self, name, float(to_magnitude(values.get(name, 0.0), units, name)))
+
+    @classmethod
+    def from_calculator(cls, calculator):
+        """
+        Build a record from the inputs of a calculator
+
+        @type  calculator: LinkBudgetCalculator
+        @param calculator: calculator holding the inputs
+
+        @rtype:  LinkBudgetInputs
+        @return: inputs record
+
+        """
+        return cls(**dict((name, getattr(calculator, name)) for name in INPUT_UNITS))
+
+    def replace(self, **changes):
+        """
+        Return a copy of the record with some inputs changed
+
+        @param changes: input name to pint quantity or number
+
+        @rtype:  LinkBudgetInputs
+        @return: new inputs record
+
+        """
+        values = self.as_dict()
+        values.update(changes)
+        return type(self)(**values)
+
+
+class LinkBudgetResult(_Record):
+    """
+    Immutable intermediates and outputs of one link budget, as floats in the
+    units of batch.OUTPUT_UNITS
+    """
+
+    __slots__ = tuple(OUTPUT_UNITS)
+
+    def __init__(self, **values):
+        """
+        LinkBudgetResult Constructor
+
+        @param values: output name to float, every output is required
+
+        """
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+
+def validate(inputs):
+    """
+    Check the inputs of a link budget the way LinkBudgetCalculator.run() does
+
+    @type  inputs: LinkBudgetInputs
+    @param inputs: inputs to check
+
+    """
+    message = validation.first_error(inputs)
+    if message is not None:
+        raise ValueError(message)
+
+
+def evaluate(inputs, speed_of_light=SPEED_OF_LIGHT, earth_radius=EARTH_RADIUS, link_distance=None):
+    """
+    Evaluate one link budget without side effects
+
+    Performs the calculations of LinkBudgetCalculator.run() and raises the
+    same ValueError for invalid inputs.
+
+    @type  inputs: LinkBudgetInputs
+    @param inputs: inputs of the link budget
+    @type  speed_of_light: number
+    @param speed_of_light: speed of light in meters per second
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+    @type  link_distance: number
+    @param link_distance: link distance in meters already known for the
+                          ground station geometry, computed when None
+
+    @rtype:  LinkBudgetResult
+    @return: intermediates and outputs of the link budget
+
+    """
+    validate(inputs)
+
+    # Downlink Wavelength m
+    wavelength = speed_of_light / inputs.downlink_frequency
+
+    # Link Distance m
+    if link_distance is not None:
+        link_distance = float(link_distance)
+    elif (inputs.orbit_elevation_angle == 90):
+        link_distance = inputs.altitude_satellite - inputs.altitude_ground_station
+    else:
+        beta = math.radians(inputs.orbit_elevation_angle) + (math.pi / 2)
+        alpha = math.asin(((inputs.altitude_ground_station + earth_radius)
+                           / (inputs.altitude_satellite + earth_radius)) * math.sin(beta))
+        theta = math.pi - alpha - beta
+        link_distance = math.sin(theta) * (inputs.altitude_satellite + earth_radius) / math.sin(beta)
+
+    # Transmit Power dBm
+    transmit_power_dBm = 10 * math.log10(inputs.transmit_power * 1000.0)
+
+    # Transmit EIRP dBm
+    transmit_eirp = (transmit_power_dBm + inputs.transmit_losses + inputs.transmit_antenna_gain
+                     + inputs.transmit_pointing_loss)
+
+    # Downlink Path Loss dB
+    downlink_path_loss = -20 * math.log10(4 * math.pi * link_distance / wavelength)
+
+    # Required Eb/N0 dB
+    required_ebno = inputs.target_energy_noise_ratio - inputs.implementation_loss
+
+    # Received Power dBm
+    received_power = (transmit_eirp + downlink_path_loss + inputs.polarization_losses + inputs.atmospheric_loss
+                      + inputs.receive_antenna_gain + inputs.receiving_pointing_loss)
+
+    # MDS dBm
+    minimum_detectable_signal = -174 + 10 * math.log10(inputs.noise_bandwidth) + inputs.system_noise_figure
+
+    # Eb/N0 Received dB
+    energy_noise_ratio = received_power - minimum_detectable_signal
+
+    return LinkBudgetResult(downlink_wavelength=wavelength,
+                            link_distance=link_distance,
+                            required_ebno=required_ebno,
+                            transmit_power_dBm=transmit_power_dBm,
+                            transmit_eirp=transmit_eirp,
+                            downlink_path_loss=downlink_path_loss,
+                            received_power=received_power,
+                            minimum_detectable_signal=minimum_detectable_signal,
+                            energy_noise_ratio=energy_noise_ratio,
+                            link_margin=energy_noise_ratio - required_ebno)
@@ -0,0 +1,287 @@
+import heapq
+import numpy as np
+
+from . import batch
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS, slant_range, is_earth_blocked
+
+# labels used for nodes returned by RelayRouter.route()
+SATELLITE = 'satellite'
+GROUND_STATION = 'ground_station'
+
+
+class RelayRouter():
+    """
+    Widest path routing from relay satellites down to ground stations
+
+    Every visible satellite to satellite and satellite to ground station hop
+    is weighted by its link margin, computed with the same path-loss and
+    margin stages as LinkBudgetCalculator.run(). For each satellite the
+    router keeps the path to any ground station whose weakest hop has the
+    largest margin (max-min or widest path).
+
+    Hops are treated as symmetric: the margin of a hop is the margin of the
+    calculator configuration for that hop type at the hop's slant range.
+
+    Steps to use this class:
+        1) Instantiate a router with configured calculators and positions
+        2) Read bottleneck_margin or call route() for each satellite
+        3) Call update() with new positions at every time step, only the
+           hops touching moved nodes are evaluated again and only the
+           affected part of the routing tree is searched again
+
+    """
+
+    def __init__(self, calculator, satellite_positions, ground_positions, ground_calculator=None,
+                 max_range=None, margin_tolerance=0.0, earth_radius=EARTH_RADIUS):
+        """
+        RelayRouter Constructor
+
+        @type  calculator: LinkBudgetCalculator
+        @param calculator: configuration used for satellite to satellite hops
+        @type  satellite_positions: pint length or array (meters), shape (N, 3)
+        @param satellite_positions: satellite positions
+        @type  ground_positions: pint length or array (meters), shape (M, 3)
+        @param ground_positions: ground station positions, same frame
+        @type  ground_calculator: LinkBudgetCalculator
+        @param ground_calculator: configuration used for satellite to ground
+                                  hops, defaults to calculator
+        @type  max_range: number
+        @param max_range: hops longer than this many meters are ignored
+        @type  margin_tolerance: number
+        @param margin_tolerance: hop margin changes up to this many dB are
+                                 ignored by update()
+        @type  earth_radius: number
+        @param earth_radius: Earth radius in meters used for blockage
+
+        """
+        self._isl_columns = batch.columns_from_calculator(calculator)
+        if ground_calculator is None:
+            ground_calculator = calculator
+        self._ground_columns = batch.columns_from_calculator(ground_calculator)
+        self._max_range = max_range
+        self._margin_tolerance = margin_tolerance
+        self._earth_radius = earth_radius
+
+        satellite_positions = to_magnitude(satellite_positions, 'meter', 'satellite_positions')
+        ground_positions = to_magnitude(ground_positions, 'meter', 'ground_positions')
+        self._num_satellites = len(satellite_positions)
+        self._num_ground = len(ground_positions)
+        self._positions = np.concatenate((np.reshape(satellite_positions, (-1, 3)),
+                                          np.reshape(ground_positions, (-1, 3))))
+
+        num_nodes = self._num_satellites + self._num_ground
+        self._adjacency = [dict() for _ in range(num_nodes)]
+        self._width = np.full(num_nodes, -np.inf)
+        self._width[self._num_satellites:] = np.inf
+        self._parent = np.full(num_nodes, -1, dtype=int)
+        self.evaluated_hops = 0
+
+        changes = self._evaluate_hops(np.ones(num_nodes, dtype=bool))
+        self._apply_changes(changes)
+
+    # ---------------- bottleneck_margin ----------------
+    @property
+    def bottleneck_margin(self):
+        """
+        Get the margin of the weakest hop on the best path of each satellite
+
+        @rtype:  numpy array
+        @return: margin in dB per satellite, -inf when no ground station
+                 can be reached
+
+        """
+        return self._width[:self._num_satellites].copy()
+
+    # ---------------- functions ----------------
+    def route(self, satellite):
+        """
+        Return the widest path from a satellite to a ground station
+
+        @type  satellite: int
+        @param satellite: index of the satellite
+
+        @rtype:  list
+        @return: (SATELLITE or GROUND_STATION, index) tuples from the
+                 satellite to the ground station, empty when unreachable
+
+        """
+        if not np.isfinite(self._width[satellite]):
+            return []
+        path = []
+        node = satellite
+        while node >= 0:
+            path.append(self._label(node))
+            node = self._parent[node]
+        return path
+
+    def hop_margin(self, node_a, node_b):
+        """
+        Return the margin of a single hop
+
+        @type  node_a: tuple
+        @param node_a: (SATELLITE or GROUND_STATION, index) of one end
+        @type  node_b: tuple
+        @param node_b: (SATELLITE or GROUND_STATION, index) of the other end
+
+        @rtype:  number
+        @return: hop margin in dB, None when the hop is not usable
+
+        """
+        return self._adjacency[self._node(node_a)].get(self._node(node_b))
+
+    def update(self, satellite_positions, ground_positions=None, position_tolerance=0.0):
+        """
+        Move the nodes and update the routes incrementally
+
+        @type  satellite_positions: pint length or array (meters), shape (N, 3)
+        @param satellite_positions: new satellite positions
+        @type  ground_positions: pint length or array (meters), shape (M, 3)
+        @param ground_positions: new ground station positions, unchanged
+                                 when None
+        @type  position_tolerance: number
+        @param position_tolerance: nodes moving less than this many meters
+                                   keep their hops
+
+        """
+        positions = self._positions.copy()
+        positions[:self._num_satellites] = np.reshape(
+            to_magnitude(satellite_positions, 'meter', 'satellite_positions'), (-1, 3))
+        if ground_positions is not None:
+            positions[self._num_satellites:] = np.reshape(
+                to_magnitude(ground_positions, 'meter', 'ground_positions'), (-1, 3))
+        displacement = np.sqrt(np.sum((positions - self._positions) ** 2, axis=1))
+        moved = displacement > position_tolerance
+        self._positions[moved] = positions[moved]
+        self._apply_changes(self._evaluate_hops(moved))
+
+    def _label(self, node):
+        if node < self._num_satellites:
+            return (SATELLITE, int(node))
+        return (GROUND_STATION, int(node - self._num_satellites))
+
+    def _node(self, label):
+        kind, index = label
+        if kind == SATELLITE:
+            return index
+        return self._num_satellites + index
+
+    def _hop_margins(self, columns, first, second):
+        """
+        Vectorized margins of the hops between two arrays of node indices,
+        NaN where the hop is blocked, out of range or invalid
+        """
+        a = self._positions[first]
+        b = self._positions[second]
+        distance = slant_range(a, b)
+        usable = ~is_earth_blocked(a, b, self._earth_radius)
+        if self._max_range is not None:
+            usable &= distance <= self._max_range
+        results = batch.evaluate(columns, link_distance=distance)
+        usable &= results['is_valid']
+        self.evaluated_hops += len(first)
+        return np.where(usable, results['link_margin'], np.nan)
+
+    def _evaluate_hops(self, moved):
+        """
+        Recompute every hop touching a moved node and return the hops whose
+        margin changed as (node, node, old margin, new margin) tuples
+        """
+        n = self._num_satellites
+        first, second = np.triu_indices(n, 1)
+        selected = moved[first] | moved[second]
+        isl = (first[selected], second[selected])
+        sat, ground = np.meshgrid(np.arange(n), np.arange(n, n + self._num_ground), indexing='ij')
+        sat = sat.ravel()
+        ground = ground.ravel()
+        selected = moved[sat] | moved[ground]
+        downlink = (sat[selected], ground[selected])
+
+        changes = []
+        for columns, (u, v) in ((self._isl_columns, isl), (self._ground_columns, downlink)):
+            if len(u) == 0:
+                continue
+            margins = self._hop_margins(columns, u, v)
+            for a, b, margin in zip(u.tolist(), v.tolist(), margins.tolist()):
+                old = self._adjacency[a].get(b)
+                new = None if margin != margin else margin
+                if old is None and new is None:
+                    continue
+                if old is not None and new is not None and abs(new - old) <= self._margin_tolerance:
+                    continue
+                changes.append((a, b, old, new))
+        return changes
+
+    def _apply_changes(self, changes):
+        """
+        Apply hop changes and repair the widest path tree
+
+        Subtrees hanging below a weakened tree hop are invalidated and
+        relabelled from their neighbours, strengthened hops are pushed
+        directly; a max-heap search then only visits affected nodes.
+        """
+        width = self._width
+        parent = self._parent
+        adjacency = self._adjacency
+        weakened = []
+        heap = []
+        for a, b, old, new in changes:
+            if new is None:
+                del adjacency[a][b]
+                del adjacency[b][a]
+            else:
+                adjacency[a][b] = new
+                adjacency[b][a] = new
+            if old is not None and (new is None or new < old):
+                weakened.append((a, b))
+
+        # invalidate subtrees below weakened tree hops
+        roots = []
+        for a, b in weakened:
+            if parent[b] == a:
+                roots.append(b)
+            elif parent[a] == b:
+                roots.append(a)
+        invalid = set()
+        if roots:
+            children = [[] for _ in range(len(parent))]
+            for node, up in enumerate(parent.tolist()):
+                if up >= 0:
+                    children[up].append(node)
+            stack = roots
+            while stack:
+                node = stack.pop()
+                if node in invalid:
+                    continue
+                invalid.add(node)
+                stack.extend(children[node])
+            for node in invalid:
+                width[node] = -np.inf
+                parent[node] = -1
+            for node in invalid:
+                for neighbour, margin in adjacency[node].items():
+                    if neighbour not in invalid:
+                        candidate = min(width[neighbour], margin)
+                        if candidate > -np.inf:
+                            heapq.heappush(heap, (-candidate, node, neighbour))
+
+        # strengthened or new hops may improve either end
+        for a, b, old, new in changes:
+            if new is not None and (old is None or new > old):
+                for node, neighbour in ((a, b), (b, a)):
+                    candidate = min(width[neighbour], new)
+                    if node < self._num_satellites and candidate > width[node]:
+                        heapq.heappush(heap, (-candidate, node, neighbour))
+
+        while heap:
+            candidate, node, via = heapq.heappop(heap)
+            candidate = -candidate
+            if candidate <= width[node]:
+                continue
+            width[node] = candidate
+            parent[node] = via
+            for neighbour, margin in adjacency[node].items():
+                if neighbour < self._num_satellites:
+                    reach = min(candidate, margin)
+                    if reach > width[neighbour]:
+                        heapq.heappush(heap, (-reach, neighbour, node))
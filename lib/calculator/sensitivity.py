@@ -0,0 +1,135 @@
+import numpy as np
+
+from . import validation
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS, ground_slant_range
+from .batch import INPUT_UNITS
+
+# outputs whose partial derivatives are returned by jacobian()
+SENSITIVITY_OUTPUTS = ('received_power', 'minimum_detectable_signal', 'link_margin')
+
+# inputs entering the received power as plain dB terms
+_RECEIVED_POWER_TERMS = ('transmit_losses', 'transmit_antenna_gain', 'transmit_pointing_loss',
+                         'polarization_losses', 'atmospheric_loss', 'receive_antenna_gain',
+                         'receiving_pointing_loss')
+
+# dB per neper of a power ratio, d(10 log10 x)/dx = _DB_PER_LN / x
+_DB_PER_LN = 10.0 / np.log(10.0)
+
+
+def jacobian(columns, link_distance=None, earth_radius=EARTH_RADIUS):
+    """
+    Exact partial derivatives of the link budget outputs for many scenarios
+
+    Inputs in dB enter the outputs with a slope of +1 or -1; transmit power,
+    frequency, bandwidth and the ground station geometry are differentiated
+    analytically. Derivatives are expressed per unit of batch.INPUT_UNITS,
+    e.g. dB per meter of satellite altitude or dB per degree of elevation.
+    The speed of light cancels out of every derivative.
+
+    @type  columns: dict
+    @param columns: input name to pint quantity, number or array, as
+                    accepted by batch.evaluate()
+    @type  link_distance: pint length or array (meters)
+    @param link_distance: slant ranges to use instead of the ground station
+                          geometry, the geometry derivatives are then zero
+    @type  earth_radius: number
+    @param earth_radius: Earth radius in meters
+
+    @rtype:  dict
+    @return: output name of SENSITIVITY_OUTPUTS to a dict of input name to
+             derivative array, NaN for invalid rows, plus the is_valid array
+
+    """
+    values = dict((name, to_magnitude(columns.get(name, 0.0), units, name))
+                  for name, units in INPUT_UNITS.items())
+    if link_distance is not None:
+        values['link_distance'] = to_magnitude(link_distance, 'meter', 'link_distance')
+    names = list(values)
+    values = dict(zip(names, np.broadcast_arrays(*[values[name] for name in names])))
+    distance = values.pop('link_distance', None)
+    is_valid, _ = validation.validate(values, distance)
+    zero = np.zeros(is_valid.shape)
+
+    received = dict((name, zero) for name in INPUT_UNITS)
+    mds = dict((name, zero) for name in INPUT_UNITS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # received power: EIRP and receive chain terms, then free space loss
+        received['transmit_power'] = _DB_PER_LN / values['transmit_power']
+        for name in _RECEIVED_POWER_TERMS:
+            received[name] = zero + 1.0
+        received['downlink_frequency'] = -2 * _DB_PER_LN / values['downlink_frequency']
+        if distance is None:
+            d_altitude_satellite, d_altitude_ground_station, d_elevation = _slant_range_gradient(
+                values['orbit_elevation_angle'], values['altitude_ground_station'],
+                values['altitude_satellite'], earth_radius)
+            distance = ground_slant_range(values['orbit_elevation_angle'], values['altitude_ground_station'],
+                                          values['altitude_satellite'], earth_radius)
+            path_slope = -2 * _DB_PER_LN / distance
+            received['altitude_satellite'] = path_slope * d_altitude_satellite
+            received['altitude_ground_station'] = path_slope * d_altitude_ground_station
+            received['orbit_elevation_angle'] = path_slope * d_elevation
+
+        # minimum detectable signal: noise bandwidth and noise figure
+        mds['noise_bandwidth'] = _DB_PER_LN / values['noise_bandwidth']
+        mds['system_noise_figure'] = zero + 1.0
+
+    margin = dict((name, received[name] - mds[name]) for name in INPUT_UNITS)
+    margin['target_energy_noise_ratio'] = zero - 1.0
+    margin['implementation_loss'] = zero + 1.0
+
+    results = {}
+    for output, derivatives in zip(SENSITIVITY_OUTPUTS, (received, mds, margin)):
+        results[output] = dict((name, np.where(is_valid, derivative, np.nan))
+                               for name, derivative in derivatives.items())
+    results['is_valid'] = is_valid
+    return results
+
+
+def tornado(derivatives, spans, output='link_margin'):
+    """
+    First order change of an output for a span of each input, largest first
+
+    @type  derivatives: dict
+    @param derivatives: result of jacobian()
+    @type  spans: dict
+    @param spans: input name to (low, high) change, or to a number for a
+                  symmetric change, in the units of batch.INPUT_UNITS
+    @type  output: string
+    @param output: one of SENSITIVITY_OUTPUTS
+
+    @rtype:  list
+    @return: (input name, change at low, change at high) tuples, sorted by
+             decreasing largest absolute change over all rows
+
+    """
+    bars = []
+    for name, span in spans.items():
+        low, high = span if np.ndim(span) == 1 else (-span, span)
+        derivative = derivatives[output][name]
+        bars.append((name, derivative * low, derivative * high))
+
+    def size(bar):
+        changes = np.abs(np.concatenate([np.ravel(bar[1]), np.ravel(bar[2])]))
+        changes = changes[~np.isnan(changes)]
+        return changes.max() if changes.size else 0.0
+
+    return sorted(bars, key=size, reverse=True)
+
+
+def _slant_range_gradient(orbit_elevation_angle, altitude_ground_station, altitude_satellite, earth_radius):
+    """
+    Partial derivatives of geometry.ground_slant_range() with respect to the
+    satellite altitude, the ground station altitude and the elevation in
+    degrees
+    """
+    elevation = np.radians(orbit_elevation_angle)
+    r_station = earth_radius + altitude_ground_station
+    r_satellite = earth_radius + altitude_satellite
+    cos_e = np.cos(elevation)
+    sin_e = np.sin(elevation)
+    root = np.sqrt(r_satellite ** 2 - (r_station * cos_e) ** 2)
+    d_altitude_satellite = r_satellite / root
+    d_altitude_ground_station = -r_station * cos_e ** 2 / root - sin_e
+    d_elevation = (r_station ** 2 * cos_e * sin_e / root - r_station * cos_e) * (np.pi / 180.0)
+    return d_altitude_satellite, d_altitude_ground_station, d_elevation
@@ -0,0 +1,342 @@
+import sys
+import time
+import json
+import asyncio
+import argparse
+import collections
+import numpy as np
+
+from . import batch
+from .pipeline import ColumnParser, output_headers
+
+# defaults of the micro-batching queue
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT = 0.002
+
+# number of recent request latencies kept for the percentiles
+LATENCY_WINDOW = 10000
+
+# largest request body accepted, in bytes
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large'}
+
+
+class MicroBatcher():
+    """
+    Coalesces concurrent link budget queries into vectorized evaluations
+
+    Queries wait in a queue until either max_batch_size of them are
+    available or the oldest one has waited max_wait seconds, then the whole
+    batch is evaluated with one call to batch.evaluate().
+
+    """
+
+    def __init__(self, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT):
+        """
+        MicroBatcher Constructor
+
+        @type  max_batch_size: int
+        @param max_batch_size: largest number of queries evaluated together
+        @type  max_wait: number
+        @param max_wait: longest time in seconds a query waits for others
+
+        """
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._queue = None
+        self._arrival = None
+        self._task = None
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._requests = 0
+        self._batches = 0
+
+    def start(self):
+        """
+        Start the batching task on the running event loop
+        """
+        self._queue = asyncio.Queue()
+        self._arrival = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the batching task
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, query):
+        """
+        Evaluate one query
+
+        @type  query: dict
+        @param query: input name to magnitude in the units of batch.INPUT_UNITS
+
+        @rtype:  dict
+        @return: result name to value for this query
+
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((time.perf_counter(), query, future))
+        self._arrival.set()
+        return await future
+
+    def stats(self):
+        """
+        Return queue and latency statistics
+
+        @rtype:  dict
+        @return: queue depth, request and batch counts, mean batch size and
+                 latency percentiles in milliseconds over recent requests
+
+        """
+        stats = {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'requests': self._requests,
+            'batches': self._batches,
+            'mean_batch_size': self._requests / self._batches if self._batches else 0.0,
+        }
+        if self._latencies:
+            p50, p90, p99 = np.percentile(np.array(self._latencies), [50, 90, 99]) * 1000.0
+        else:
+            p50 = p90 = p99 = 0.0
+        stats['latency_ms'] = {'p50': float(p50), 'p90': float(p90), 'p99': float(p99)}
+        return stats
+
+    async def _run(self):
+        while True:
+            pending = [await self._queue.get()]
+            deadline = pending[0][0] + self._max_wait
+            while True:
+                while len(pending) < self._max_batch_size and not self._queue.empty():
+                    pending.append(self._queue.get_nowait())
+                timeout = deadline - time.perf_counter()
+                if len(pending) >= self._max_batch_size or timeout <= 0:
+                    break
+                self._arrival.clear()
+                try:
+                    await asyncio.wait_for(self._arrival.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self._evaluate(pending)
+            # let the resolved requests respond before the next batch
+            await asyncio.sleep(0)
+
+    def _evaluate(self, pending):
+        columns = {}
+        for name in batch.INPUT_UNITS:
+            columns[name] = np.array([query.get(name, 0.0) for _, query, _ in pending], dtype=float)
+        try:
+            results = batch.evaluate(columns)
+        except Exception as error:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        results = dict((name, values.tolist()) for name, values in results.items())
+        now = time.perf_counter()
+        for index, (start, _, future) in enumerate(pending):
+            if not future.done():
+                future.set_result(dict((name, values[index]) for name, values in results.items()))
+            self._latencies.append(now - start)
+        self._requests += len(pending)
+        self._batches += 1
+
+
+class LinkBudgetService():
+    """
+    Local asyncio HTTP service answering link budget queries
+
+    POST /budget with a JSON object, or a list of objects, whose keys follow
+    the column headers of the command line pipeline (e.g.
+    downlink_frequency[MHz]). GET /stats returns MicroBatcher.stats().
+
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait=DEFAULT_MAX_WAIT, ureg=None, max_body_size=MAX_BODY_SIZE):
+        """
+        LinkBudgetService Constructor
+
+        @type  host: string
+        @param host: address to listen on
+        @type  port: int
+        @param port: port to listen on, 0 picks a free port
+        @type  max_batch_size: int
+        @param max_batch_size: largest number of queries evaluated together
+        @type  max_wait: number
+        @param max_wait: longest time in seconds a query waits for others
+        @type  ureg: pint Unit Registry
+        @param ureg: registry used to convert query units
+        @type  max_body_size: int
+        @param max_body_size: largest request body in bytes, larger ones are
+                              answered with 413 without being read
+
+        """
+        self._host = host
+        self._max_body_size = max_body_size
+        self._port = port
+        self._parser = ColumnParser(ureg)
+        self._headers = output_headers()
+        self.batcher = MicroBatcher(max_batch_size, max_wait)
+        self._server = None
+
+    # ---------------- port ----------------
+    @property
+    def port(self):
+        """
+        Get the port the service listens on
+
+        @rtype:  int
+        @return: bound port once started
+
+        """
+        if self._server is not None:
+            return self._server.sockets[0].getsockname()[1]
+        return self._port
+
+    async def start(self):
+        """
+        Start listening and batching
+        """
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+
+    async def stop(self):
+        """
+        Stop listening and batching
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+        self._server = None
+
+    async def serve_forever(self):
+        """
+        Start and serve until cancelled
+        """
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    def _query(self, record):
+        if not isinstance(record, dict):
+            raise ValueError('Query must be a JSON object')
+        query = {}
+        for header, value in record.items():
+            parsed = self._parser.parse(header)
+            if parsed is not None:
+                name, factor = parsed
+                query[name] = float(value) * factor
+        return query
+
+    def _response(self, result):
+        response = {}
+        for name, header in self._headers:
+            value = result[name]
+            if isinstance(value, float) and not np.isfinite(value):
+                value = None
+            response[header] = value
+        return response
+
+    async def _dispatch(self, method, path, body):
+        if path == '/stats':
+            if method != 'GET':
+                return 405, {'error': 'use GET'}
+            return 200, self.batcher.stats()
+        if path != '/budget':
+            return 404, {'error': 'unknown path %s' % path}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        try:
+            payload = json.loads(body)
+            if isinstance(payload, list):
+                queries = [self._query(record) for record in payload]
+            else:
+                queries = [self._query(payload)]
+        except (ValueError, TypeError) as error:
+            return 400, {'error': str(error)}
+        results = await asyncio.gather(*[self.batcher.submit(query) for query in queries])
+        results = [self._response(result) for result in results]
+        return 200, results if isinstance(payload, list) else results[0]
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                if len(parts) < 2:
+                    break
+                method, path = parts[0].upper(), parts[1]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                close = headers.get('connection', '').lower() == 'close'
+                length = headers.get('content-length', '0')
+                if not length.isdigit():
+                    # the body cannot be delimited, so the connection cannot be reused
+                    status, payload = 400, {'error': 'invalid Content-Length %s' % length}
+                    close = True
+                elif int(length) > self._max_body_size:
+                    # the body is not read, so the connection cannot be reused
+                    status, payload = 413, {'error': 'body larger than %d bytes' % self._max_body_size}
+                    close = True
+                else:
+                    body = await reader.readexactly(int(length)) if int(length) else b''
+                    status, payload = await self._dispatch(method, path, body)
+                data = json.dumps(payload).encode()
+                writer.write(('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n'
+                              'Content-Length: %d\r\nConnection: %s\r\n\r\n'
+                              % (status, _REASONS[status], len(data), 'close' if close else 'keep-alive')
+                              ).encode() + data)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv=None):
+    """
+    Command line entry point, see python -m lib.calculator.service --help
+    """
+    parser = argparse.ArgumentParser(prog='python -m lib.calculator.service',
+                                     description='Serve link budget queries over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on')
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help='largest number of queries evaluated together')
+    parser.add_argument('--max-wait', type=float, default=DEFAULT_MAX_WAIT,
+                        help='longest time in seconds a query waits for others')
+    parser.add_argument('--max-body-size', type=int, default=MAX_BODY_SIZE,
+                        help='largest request body in bytes')
+    args = parser.parse_args(argv)
+    service = LinkBudgetService(args.host, args.port, args.max_batch_size, args.max_wait,
+                                max_body_size=args.max_body_size)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,319 @@
+import os
+import json
+import numpy as np
+
+from . import batch
+
+# name of the metadata header inside a store directory
+HEADER_NAME = 'header.json'
+
+# identifier written in every header
+STORE_FORMAT = 'link-budget-result-store'
+
+# types of the columns that are not stored as floats
+COLUMN_DTYPES = {
+    'is_valid': np.dtype(bool),
+    'invalid_reasons': np.dtype(np.uint32),
+    'is_visible': np.dtype(bool),
+}
+
+
+def default_columns():
+    """
+    Columns stored when none are given: every batch output, is_valid and
+    invalid_reasons
+
+    @rtype:  dict
+    @return: column name to units
+
+    """
+    columns = dict(batch.OUTPUT_UNITS)
+    columns['is_valid'] = ''
+    columns['invalid_reasons'] = ''
+    return columns
+
+
+class ResultStore():
+    """
+    Disk backed columnar store for link budget sweep results
+
+    A store is a directory holding a small JSON header and one raw binary
+    file per column. Columns are opened as numpy memory maps, so readers
+    slice arbitrary sub-grids without loading whole columns and writers
+    fill the grid chunk by chunk.
+
+    Steps to use this class:
+        1) Create a store with ResultStore.create() for the sweep axes
+        2) Write batch.evaluate() results into it with write()
+        3) Open it later with ResultStore.open() and index columns by name
+
+    A store whose first axis is open ended, such as time, is created with
+    no values on that axis and grown with append().
+
+    """
+
+    def __init__(self, path, header, mode):
+        """
+        ResultStore Constructor, use create() or open() instead
+
+        @type  path: string
+        @param path: store directory
+        @type  header: dict
+        @param header: parsed metadata header
+        @type  mode: string
+        @param mode: numpy memmap mode of the columns
+
+        """
+        self._path = path
+        self._header = header
+        self._mode = mode
+        self._columns = {}
+
+    @classmethod
+    def create(cls, path, axes, columns=None, dtype=np.float64, attributes=None):
+        """
+        Create an empty store
+
+        @type  path: string
+        @param path: store directory, created if needed
+        @type  axes: list
+        @param axes: (name, values, units) tuples, one per grid dimension
+        @type  columns: dict
+        @param columns: column name to units, default_columns() when None
+        @type  dtype: numpy dtype
+        @param dtype: type of float columns
+        @type  attributes: dict
+        @param attributes: extra JSON serializable metadata
+
+        @rtype:  ResultStore
+        @return: store opened for reading and writing
+
+        """
+        if columns is None:
+            columns = default_columns()
+        os.makedirs(path, exist_ok=True)
+        header = {
+            'format': STORE_FORMAT,
+            'engine_version': batch.ENGINE_VERSION,
+            'shape': [],
+            'axes': [],
+            'columns': {},
+            'attributes': attributes or {},
+        }
+        for name, values, units in axes:
+            values = np.ascontiguousarray(values, dtype=np.float64)
+            if values.ndim != 1:
+                raise ValueError('Axis %s is not one dimensional' % name)
+            values.tofile(os.path.join(path, 'axis.%s.bin' % name))
+            header['axes'].append({'name': name, 'units': units, 'length': len(values)})
+            header['shape'].append(len(values))
+        count = int(np.prod(header['shape']))
+        for name, units in columns.items():
+            column_dtype = COLUMN_DTYPES.get(name, np.dtype(dtype))
+            header['columns'][name] = {'units': units, 'dtype': column_dtype.str}
+            with open(os.path.join(path, '%s.bin' % name), 'wb') as column_file:
+                column_file.truncate(count * column_dtype.itemsize)
+        store = cls(path, header, 'r+')
+        store._write_header()
+        return store
+
+    @classmethod
+    def open(cls, path, mode='r'):
+        """
+        Open an existing store
+
+        @type  path: string
+        @param path: store directory
+        @type  mode: string
+        @param mode: 'r' for read only, 'r+' to write into existing columns
+                     or append rows
+
+        @rtype:  ResultStore
+        @return: opened store
+
+        """
+        with open(os.path.join(path, HEADER_NAME)) as header_file:
+            header = json.load(header_file)
+        if header.get('format') != STORE_FORMAT:
+            raise ValueError('%s is not a link budget result store' % path)
+        return cls(path, header, mode)
+
+    # ---------------- shape ----------------
+    @property
+    def shape(self):
+        """
+        Get the shape of the result grid
+
+        @rtype:  tuple
+        @return: length of each axis
+
+        """
+        return tuple(self._header['shape'])
+
+    # ---------------- engine_version ----------------
+    @property
+    def engine_version(self):
+        """
+        Get the version of the engine that created the store
+
+        @rtype:  string
+        @return: batch.ENGINE_VERSION at creation time
+
+        """
+        return self._header['engine_version']
+
+    # ---------------- columns ----------------
+    @property
+    def columns(self):
+        """
+        Get the stored column names
+
+        @rtype:  list
+        @return: column names
+
+        """
+        return list(self._header['columns'])
+
+    # ---------------- attributes ----------------
+    @property
+    def attributes(self):
+        """
+        Get the extra metadata given at creation
+
+        @rtype:  dict
+        @return: extra metadata
+
+        """
+        return self._header['attributes']
+
+    # --------------------------------------------------
+    # ----------------    functions     ----------------
+    # --------------------------------------------------
+
+    def units(self, name):
+        """
+        Return the units of a column or axis
+
+        @type  name: string
+        @param name: column or axis name
+
+        @rtype:  string
+        @return: units name
+
+        """
+        if name in self._header['columns']:
+            return self._header['columns'][name]['units']
+        for axis in self._header['axes']:
+            if axis['name'] == name:
+                return axis['units']
+        raise KeyError(name)
+
+    def axis(self, name):
+        """
+        Return the values of a grid axis
+
+        @type  name: string
+        @param name: axis name
+
+        @rtype:  numpy memmap
+        @return: axis values
+
+        """
+        for axis in self._header['axes']:
+            if axis['name'] == name:
+                return np.memmap(os.path.join(self._path, 'axis.%s.bin' % name), dtype=np.float64,
+                                 mode='r', shape=(axis['length'],))
+        raise KeyError(name)
+
+    def __getitem__(self, name):
+        """
+        Return a column as a memory map with the grid shape, no data is read
+        until the column is sliced
+        """
+        if name not in self._columns:
+            column = self._header['columns'][name]
+            self._columns[name] = np.memmap(os.path.join(self._path, '%s.bin' % name),
+                                            dtype=np.dtype(column['dtype']), mode=self._mode,
+                                            shape=self.shape)
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._header['columns']
+
+    def write(self, index, results):
+        """
+        Write results into part of the grid
+
+        @type  index: slice, tuple or index array
+        @param index: part of the grid receiving the results
+        @type  results: dict
+        @param results: column name to values, e.g. from batch.evaluate(),
+                        names that are not stored are ignored
+
+        """
+        for name, values in results.items():
+            if name in self._header['columns']:
+                self[name][index] = values
+
+    def append(self, results, values):
+        """
+        Grow the grid along its first axis
+
+        Column files are extended in place, so a store can be written
+        incrementally while data arrives. Memory maps obtained before the
+        call do not see the new rows.
+
+        @type  results: dict
+        @param results: column name to values of shape (len(values),) plus
+                        the other axes, names that are not stored are
+                        ignored and missing columns are filled with zeros
+        @type  values: numpy array
+        @param values: first axis values of the new rows
+
+        """
+        if self._mode == 'r':
+            raise ValueError('%s is opened read only' % self._path)
+        values = np.ascontiguousarray(values, dtype=np.float64).ravel()
+        rows = (len(values),) + self.shape[1:]
+        axis = self._header['axes'][0]
+        self.flush()
+        self._columns = {}
+        for name, column in self._header['columns'].items():
+            data = np.ascontiguousarray(np.broadcast_to(results.get(name, 0), rows), dtype=np.dtype(column['dtype']))
+            with open(os.path.join(self._path, '%s.bin' % name), 'ab') as column_file:
+                data.tofile(column_file)
+        with open(os.path.join(self._path, 'axis.%s.bin' % axis['name']), 'ab') as axis_file:
+            values.tofile(axis_file)
+        axis['length'] += len(values)
+        self._header['shape'][0] += len(values)
+        self._write_header()
+
+    def _write_header(self):
+        """
+        Replace the header file in one step, readers never see a partial one
+        """
+        temporary = os.path.join(self._path, HEADER_NAME + '.tmp')
+        with open(temporary, 'w') as header_file:
+            json.dump(self._header, header_file, indent=1)
+        os.replace(temporary, os.path.join(self._path, HEADER_NAME))
+
+    def flush(self):
+        """
+        Flush written columns to disk
+        """
+        for column in self._columns.values():
+            if self._mode != 'r':
+                column.flush()
+
+    def close(self):
+        """
+        Flush and release the column memory maps
+        """
+        self.flush()
+        self._columns = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,269 @@
+import math
+import numpy as np
+
+from . import batch, validation
+from .units import to_magnitude
+from .geometry import EARTH_RADIUS, ground_slant_range
+
+# inputs a surface is evaluated over, the others are compiled into it
+SURFACE_INPUTS = ('orbit_elevation_angle', 'altitude_satellite', 'downlink_frequency')
+
+# default largest interpolation error in dB
+DEFAULT_TOLERANCE = 0.01
+
+# largest grid compile() builds before giving up on the tolerance
+MAX_GRID_POINTS = 4 * 1024 * 1024
+
+
+class MarginSurface():
+    """
+    Precomputed link margin over elevation, satellite altitude and frequency
+
+    For fixed hardware the link margin is a constant minus the free space
+    loss, and the loss splits into an exact frequency term and a slant range
+    term depending on elevation and satellite altitude only. The slant range
+    term is tabulated on a regular grid and interpolated bilinearly, so a
+    query costs a few float operations whatever the grid size.
+
+    Steps to use this class:
+        1) Configure a LinkBudgetCalculator with the fixed hardware inputs
+        2) Build a surface with MarginSurface.compile() over the elevation
+           and altitude ranges of interest
+        3) Query margin() per object, or margins() for arrays
+
+    """
+
+    def __init__(self, constant, elevations, altitudes, table, error_bound):
+        """
+        MarginSurface Constructor, use compile() instead
+
+        @type  constant: number
+        @param constant: margin in dB without the free space loss terms
+        @type  elevations: tuple
+        @param elevations: (first, last, count) of the elevation grid in degrees
+        @type  altitudes: tuple
+        @param altitudes: (first, last, count) of the altitude grid in meters
+        @type  table: numpy array
+        @param table: -20 log10 of the slant range on the grid, in dB
+        @type  error_bound: number
+        @param error_bound: largest interpolation error in dB
+
+        """
+        self._constant = float(constant)
+        self._elevation_first, self._elevation_last, self._elevation_count = elevations
+        self._altitude_first, self._altitude_last, self._altitude_count = altitudes
+        self._elevation_scale = (self._elevation_count - 1) / (self._elevation_last - self._elevation_first)
+        self._altitude_scale = (self._altitude_count - 1) / (self._altitude_last - self._altitude_first)
+        self._table = np.ascontiguousarray(table, dtype=np.float64)
+        # scalar queries read a flat list, indexing it yields floats without
+        # creating numpy scalars
+        self._values = self._table.ravel().tolist()
+        self._error_bound = float(error_bound)
+
+    @classmethod
+    def compile(cls, calculator, elevation_range, altitude_range, tolerance=DEFAULT_TOLERANCE,
+                speed_of_light=batch.SPEED_OF_LIGHT, earth_radius=EARTH_RADIUS):
+        """
+        Build a surface from the fixed inputs of a calculator
+
+        The grid is refined until the interpolation error bound of every
+        cell, from the analytic second derivatives of the slant range term,
+        is within the tolerance.
+
+        @type  calculator: LinkBudgetCalculator
+        @param calculator: calculator holding the fixed inputs, its
+                           elevation, satellite altitude and frequency are
+                           ignored
+        @type  elevation_range: tuple
+        @param elevation_range: (lowest, highest) elevation, pint angles or
+                                degrees, the lowest above zero
+        @type  altitude_range: tuple
+        @param altitude_range: (lowest, highest) satellite altitude, pint
+                               lengths or meters
+        @type  tolerance: number
+        @param tolerance: largest interpolation error allowed in dB
+        @type  speed_of_light: number
+        @param speed_of_light: speed of light in meters per second
+        @type  earth_radius: number
+        @param earth_radius: Earth radius in meters
+
+        @rtype:  MarginSurface
+        @return: compiled surface
+
+        """
+        values = batch.columns_from_calculator(calculator)
+        # the surface inputs are checked per query
+        message = validation.first_error(dict(values, **dict((name, 1.0) for name in SURFACE_INPUTS)))
+        if message is not None:
+            raise ValueError(message)
+        if not values['transmit_power'] > 0:
+            raise ValueError('Invalid Transmit Power')
+
+        elevation_low, elevation_high = [to_magnitude(value, 'degree', 'elevation_range') for value in elevation_range]
+        altitude_low, altitude_high = [to_magnitude(value, 'meter', 'altitude_range') for value in altitude_range]
+        if not 0 < elevation_low < elevation_high <= 90:
+            raise ValueError('Invalid elevation angle')
+        if not values['altitude_ground_station'] < altitude_low < altitude_high:
+            raise ValueError('Invalid Satellite Altitude')
+
+        constant = (batch.power_to_dBm(values['transmit_power']) + values['transmit_losses']
+                    + values['transmit_antenna_gain'] + values['transmit_pointing_loss']
+                    + values['polarization_losses'] + values['atmospheric_loss']
+                    + values['receive_antenna_gain'] + values['receiving_pointing_loss']
+                    - batch.minimum_detectable_signal(values['noise_bandwidth'], values['system_noise_figure'])
+                    - (values['target_energy_noise_ratio'] - values['implementation_loss'])
+                    + 20 * math.log10(speed_of_light / (4 * math.pi)))
+
+        def range_term(elevation, altitude):
+            distance = ground_slant_range(elevation, values['altitude_ground_station'], altitude, earth_radius)
+            return -20 * np.log10(distance)
+
+        count = 17
+        while True:
+            elevations = np.linspace(elevation_low, elevation_high, count)
+            altitudes = np.linspace(altitude_low, altitude_high, count)
+            error = _error_bound(elevations, altitudes, values['altitude_ground_station'], earth_radius)
+            if error <= tolerance:
+                table = range_term(elevations[:, np.newaxis], altitudes[np.newaxis, :])
+                return cls(constant, (elevation_low, elevation_high, count),
+                           (altitude_low, altitude_high, count), table, error)
+            if (2 * count - 1) ** 2 > MAX_GRID_POINTS:
+                raise ValueError('Tolerance of %g dB needs more than %d grid points' % (tolerance, MAX_GRID_POINTS))
+            count = 2 * count - 1
+
+    # ---------------- error_bound ----------------
+    @property
+    def error_bound(self):
+        """
+        Get the largest interpolation error over the surface, guaranteed
+        from the second derivatives of the slant range term
+
+        @rtype:  number
+        @return: error versus the exact link margin in dB
+
+        """
+        return self._error_bound
+
+    # ---------------- shape ----------------
+    @property
+    def shape(self):
+        """
+        Get the size of the interpolation grid
+
+        @rtype:  tuple
+        @return: (elevation count, altitude count)
+
+        """
+        return self._table.shape
+
+    # --------------------------------------------------
+    # ----------------    functions     ----------------
+    # --------------------------------------------------
+
+    def margin(self, elevation, altitude, frequency):
+        """
+        Link margin of one object, in constant time
+
+        Arguments are plain floats so the query allocates no arrays or
+        quantities.
+
+        @type  elevation: number
+        @param elevation: elevation angle in degrees
+        @type  altitude: number
+        @param altitude: satellite altitude in meters
+        @type  frequency: number
+        @param frequency: downlink frequency in Hertz
+
+        @rtype:  number
+        @return: link margin in dB
+
+        """
+        x = (elevation - self._elevation_first) * self._elevation_scale
+        y = (altitude - self._altitude_first) * self._altitude_scale
+        last_x = self._elevation_count - 1
+        last_y = self._altitude_count - 1
+        if not (0 <= x <= last_x and 0 <= y <= last_y and frequency > 0):
+            raise ValueError('Query outside of the surface: elevation %r, altitude %r, frequency %r'
+                             % (elevation, altitude, frequency))
+        i = min(int(x), last_x - 1)
+        j = min(int(y), last_y - 1)
+        x -= i
+        y -= j
+        values = self._values
+        k = i * self._altitude_count + j
+        low = values[k] + (values[k + 1] - values[k]) * y
+        k += self._altitude_count
+        high = values[k] + (values[k + 1] - values[k]) * y
+        return self._constant - 20 * math.log10(frequency) + low + (high - low) * x
+
+    def margins(self, elevation, altitude, frequency):
+        """
+        Link margins of many objects
+
+        @type  elevation: numpy array
+        @param elevation: elevation angles in degrees
+        @type  altitude: numpy array
+        @param altitude: satellite altitudes in meters
+        @type  frequency: numpy array
+        @param frequency: downlink frequencies in Hertz
+
+        @rtype:  numpy array
+        @return: link margins in dB, NaN outside of the surface
+
+        """
+        elevation, altitude, frequency = np.broadcast_arrays(elevation, altitude, frequency)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = self._constant - 20 * np.log10(frequency) + self._interpolate(elevation, altitude)
+        inside = ((elevation >= self._elevation_first) & (elevation <= self._elevation_last)
+                  & (altitude >= self._altitude_first) & (altitude <= self._altitude_last) & (frequency > 0))
+        return np.where(inside, result, np.nan)
+
+    def _interpolate(self, elevation, altitude):
+        """
+        Bilinear interpolation of the slant range term on arrays
+        """
+        x = np.clip((elevation - self._elevation_first) * self._elevation_scale, 0, self._elevation_count - 1)
+        y = np.clip((altitude - self._altitude_first) * self._altitude_scale, 0, self._altitude_count - 1)
+        i = np.minimum(x.astype(int), self._elevation_count - 2)
+        j = np.minimum(y.astype(int), self._altitude_count - 2)
+        x = x - i
+        y = y - j
+        table = self._table
+        low = table[i, j] + (table[i, j + 1] - table[i, j]) * y
+        high = table[i + 1, j] + (table[i + 1, j + 1] - table[i + 1, j]) * y
+        return low + (high - low) * x
+
+
+def _error_bound(elevations, altitudes, altitude_ground_station, earth_radius):
+    """
+    Largest bilinear interpolation error in dB of -20 log10 of the slant
+    range over the cells of a grid
+
+    Per cell of widths h and k the error of the bilinear interpolant is at
+    most h^2/8 max|f_ee| + k^2/8 max|f_rr|: interpolating along elevation
+    errs by the first term, and interpolating along altitude at both cell
+    edges by the second, which the elevation interpolation cannot increase.
+    With u = ln d, d the slant range, S = d + Rg sin e, H = Rg cos e and r
+    the satellite radius:
+
+        u_ee = Rg sin e r^2 / S^3
+        -u_rr = H^2 / (S^3 d) + r^2 / (S^2 d^2)
+
+    Both decrease with r, and the maxima over a cell are bounded by taking
+    each factor at the cell edge where it is largest: sin e and d at the
+    highest elevation, H and 1/S at the lowest.
+    """
+    station = earth_radius + altitude_ground_station
+    radius = earth_radius + altitudes[:-1]
+    low = np.radians(elevations[:-1])[:, np.newaxis]
+    high = np.radians(elevations[1:])[:, np.newaxis]
+    horizontal = station * np.cos(low)
+    # S is the same at the lowest elevation, d is smallest at the highest
+    s_low = np.sqrt(radius * radius - horizontal * horizontal)
+    s_high = np.sqrt(radius * radius - (station * np.cos(high)) ** 2)
+    d_high = s_high - station * np.sin(high)
+    u_ee = station * np.sin(high) * radius * radius / s_low ** 3
+    u_rr = horizontal * horizontal / (s_low ** 3 * d_high) + radius * radius / (s_low * d_high) ** 2
+    h = math.radians(elevations[1] - elevations[0])
+    k = altitudes[1] - altitudes[0]
+    return float(np.max(20 / math.log(10) * (h * h / 8 * u_ee + k * k / 8 * u_rr)))
@@ -0,0 +1,260 @@
+import numpy as np
+
+from . import batch, validation
+from .units import DECIBEL_UNITS, to_magnitude
+
+
+class LinkBudgetTable():
+    """
+    Columnar collection of many link budgets
+
+    Every input, intermediate and output is stored as one numpy float array,
+    with the units of the column held once in batch.INPUT_UNITS and
+    batch.OUTPUT_UNITS, so a budget costs little more than its raw floats.
+    Rows are exposed through LinkBudgetRow views offering the same property
+    names as LinkBudgetCalculator.
+
+    Steps to use this class:
+        1) Instantiate a table with a pint unit registry and a row count,
+           or build one with from_columns(), from_mappings() or
+           from_calculators()
+        2) Fill input columns, by name or through row views
+        3) Use the evaluate function to update intermediates and outputs
+        4) Read columns by name or rows through row views
+
+    """
+
+    def __init__(self, ureg, size=0, dtype=np.float64):
+        """
+        LinkBudgetTable Constructor
+
+        @type  ureg: pint Unit Registry
+        @param ureg: registry used for the quantities returned by row views
+        @type  size: int
+        @param size: number of budgets
+        @type  dtype: numpy dtype
+        @param dtype: type of the float columns
+
+        """
+        self._ureg = ureg
+        self._size = size
+        self._columns = {}
+        for name in list(batch.INPUT_UNITS) + list(batch.OUTPUT_UNITS):
+            self._columns[name] = np.zeros(size, dtype=dtype)
+        self._columns['is_valid'] = np.zeros(size, dtype=bool)
+        self._columns['invalid_reasons'] = np.zeros(size, dtype=np.uint32)
+
+    @classmethod
+    def from_columns(cls, ureg, columns, dtype=np.float64):
+        """
+        Build a table from input columns
+
+        @type  ureg: pint Unit Registry
+        @param ureg: registry used for the quantities returned by row views
+        @type  columns: dict
+        @param columns: input name to pint quantity, number or array, scalars
+                        are repeated and missing inputs take the
+                        LinkBudgetCalculator defaults
+        @type  dtype: numpy dtype
+        @param dtype: type of the float columns
+
+        @rtype:  LinkBudgetTable
+        @return: new table
+
+        """
+        values = [to_magnitude(columns.get(name, 0.0), units, name) for name, units in batch.INPUT_UNITS.items()]
+        values = np.broadcast_arrays(*values)
+        table = cls(ureg, values[0].size, dtype)
+        for name, value in zip(batch.INPUT_UNITS, values):
+            table._columns[name][:] = np.ravel(value)
+        return table
+
+    @classmethod
+    def from_mappings(cls, ureg, mappings, dtype=np.float64):
+        """
+        Build a table from many scenarios at once
+
+        Units are checked once per unit and column, not once per value.
+
+        @type  ureg: pint Unit Registry
+        @param ureg: registry used for the quantities returned by row views
+        @type  mappings: list
+        @param mappings: one dict per scenario of input name to pint quantity
+                         or number, missing inputs take the
+                         LinkBudgetCalculator defaults
+        @type  dtype: numpy dtype
+        @param dtype: type of the float columns
+
+        @rtype:  LinkBudgetTable
+        @return: new table, one row per mapping
+
+        """
+        unknown = set().union(*mappings) - set(batch.INPUT_UNITS) if mappings else set()
+        if unknown:
+            raise TypeError('Unknown link budget inputs: %s' % ', '.join(sorted(unknown)))
+        table = cls(ureg, len(mappings), dtype)
+        for name, units in batch.INPUT_UNITS.items():
+            table._columns[name][:] = [to_magnitude(mapping.get(name, 0.0), units, name) for mapping in mappings]
+        return table
+
+    @classmethod
+    def from_calculators(cls, calculators, dtype=np.float64):
+        """
+        Build a table from configured calculators
+
+        @type  calculators: list
+        @param calculators: LinkBudgetCalculator objects sharing a registry
+        @type  dtype: numpy dtype
+        @param dtype: type of the float columns
+
+        @rtype:  LinkBudgetTable
+        @return: new table, with the inputs of the calculators
+
+        """
+        rows = [batch.columns_from_calculator(calculator) for calculator in calculators]
+        ureg = calculators[0]._ureg if calculators else None
+        table = cls(ureg, len(rows), dtype)
+        for name in batch.INPUT_UNITS:
+            table._columns[name][:] = [row[name] for row in rows]
+        return table
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        """
+        Return a row view, or a column array when indexed by name
+        """
+        if isinstance(index, str):
+            return self._columns[index]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('row %d out of range' % index)
+        return LinkBudgetRow(self, index)
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield LinkBudgetRow(self, index)
+
+    # ---------------- nbytes ----------------
+    @property
+    def nbytes(self):
+        """
+        Get the memory used by the columns
+
+        @rtype:  int
+        @return: bytes held by the column arrays
+
+        """
+        return sum(column.nbytes for column in self._columns.values())
+
+    # --------------------------------------------------
+    # ----------------    functions     ----------------
+    # --------------------------------------------------
+
+    def units(self, name):
+        """
+        Return the units of a column
+
+        @type  name: string
+        @param name: column name
+
+        @rtype:  string
+        @return: pint unit name, 'dB' or 'dBm'
+
+        """
+        if name in batch.INPUT_UNITS:
+            return batch.INPUT_UNITS[name]
+        return batch.OUTPUT_UNITS[name]
+
+    def columns(self):
+        """
+        Return the input columns, ready for batch.evaluate()
+
+        @rtype:  dict
+        @return: input name to array
+
+        """
+        return dict((name, self._columns[name]) for name in batch.INPUT_UNITS)
+
+    def evaluate(self):
+        """
+        Update every intermediate and output column from the inputs
+        """
+        results = batch.evaluate(self.columns())
+        for name, values in results.items():
+            if name in self._columns:
+                self._columns[name][:] = values
+
+
+def _quantity_property(name, units, settable):
+    def getter(self):
+        value = self._table._columns[name][self._index]
+        if units in DECIBEL_UNITS:
+            return float(value)
+        return self._table._ureg.Quantity(float(value), units)
+
+    def setter(self, value):
+        self._table._columns[name][self._index] = to_magnitude(value, units, name)
+
+    doc = 'Get the %s in %s' % (name, units)
+    return property(getter, setter if settable else None, doc=doc)
+
+
+class LinkBudgetRow():
+    """
+    Lightweight view of one row of a LinkBudgetTable
+
+    Offers the property names of LinkBudgetCalculator: inputs can be read
+    and changed, intermediates and outputs read after LinkBudgetTable's
+    evaluate function has run. Values are stored in the table, the view only
+    holds the table and the row index.
+
+    """
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        """
+        LinkBudgetRow Constructor
+
+        @type  table: LinkBudgetTable
+        @param table: table holding the row
+        @type  index: int
+        @param index: row index
+
+        """
+        self._table = table
+        self._index = index
+
+    # ---------------- is_valid ----------------
+    @property
+    def is_valid(self):
+        """
+        Get the is_valid flag set by the table's evaluate function
+
+        @rtype:  bool
+        @return: validity of output variables
+
+        """
+        return bool(self._table._columns['is_valid'][self._index])
+
+    # ---------------- invalid_reasons ----------------
+    @property
+    def invalid_reasons(self):
+        """
+        Get the messages of the validation rules broken by this row
+
+        @rtype:  list
+        @return: messages, empty when the row is valid
+
+        """
+        return validation.describe(self._table._columns['invalid_reasons'][self._index])
+
+
+for _name, _units in batch.INPUT_UNITS.items():
+    setattr(LinkBudgetRow, _name, _quantity_property(_name, _units, True))
+for _name, _units in batch.OUTPUT_UNITS.items():
+    setattr(LinkBudgetRow, _name, _quantity_property(_name, _units, False))
+del _name, _units
@@ -0,0 +1,64 @@
+import numpy as np
+
+# units of values that are carried as plain numbers instead of pint quantities
+DECIBEL_UNITS = ('dB', 'dBm')
+
+# conversion factors already checked, keyed by (pint unit name, target units),
+# names are used since units of different registries do not compare
+_FACTORS = {}
+
+
+def conversion_factor(value_units, units, name):
+    """
+    Return the factor converting magnitudes from pint units to other units
+
+    The dimensionality check and the conversion run once per pair of units,
+    later calls for the same pair are a dictionary lookup.
+
+    @type  value_units: pint Unit
+    @param value_units: units of the magnitudes to convert
+    @type  units: string
+    @param units: pint unit name to convert to
+    @type  name: string
+    @param name: name of the value, used in error messages
+
+    @rtype:  float
+    @return: factor multiplying magnitudes in value_units
+
+    """
+    key = (str(value_units), units)
+    factor = _FACTORS.get(key)
+    if factor is None:
+        unit_quantity = 1.0 * value_units
+        if not unit_quantity.check(units):
+            raise TypeError('%s expected Pint quantity in %s, received %s' % (name, units, str(value_units)))
+        factor = float(unit_quantity.to(units).magnitude)
+        _FACTORS[key] = factor
+    return factor
+
+
+def to_magnitude(value, units, name):
+    """
+    Convert a value to a float magnitude in the given units
+
+    Pint quantities (scalar or array) are converted to the given units, plain
+    numbers and arrays are assumed to already be expressed in those units.
+
+    @type  value: pint quantity, number or array
+    @param value: value to convert
+    @type  units: string
+    @param units: pint unit name, or one of DECIBEL_UNITS for plain numbers
+    @type  name: string
+    @param name: name of the value, used in error messages
+
+    @rtype:  float or numpy array
+    @return: magnitude of value in the given units
+
+    """
+    if hasattr(value, 'magnitude'):
+        if units in DECIBEL_UNITS:
+            raise TypeError('%s expected a number in %s, received %s' % (name, units, str(value)))
+        value = value.magnitude * conversion_factor(value.units, units, name)
+    if np.ndim(value) == 0:
+        return float(value)
+    return np.asarray(value, dtype=float)
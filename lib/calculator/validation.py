@@ -0,0 +1,143 @@
+import numpy as np
+
+# rules checked by LinkBudgetCalculator.run(), in the order it checks them:
+# (input name, comparison making the input invalid, message)
+RULES = (
+    ('downlink_frequency',      '<=', 'Invalid Frequency'),
+    ('altitude_satellite',      '<=', 'Invalid Satellite Altitude'),
+    ('orbit_elevation_angle',   '<=', 'Invalid elevation angle'),
+    ('system_noise_figure',     '<',  'System Noise Figure is negative'),
+    ('atmospheric_loss',        '>',  'Atmospheric Loss is positive'),
+    ('implementation_loss',     '>',  'Implementation loss is positive'),
+    ('polarization_losses',     '>',  'Polarization Loss is positive'),
+    ('receiving_pointing_loss', '>',  'Receive Pointing Loss is positive'),
+    ('transmit_losses',         '>',  'Transmit Loss is positive'),
+    ('transmit_pointing_loss',  '>',  'Transmit Pointing Loss is positive'),
+    ('noise_bandwidth',         '<=', 'Noise Bandwidth is negative'),
+)
+
+# inputs that only matter when the link distance comes from the ground
+# station geometry
+GEOMETRY_INPUTS = ('altitude_satellite', 'orbit_elevation_angle')
+
+# reason code of each rule, one bit per rule
+REASON_CODES = dict((message, 1 << index) for index, (_, _, message) in enumerate(RULES))
+
+# reasons checked by the vectorized engine only, run() raises other errors
+# or none for these
+NOT_A_NUMBER = 1 << len(RULES)
+INVALID_TRANSMIT_POWER = 1 << (len(RULES) + 1)
+INVALID_LINK_DISTANCE = 1 << (len(RULES) + 2)
+INVALID_GEOMETRY = 1 << (len(RULES) + 3)
+
+REASON_MESSAGES = dict((code, message) for message, code in REASON_CODES.items())
+REASON_MESSAGES[NOT_A_NUMBER] = 'Input is not a number'
+REASON_MESSAGES[INVALID_TRANSMIT_POWER] = 'Invalid Transmit Power'
+REASON_MESSAGES[INVALID_LINK_DISTANCE] = 'Invalid Link Distance'
+REASON_MESSAGES[INVALID_GEOMETRY] = 'Satellite Altitude not above Ground Station'
+
+_COMPARISONS = {
+    '<=': lambda value: value <= 0,
+    '<':  lambda value: value < 0,
+    '>':  lambda value: value > 0,
+}
+
+
+def first_error(values):
+    """
+    Return the message of the first rule broken by one link budget
+
+    @type  values: dict or object
+    @param values: input name to number, or object with input attributes
+
+    @rtype:  string
+    @return: message of the first broken rule, None when all rules pass
+
+    """
+    if isinstance(values, dict):
+        get = values.__getitem__
+    else:
+        get = values.__getattribute__
+    for name, comparison, message in RULES:
+        if _COMPARISONS[comparison](get(name)):
+            return message
+    return None
+
+
+def validate(values, link_distance=None):
+    """
+    Check every rule of LinkBudgetCalculator.run() over whole columns
+
+    @type  values: dict
+    @param values: input name to numpy array, all of the same shape, in the
+                   units of batch.INPUT_UNITS
+    @type  link_distance: numpy array
+    @param link_distance: link distance in meters when it does not come from
+                          the ground station geometry, the geometry inputs
+                          are then not checked
+
+    @rtype:  tuple
+    @return: (boolean validity mask, uint32 array of OR-ed reason codes)
+
+    """
+    shape = np.shape(next(iter(values.values())))
+    reasons = np.zeros(shape, dtype=np.uint32)
+    with np.errstate(invalid='ignore'):
+        for name, comparison, message in RULES:
+            if name in GEOMETRY_INPUTS:
+                continue
+            reasons[_COMPARISONS[comparison](values[name])] |= REASON_CODES[message]
+        for name, value in values.items():
+            if name in GEOMETRY_INPUTS:
+                continue
+            reasons[np.isnan(value)] |= NOT_A_NUMBER
+        reasons[~(values['transmit_power'] > 0)] |= INVALID_TRANSMIT_POWER
+        if link_distance is None:
+            reasons |= validate_geometry(values)
+        else:
+            reasons[~((link_distance > 0) & np.isfinite(link_distance))] |= INVALID_LINK_DISTANCE
+    return reasons == 0, reasons
+
+
+def validate_geometry(values):
+    """
+    Check the rules on GEOMETRY_INPUTS over whole columns, and that the
+    satellite is above the ground station
+
+    @type  values: dict
+    @param values: GEOMETRY_INPUTS and altitude_ground_station names to
+                   numpy array, in the units of batch.INPUT_UNITS
+
+    @rtype:  numpy array
+    @return: uint32 array of OR-ed reason codes, with the broadcast shape of
+             the values
+
+    """
+    names = GEOMETRY_INPUTS + ('altitude_ground_station',)
+    shape = np.broadcast_shapes(*[np.shape(values[name]) for name in names])
+    reasons = np.zeros(shape, dtype=np.uint32)
+    with np.errstate(invalid='ignore'):
+        for name, comparison, message in RULES:
+            if name in GEOMETRY_INPUTS:
+                value = np.broadcast_to(values[name], shape)
+                reasons[_COMPARISONS[comparison](value)] |= REASON_CODES[message]
+                reasons[np.isnan(value)] |= NOT_A_NUMBER
+        # no slant range reaches a satellite below the station
+        below = np.logical_not(np.greater(values['altitude_satellite'], values['altitude_ground_station']))
+        reasons |= np.where(below, np.uint32(INVALID_GEOMETRY), np.uint32(0))
+    return reasons
+
+
+def describe(reasons):
+    """
+    Return the messages of a reason code
+
+    @type  reasons: int
+    @param reasons: OR-ed reason codes of one row
+
+    @rtype:  list
+    @return: messages, in rule order
+
+    """
+    reasons = int(reasons)
+    return [message for code, message in sorted(REASON_MESSAGES.items()) if reasons & code]
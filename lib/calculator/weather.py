@@ -0,0 +1,258 @@
+import csv
+import math
+import numpy as np
+
+from .store import ResultStore
+from .units import to_magnitude
+from .ephemeris import parse_epochs
+
+# default number of archive rows read at once
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# weather columns of an archive store and their units
+WEATHER_COLUMNS = {
+    'temperature':       'degC',
+    'relative_humidity': 'percent',
+    'rain_rate':         'millimeter / hour',
+}
+
+# height of the top of the rain layer above sea level, in meters
+DEFAULT_RAIN_HEIGHT = 3000.0
+
+# equivalent heights of oxygen and water vapour, in meters
+OXYGEN_HEIGHT = 6000.0
+WATER_VAPOUR_HEIGHT = 2100.0
+
+# frequency in Hertz from which the gas attenuation model does not hold,
+# the oxygen absorption lines start at 54 GHz
+MAXIMUM_GAS_FREQUENCY = 54e9
+
+# elevation in degrees below which paths are held at their length there,
+# the flat layer approximation does not hold closer to the horizon
+MINIMUM_PATH_ELEVATION = 5.0
+
+
+def import_csv(stream, path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Convert a weather archive in CSV form into a store on disk
+
+    The first row names the columns: time, as POSIX seconds or UTC ISO 8601
+    dates, and any of WEATHER_COLUMNS in their units; missing columns are
+    zero. Every row must have a field per column. Rows are read and
+    appended chunk_size at a time, so archives of any length are converted
+    in bounded memory.
+
+    @type  stream: file
+    @param stream: text stream of the archive, rows in increasing time
+    @type  path: string
+    @param path: store directory
+    @type  chunk_size: int
+    @param chunk_size: largest number of rows held at once
+
+    @rtype:  ResultStore
+    @return: store opened read only, columns of WEATHER_COLUMNS along a
+             time axis in POSIX seconds
+
+    """
+    reader = csv.reader(stream)
+    names = [name.strip() for name in next(reader)]
+    if 'time' not in names:
+        raise ValueError('Weather archive has no time column')
+    unknown = set(names) - set(WEATHER_COLUMNS) - {'time'}
+    if unknown:
+        raise ValueError('Unknown weather columns: %s' % ', '.join(sorted(unknown)))
+
+    store = ResultStore.create(path, [('time', [], 'second')], columns=WEATHER_COLUMNS)
+    last = -np.inf
+    rows = []
+    for row in reader:
+        if row:
+            if len(row) != len(names):
+                raise ValueError('Weather archive line %d has %d fields, expected %d'
+                                 % (reader.line_num, len(row), len(names)))
+            rows.append(row)
+        if len(rows) >= chunk_size:
+            last = _append(store, names, rows, last)
+            rows = []
+    if rows:
+        _append(store, names, rows, last)
+    store.close()
+    return ResultStore.open(path)
+
+
+def _append(store, names, rows, last):
+    """
+    Append parsed rows to an archive store, returns the last time
+    """
+    fields = dict(zip(names, zip(*rows)))
+    try:
+        times = np.array(fields['time'], dtype=float)
+    except ValueError:
+        times = parse_epochs([field.strip() for field in fields['time']])
+    if not (np.diff(times) > 0).all() or times[0] <= last:
+        raise ValueError('Weather archive times are not increasing')
+    store.append(dict((name, np.array(values, dtype=float)) for name, values in fields.items()
+                      if name != 'time'), times)
+    return times[-1]
+
+
+def interpolate(store, times):
+    """
+    Weather of an archive at the samples of a time grid
+
+    Only the archive rows around the grid are read from the memory maps.
+
+    @type  store: ResultStore
+    @param store: archive from import_csv()
+    @type  times: numpy array
+    @param times: POSIX UTC seconds, increasing
+
+    @rtype:  dict
+    @return: WEATHER_COLUMNS name to values at the times, linearly
+             interpolated, NaN outside the archive
+
+    """
+    times = np.asarray(times, dtype=float)
+    axis = store.axis('time')
+    if len(axis) == 0 or len(times) == 0:
+        return dict((name, np.full(times.shape, np.nan)) for name in WEATHER_COLUMNS)
+    first = max(int(np.searchsorted(axis, times[0], side='right')) - 1, 0)
+    last = min(int(np.searchsorted(axis, times[-1], side='left')) + 1, len(axis))
+    samples = np.array(axis[first:last])
+    index = np.clip(np.searchsorted(samples, times, side='right') - 1, 0, max(len(samples) - 2, 0))
+    if len(samples) > 1:
+        fraction = (times - samples[index]) / (samples[index + 1] - samples[index])
+        following = index + 1
+    else:
+        fraction = np.zeros(times.shape)
+        following = index
+    outside = (times < axis[0]) | (times > axis[-1])
+    weather = {}
+    for name in WEATHER_COLUMNS:
+        values = np.array(store[name][first:last], dtype=float)
+        weather[name] = np.where(outside, np.nan,
+                                 values[index] + fraction * (values[following] - values[index]))
+    return weather
+
+
+def water_vapour_density(temperature, relative_humidity):
+    """
+    Water vapour density near the ground
+
+    @type  temperature: number or array (degrees Celsius)
+    @param temperature: air temperature
+    @type  relative_humidity: number or array (percent)
+    @param relative_humidity: relative humidity
+
+    @rtype:  numpy array
+    @return: water vapour density in grams per cubic meter
+
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    saturation = 6.1121 * np.exp(17.502 * temperature / (temperature + 240.97))
+    return 216.7 * (np.asarray(relative_humidity, dtype=float) / 100.0) * saturation / (temperature + 273.15)
+
+
+def gas_attenuation(frequency, water_vapour):
+    """
+    Zenith attenuation of oxygen and water vapour, below 54 GHz
+
+    @type  frequency: pint frequency or array (Hertz)
+    @param frequency: carrier frequency, below MAXIMUM_GAS_FREQUENCY
+    @type  water_vapour: number or array (grams per cubic meter)
+    @param water_vapour: water vapour density near the ground
+
+    @rtype:  numpy array
+    @return: zenith attenuation in dB (positive)
+
+    """
+    f = to_magnitude(frequency, 'hertz', 'frequency')
+    if np.any(f >= MAXIMUM_GAS_FREQUENCY):
+        raise ValueError('Gas attenuation is modelled below %g GHz' % (MAXIMUM_GAS_FREQUENCY / 1e9))
+    f = f / 1e9
+    oxygen = (7.2 / (f * f + 0.34) + 0.62 / ((54.0 - f) ** 1.16 + 0.83)) * f * f * 1e-3
+    vapour = (0.067 + 3.0 / ((f - 22.3) ** 2 + 7.3)) * f * f * np.asarray(water_vapour, dtype=float) * 1e-4
+    return (oxygen * OXYGEN_HEIGHT + vapour * WATER_VAPOUR_HEIGHT) / 1000.0
+
+
+def rain_specific_attenuation(frequency, rain_rate):
+    """
+    Specific attenuation of rain, k R^alpha
+
+    With f in GHz, k = 4.21e-5 f^2.42 up to 54 GHz and 4.09e-2 f^0.699
+    above; alpha = 1.41 f^-0.0779 up to 25 GHz and 2.63 f^-0.272 above. The
+    fits cover 2.9 to 164 GHz, alpha of the 8.5 to 25 GHz band is extended
+    below 8.5 GHz, where rain attenuation is small.
+
+    @type  frequency: pint frequency or array (Hertz)
+    @param frequency: carrier frequency
+    @type  rain_rate: number or array (millimeters per hour)
+    @param rain_rate: rain rate
+
+    @rtype:  numpy array
+    @return: attenuation in dB per kilometer (positive)
+
+    """
+    f = to_magnitude(frequency, 'hertz', 'frequency') / 1e9
+    k = np.where(f < 54.0, 4.21e-5 * f ** 2.42, 4.09e-2 * f ** 0.699)
+    alpha = np.where(f < 25.0, 1.41 * f ** -0.0779, 2.63 * f ** -0.272)
+    return k * np.maximum(np.asarray(rain_rate, dtype=float), 0.0) ** alpha
+
+
+def atmospheric_loss(weather, frequency, elevation, altitude_ground_station=0.0,
+                     rain_height=DEFAULT_RAIN_HEIGHT):
+    """
+    Gas and rain loss along the slant path of each sample
+
+    @type  weather: dict
+    @param weather: WEATHER_COLUMNS name to values, e.g. from interpolate()
+    @type  frequency: pint frequency or array (Hertz)
+    @param frequency: carrier frequency
+    @type  elevation: pint angle or array (degrees)
+    @param elevation: elevation of the satellite at each sample
+    @type  altitude_ground_station: pint length or number (meters)
+    @param altitude_ground_station: altitude of the ground station
+    @type  rain_height: pint length or number (meters)
+    @param rain_height: height of the top of the rain layer
+
+    @rtype:  numpy array
+    @return: loss in dB (negative), as taken by atmospheric_loss, NaN where
+             the weather is unknown
+
+    """
+    elevation = np.maximum(to_magnitude(elevation, 'degree', 'elevation'), MINIMUM_PATH_ELEVATION)
+    path = 1.0 / np.sin(np.radians(elevation))
+    altitude = to_magnitude(altitude_ground_station, 'meter', 'altitude_ground_station')
+    rain_path = np.maximum(to_magnitude(rain_height, 'meter', 'rain_height') - altitude, 0.0) * path / 1000.0
+    density = water_vapour_density(weather['temperature'], weather['relative_humidity'])
+    # gases thin out above the station with the oxygen scale height
+    gas = gas_attenuation(frequency, density) * math.exp(-altitude / OXYGEN_HEIGHT) * path
+    rain = rain_specific_attenuation(frequency, weather['rain_rate']) * rain_path
+    return -(gas + rain)
+
+
+def pass_losses(store, times, frequency, elevation, altitude_ground_station=0.0,
+                rain_height=DEFAULT_RAIN_HEIGHT):
+    """
+    Per sample atmospheric losses of a pass from a weather archive
+
+    @type  store: ResultStore
+    @param store: archive from import_csv()
+    @type  times: numpy array
+    @param times: POSIX UTC seconds of the samples, increasing
+    @type  frequency: pint frequency or array (Hertz)
+    @param frequency: carrier frequency
+    @type  elevation: pint angle or array (degrees)
+    @param elevation: elevation of the satellite at the times
+    @type  altitude_ground_station: pint length or number (meters)
+    @param altitude_ground_station: altitude of the ground station
+    @type  rain_height: pint length or number (meters)
+    @param rain_height: height of the top of the rain layer
+
+    @rtype:  numpy array
+    @return: atmospheric_loss column in dB (negative) for batch.evaluate(),
+             NaN outside the archive
+
+    """
+    return atmospheric_loss(interpolate(store, times), frequency, elevation, altitude_ground_station,
+                            rain_height)
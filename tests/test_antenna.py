@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import antenna, batch
+
+class TestAntenna(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+
+    def test_beamwidth(self):
+        # 3 m dish at 2.2 GHz
+        width = antenna.beamwidth(3 * self.ureg.meter, 2.2 * self.ureg.gigahertz)
+        self.assertAlmostEqual(float(width), 70.0 * batch.SPEED_OF_LIGHT / 2.2e9 / 3.0)
+        np.testing.assert_allclose(antenna.beamwidth([1.5, 3.0], 2.2e9), [2 * width, width])
+
+    def test_pointing_loss(self):
+        self.assertAlmostEqual(float(antenna.pointing_loss(1.0, 2.0)), -3.0)
+        self.assertAlmostEqual(float(antenna.pointing_loss(2.0 * self.ureg.degree, 2.0)), -12.0)
+        self.assertAlmostEqual(float(antenna.mean_pointing_loss(2.0, bias=1.0)), -3.0)
+        self.assertEqual(float(antenna.mean_pointing_loss(2.0)), 0.0)
+
+    def test_sampled_loss_matches_mean(self):
+        rng = np.random.default_rng(3)
+        losses = antenna.sample_pointing_loss(2.0, bias=0.3, sigma=0.4, size=200000, rng=rng)
+        self.assertEqual(losses.shape, (200000,))
+        self.assertTrue((losses <= 0).all())
+        mean = 10 * np.log10(np.mean(10 ** (losses / 10)))
+        self.assertAlmostEqual(mean, float(antenna.mean_pointing_loss(2.0, bias=0.3, sigma=0.4)), places=2)
+
+        widths = np.array([1.0, 2.0, 4.0])
+        losses = antenna.sample_pointing_loss(widths[:, np.newaxis], sigma=0.2, size=(3, 1000), rng=rng)
+        self.assertTrue((losses.mean(axis=1)[:-1] < losses.mean(axis=1)[1:]).all())
+
+    def test_feeds_batch(self):
+        tc_data = self.test_case_dataset[0]
+        lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(lb_calc, name, getattr(tc_data, name))
+        columns = batch.columns_from_calculator(lb_calc)
+        losses = antenna.sample_pointing_loss(3.0, sigma=0.5, size=1000, rng=np.random.default_rng(5))
+        columns['receiving_pointing_loss'] = losses
+        results = batch.evaluate(columns)
+        self.assertTrue(results['is_valid'].all())
+        np.testing.assert_allclose(results['link_margin'] - losses,
+                                   batch.evaluate(dict(columns, receiving_pointing_loss=0.0))['link_margin'])
+
+if __name__ == '__main__':
+    unittest.main()
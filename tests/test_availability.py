@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+from lib.calculator.availability import AvailabilityStatistics
+
+def brute_force_outages(margins):
+    # lengths of the runs of negative in-view margins, per row
+    lengths = []
+    for row in np.atleast_2d(margins):
+        run = 0
+        for value in row:
+            if value < 0:
+                run += 1
+            else:
+                if run:
+                    lengths.append(run)
+                run = 0
+        if run:
+            lengths.append(run)
+    values, counts = np.unique(lengths, return_counts=True)
+    return values, counts
+
+class TestAvailabilityStatistics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        # slowly varying margins with out of view gaps
+        self.margins = np.cumsum(rng.normal(0.0, 0.5, (3, 5000)), axis=1) % 20.0 - 4.0
+        self.margins[:, 1200:1300] = np.nan
+        self.margins[1, :40] = -1.0
+
+    def test_matches_exact_statistics(self):
+        statistics = AvailabilityStatistics(step=2.0)
+        for start in range(0, 5000, 333):
+            statistics.update(self.margins[:, start:start + 333])
+        values = self.margins[~np.isnan(self.margins)]
+        self.assertEqual(statistics.count, len(values))
+        self.assertAlmostEqual(statistics.availability, np.mean(values >= 0))
+        self.assertAlmostEqual(statistics.mean, values.mean())
+        self.assertEqual(statistics.minimum, values.min())
+        q = np.array([0.0, 0.01, 0.05, 0.5, 0.95, 1.0])
+        np.testing.assert_allclose(statistics.quantile(q), np.quantile(values, q),
+                                   atol=statistics.error_bound)
+
+        durations, counts = statistics.outage_durations()
+        lengths, expected = brute_force_outages(self.margins)
+        np.testing.assert_array_equal(durations, 2.0 * lengths)
+        np.testing.assert_array_equal(counts, expected)
+
+    def test_merge_is_exact(self):
+        # workers split in time, one of them inside an outage
+        self.margins[0, 2000:2600] = -2.0
+        whole = AvailabilityStatistics()
+        whole.update(self.margins)
+        parts = []
+        for start, stop in ((0, 2100), (2100, 2300), (2300, 5000)):
+            part = AvailabilityStatistics()
+            part.update(self.margins[:, start:stop])
+            parts.append(part)
+        merged = AvailabilityStatistics()
+        for part in parts:
+            merged.merge(part)
+        for name in ('count', 'availability', 'minimum', 'maximum'):
+            self.assertEqual(getattr(merged, name), getattr(whole, name))
+        np.testing.assert_array_equal(merged.histogram[0], whole.histogram[0])
+        for merged_part, whole_part in zip(merged.outage_durations(), whole.outage_durations()):
+            np.testing.assert_array_equal(merged_part, whole_part)
+
+        # workers split by stream
+        by_stream = AvailabilityStatistics()
+        for row in self.margins:
+            part = AvailabilityStatistics()
+            part.update(row)
+            by_stream.merge(part, sequential=False)
+        for merged_part, whole_part in zip(by_stream.outage_durations(), whole.outage_durations()):
+            np.testing.assert_array_equal(merged_part, whole_part)
+
+    def test_rejects_mismatches(self):
+        statistics = AvailabilityStatistics()
+        statistics.update(np.zeros((2, 10)))
+        with self.assertRaises(ValueError):
+            statistics.update(np.zeros((3, 10)))
+        with self.assertRaises(ValueError):
+            statistics.merge(AvailabilityStatistics(resolution=0.1))
+        self.assertTrue(np.isnan(AvailabilityStatistics().quantile(0.5)))
+
+if __name__ == '__main__':
+    unittest.main()
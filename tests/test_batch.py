@@ -0,0 +1,65 @@
+import unittest
+import pint
+import numpy as np
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, geometry
+
+class TestBatch(unittest.TestCase):
+
+    VALID_CASES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 13)
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+
+    def _calculator(self, item_number):
+        tc_data = self.test_case_dataset[item_number]
+        lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(lb_calc, name, getattr(tc_data, name))
+        return lb_calc
+
+    def test_matches_run(self):
+        calculators = [self._calculator(index) for index in self.VALID_CASES]
+        rows = [batch.columns_from_calculator(lb_calc) for lb_calc in calculators]
+        columns = dict((name, np.array([row[name] for row in rows])) for name in batch.INPUT_UNITS)
+        results = batch.evaluate(columns)
+        self.assertTrue(results['is_valid'].all())
+        for index, lb_calc in enumerate(calculators):
+            lb_calc.run()
+            self.assertAlmostEqual(results['downlink_wavelength'][index], lb_calc.downlink_wavelength.to('meter').magnitude)
+            self.assertAlmostEqual(results['link_distance'][index], lb_calc.link_distance.to('meter').magnitude, 3)
+            for name in ('required_ebno', 'transmit_power_dBm', 'transmit_eirp', 'downlink_path_loss',
+                         'received_power', 'minimum_detectable_signal', 'energy_noise_ratio', 'link_margin'):
+                self.assertAlmostEqual(results[name][index], getattr(lb_calc, name), 6)
+
+    def test_broadcast_scalars(self):
+        columns = batch.columns_from_calculator(self._calculator(0))
+        columns['orbit_elevation_angle'] = np.array([5.0, 25.0, 90.0])
+        results = batch.evaluate(columns)
+        self.assertEqual(results['link_margin'].shape, (3,))
+        self.assertTrue(np.all(np.diff(results['link_margin']) > 0))
+
+    def test_link_distance_from_positions(self):
+        columns = batch.columns_from_calculator(self._calculator(0))
+        a = np.zeros((2, 3))
+        b = np.array([[1700e3, 0.0, 0.0], [3400e3, 0.0, 0.0]])
+        results = batch.evaluate(columns, link_distance=geometry.slant_range(a, b))
+        np.testing.assert_allclose(results['link_distance'], [1700e3, 3400e3])
+        self.assertAlmostEqual(results['downlink_path_loss'][0] - results['downlink_path_loss'][1],
+                               20 * np.log10(2), 9)
+
+    def test_pint_columns(self):
+        columns = {'downlink_frequency': 137.5 * self.ureg.megahertz,
+                   'transmit_power': 5 * self.ureg.watt,
+                   'noise_bandwidth': np.array([34.0, 68.0]) * self.ureg.kilohertz}
+        results = batch.evaluate(columns, link_distance=1700 * self.ureg.kilometer)
+        self.assertAlmostEqual(results['downlink_wavelength'][0], 2.18, 2)
+        self.assertAlmostEqual(results['minimum_detectable_signal'][1] - results['minimum_detectable_signal'][0],
+                               10 * np.log10(2), 9)
+        with self.assertRaises(TypeError):
+            batch.evaluate({'downlink_frequency': 137.5 * self.ureg.meter})
+
+if __name__ == '__main__':
+    unittest.main()
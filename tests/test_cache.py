@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pint
+import numpy as np
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, cache
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite')
+        tc_data = self.test_case_dataset[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_key_is_unit_independent(self):
+        key = cache.calculator_key(self.lb_calc)
+        self.lb_calc.downlink_frequency = 0.1375 * self.ureg.gigahertz
+        self.lb_calc.altitude_satellite = 860000 * self.ureg.meter
+        self.assertEqual(cache.calculator_key(self.lb_calc), key)
+        self.lb_calc.downlink_frequency = 138 * self.ureg.megahertz
+        self.assertNotEqual(cache.calculator_key(self.lb_calc), key)
+
+    def test_evaluate_reuses_results(self):
+        columns = batch.columns_from_calculator(self.lb_calc)
+        columns['orbit_elevation_angle'] = np.array([5.0, 25.0, 25.0, 90.0])
+        expected = batch.evaluate(columns)
+        with cache.ResultCache(self.path) as result_cache:
+            results = result_cache.evaluate(columns)
+            # the repeated scenario is evaluated and counted once
+            self.assertEqual(result_cache.misses, 3)
+            self.assertEqual(result_cache.hits, 0)
+            result_cache.evaluate(columns)
+            self.assertEqual(result_cache.misses, 3)
+            self.assertEqual(result_cache.hits, 3)
+        for name in cache.RESULT_FIELDS:
+            np.testing.assert_array_equal(results[name], expected[name])
+
+        # a new process sees the stored results
+        with cache.ResultCache(self.path) as result_cache:
+            columns['orbit_elevation_angle'] = np.array([[90.0, 45.0], [25.0, 5.0]])
+            results = result_cache.evaluate(columns)
+            self.assertEqual(result_cache.misses, 1)
+            self.assertEqual(result_cache.hits, 3)
+            self.assertEqual(results['link_margin'].shape, (2, 2))
+            np.testing.assert_array_equal(results['link_margin'], batch.evaluate(columns)['link_margin'])
+
+    def test_eviction(self):
+        columns = batch.columns_from_calculator(self.lb_calc)
+        with cache.ResultCache(self.path, max_bytes=512 * 1024) as result_cache:
+            for start in range(0, 20000, 2000):
+                columns['orbit_elevation_angle'] = np.arange(start, start + 2000) * 1e-3 + 1.0
+                result_cache.evaluate(columns)
+            self.assertLessEqual(result_cache.size, 512 * 1024)
+            self.assertLess(len(result_cache), 20000)
+            # the most recent entries survive
+            result_cache.hits = result_cache.misses = 0
+            result_cache.evaluate(columns)
+            self.assertEqual(result_cache.misses, 0)
+
+if __name__ == '__main__':
+    unittest.main()
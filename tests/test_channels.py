@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, channels, validation
+
+class TestChannels(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+        # VHF APT, UHF telemetry, S-band and X-band payload
+        self.channels = {
+            'downlink_frequency': [137.1e6, 437.0e6, 2.2e9, 8.2e9],
+            'noise_bandwidth': [34e3, 9.6e3, 1e6, 50e6],
+            'power_offset': [0.0, -3.0, 0.0, 3.0],
+            'receive_gain_offset': [0.0, 6.0, 20.0, 30.0],
+        }
+
+    def test_matches_batch_per_channel(self):
+        columns = batch.columns_from_calculator(self.lb_calc)
+        columns['orbit_elevation_angle'] = np.array([5.0, 30.0, 90.0])
+        results = channels.evaluate(columns, self.channels)
+        self.assertEqual(results['link_margin'].shape, (3, 4))
+        for index in range(4):
+            single = dict(columns)
+            single['downlink_frequency'] = self.channels['downlink_frequency'][index]
+            single['noise_bandwidth'] = self.channels['noise_bandwidth'][index]
+            single['transmit_power'] = columns['transmit_power'] * 10 ** (self.channels['power_offset'][index] / 10)
+            single['receive_antenna_gain'] = (columns['receive_antenna_gain']
+                                              + self.channels['receive_gain_offset'][index])
+            expected = batch.evaluate(single)
+            for name in batch.OUTPUT_UNITS:
+                np.testing.assert_allclose(results[name][:, index], expected[name], rtol=1e-12)
+        np.testing.assert_array_equal(results['limiting_channel'], np.argmin(results['link_margin'], axis=-1))
+        np.testing.assert_allclose(results['limiting_margin'], results['link_margin'].min(axis=-1))
+
+    def test_invalid_channels_and_geometry(self):
+        columns = batch.columns_from_calculator(self.lb_calc)
+        columns['orbit_elevation_angle'] = np.array([-1.0, 30.0])
+        self.channels['noise_bandwidth'] = [34e3, 0.0, 1e6, 50e6]
+        results = channels.evaluate(columns, self.channels)
+        np.testing.assert_array_equal(results['is_valid'], [[False] * 4, [True, False, True, True]])
+        self.assertEqual(results['limiting_channel'][0], -1)
+        self.assertTrue(np.isnan(results['limiting_margin'][0]))
+        self.assertNotEqual(results['limiting_channel'][1], 1)
+        self.assertEqual(validation.describe(results['invalid_reasons'][0, 0]), ['Invalid elevation angle'])
+        self.assertEqual(validation.describe(results['invalid_reasons'][1, 1]), ['Noise Bandwidth is negative'])
+
+    def test_rejects_geometry_channels(self):
+        columns = batch.columns_from_calculator(self.lb_calc)
+        with self.assertRaises(ValueError):
+            channels.evaluate(columns, {'orbit_elevation_angle': [10.0, 20.0]})
+        with self.assertRaises(TypeError):
+            channels.evaluate(columns, {'bandwidth': [1e6]})
+
+if __name__ == '__main__':
+    unittest.main()
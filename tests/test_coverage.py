@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pint
+import numpy as np
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, coverage, geometry
+
+class TestCoverage(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        tc_data = LinkBudgetTestCaseDataset(self.ureg)[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+        self.directory = tempfile.mkdtemp()
+        self.latitudes = np.arange(-60.0, 60.0, 2.0)
+        self.longitudes = np.arange(-180.0, 180.0, 2.0)
+        self.satellite = geometry.geodetic_to_ecef(0.0, 0.0, 860e3)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_ground_coverage(self):
+        path = os.path.join(self.directory, 'ground.npy')
+        margin = coverage.ground_coverage(self.lb_calc, self.satellite, self.latitudes,
+                                          self.longitudes, path, tile_cells=1000)
+        self.assertEqual(margin.shape, (len(self.latitudes), len(self.longitudes)))
+        # best margin right below the satellite, nothing on the far side of the Earth
+        row, column = np.unravel_index(np.nanargmax(margin), margin.shape)
+        self.assertEqual((self.latitudes[row], self.longitudes[column]), (0.0, 0.0))
+        self.assertTrue(np.isnan(margin[len(self.latitudes) // 2, 0]))
+
+        # a single cell matches run()
+        row, column = 32, 95
+        station = geometry.geodetic_to_ecef(self.latitudes[row], self.longitudes[column], 400.0)
+        self.lb_calc.orbit_elevation_angle = geometry.elevation_angle(station, self.satellite) * self.ureg.degree
+        self.lb_calc.run()
+        self.assertAlmostEqual(margin[row, column], self.lb_calc.link_margin, 4)
+
+    def test_parallel_tiles_match_serial(self):
+        serial = coverage.sky_coverage(self.lb_calc, geometry.geodetic_to_ecef(10.0, 20.0, 400.0),
+                                       self.latitudes, self.longitudes,
+                                       os.path.join(self.directory, 'serial.npy'), tile_cells=5000)
+        parallel = coverage.sky_coverage(self.lb_calc, geometry.geodetic_to_ecef(10.0, 20.0, 400.0),
+                                         self.latitudes, self.longitudes,
+                                         os.path.join(self.directory, 'parallel.npy'), tile_cells=5000, jobs=2)
+        np.testing.assert_array_equal(serial, parallel)
+        self.assertTrue(np.isfinite(serial).any())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, doppler, geometry
+
+class TestDoppler(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+
+        # circular polar orbit passing over a station on the equator
+        self.radius = geometry.EARTH_RADIUS + 800e3
+        self.rate = np.sqrt(3.986004418e14 / self.radius ** 3)
+        self.times = 1.7e9 + np.arange(0.0, 6000.0, 1.0)
+        angle = self.rate * (self.times - self.times[0]) - np.pi / 2
+        self.positions = self.radius * np.stack([np.cos(angle), np.zeros_like(angle), np.sin(angle)], axis=-1)
+        self.velocities = self.radius * self.rate * np.stack([-np.sin(angle), np.zeros_like(angle), np.cos(angle)],
+                                                             axis=-1)
+        self.station = geometry.geodetic_to_ecef(0.0, 0.0, 0.0)
+
+    def test_range_rate(self):
+        distance, rate, _ = doppler.range_and_rate(self.station, self.positions, self.velocities)
+        np.testing.assert_allclose(rate[1:-1], np.gradient(distance, self.times)[1:-1], atol=1.0)
+        overhead = np.argmin(distance)
+        self.assertAlmostEqual(distance[overhead], 800e3, -2)
+        self.assertLess(rate[overhead - 10], 0)
+        self.assertGreater(rate[overhead + 10], 0)
+
+    def test_pass_profile(self):
+        profile = doppler.pass_profile(self.lb_calc, self.station, self.times, self.positions, self.velocities)
+        estimated = doppler.pass_profile(self.lb_calc, self.station, self.times, self.positions)
+        np.testing.assert_allclose(estimated['range_rate'][1:-1], profile['range_rate'][1:-1], atol=1.0)
+
+        frequency = self.lb_calc.downlink_frequency.to('hertz').magnitude
+        np.testing.assert_allclose(profile['doppler_shift'], -frequency * profile['range_rate'] / batch.SPEED_OF_LIGHT)
+        visible = profile['is_visible']
+        overhead = np.argmax(profile['elevation'])
+        self.assertAlmostEqual(profile['elevation'][overhead], 90.0, 0)
+        self.assertTrue(visible[overhead] and not visible.all())
+        self.assertTrue(np.all(np.isnan(profile['link_margin'][~visible])))
+        # approaching gives a positive shift falling fastest at closest approach
+        self.assertGreater(profile['doppler_shift'][overhead - 60], 0)
+        self.assertEqual(np.argmin(profile['doppler_rate'][visible]), np.flatnonzero(visible).tolist().index(overhead))
+
+        self.lb_calc.orbit_elevation_angle = 90 * self.ureg.degree
+        self.lb_calc.altitude_satellite = 800 * self.ureg.kilometer
+        self.lb_calc.run()
+        self.assertAlmostEqual(profile['link_margin'][overhead], self.lb_calc.link_margin, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator, DuplexLinkBudgetCalculator
+from lib.calculator import batch, duplex, validation
+
+class TestDuplex(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+
+    def configure(self, lb_calc, tc_data):
+        for name in batch.INPUT_UNITS:
+            setattr(lb_calc, name, getattr(tc_data, name))
+        for name, (downlink_name, _) in duplex.UPLINK_INPUTS.items():
+            setattr(lb_calc, name, getattr(tc_data, downlink_name))
+
+    def test_symmetric_link_matches_downlink(self):
+        for index in (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 13):
+            tc_data = self.test_case_dataset[index]
+            lb_calc = DuplexLinkBudgetCalculator(self.ureg)
+            self.configure(lb_calc, tc_data)
+            lb_calc.run()
+            self.assertTrue(lb_calc.uplink_is_valid)
+            self.assertAlmostEqual(lb_calc.uplink_link_margin, lb_calc.link_margin, places=9)
+            self.assertAlmostEqual(lb_calc.uplink_path_loss, lb_calc.downlink_path_loss, places=9)
+
+    def test_scalar_matches_vectorized(self):
+        tc_data = self.test_case_dataset[0]
+        lb_calc = DuplexLinkBudgetCalculator(self.ureg)
+        self.configure(lb_calc, tc_data)
+        lb_calc.uplink_frequency = 2.05 * self.ureg.gigahertz
+        lb_calc.uplink_transmit_power = 20 * self.ureg.watt
+        lb_calc.uplink_receive_antenna_gain = 3.0
+        lb_calc.run()
+
+        columns = batch.columns_from_calculator(lb_calc)
+        columns.update((name, getattr(lb_calc, name)) for name in duplex.UPLINK_INPUTS)
+        results = duplex.evaluate(columns)
+        self.assertTrue(results['is_valid'])
+        self.assertTrue(results['uplink_is_valid'])
+        self.assertAlmostEqual(float(results['link_margin']), lb_calc.link_margin, places=6)
+        self.assertAlmostEqual(float(results['uplink_link_margin']), lb_calc.uplink_link_margin, places=6)
+        self.assertAlmostEqual(float(results['uplink_wavelength']),
+                               lb_calc.uplink_wavelength.to('meter').magnitude, places=9)
+        self.assertNotAlmostEqual(lb_calc.uplink_link_margin, lb_calc.link_margin, places=3)
+
+    def test_directions_validated_separately(self):
+        lb_calc = LinkBudgetCalculator(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        for name in batch.INPUT_UNITS:
+            setattr(lb_calc, name, getattr(tc_data, name))
+        columns = batch.columns_from_calculator(lb_calc)
+        for name, (downlink_name, _) in duplex.UPLINK_INPUTS.items():
+            columns[name] = columns[downlink_name]
+        columns['uplink_noise_bandwidth'] = np.array([1e6, 0.0, 1e6, 1e6])
+        columns['orbit_elevation_angle'] = np.array([30.0, 30.0, -1.0, 90.0])
+        results = duplex.evaluate(columns)
+
+        np.testing.assert_array_equal(results['is_valid'], [True, True, False, True])
+        np.testing.assert_array_equal(results['uplink_is_valid'], [True, False, False, True])
+        self.assertEqual(validation.describe(results['uplink_invalid_reasons'][1]),
+                         ['Noise Bandwidth is negative'])
+        for reasons in (results['invalid_reasons'][2], results['uplink_invalid_reasons'][2]):
+            self.assertEqual(validation.describe(reasons), ['Invalid elevation angle'])
+        self.assertTrue(np.isnan(results['uplink_link_margin'][1]))
+        np.testing.assert_allclose(results['link_distance'][[0, 3]],
+                                   batch.evaluate(columns)['link_distance'][[0, 3]])
+
+    def test_invalid_uplink_input(self):
+        lb_calc = DuplexLinkBudgetCalculator(self.ureg)
+        with self.assertRaises(TypeError):
+            lb_calc.uplink_frequency = 2 * self.ureg.watt
+        with self.assertRaises(TypeError):
+            lb_calc.configure(uplink_transmit_power=2 * self.ureg.hertz)
+        lb_calc.configure(uplink_transmit_power=2 * self.ureg.watt, uplink_transmit_losses=-1.0)
+        self.assertEqual(lb_calc.uplink_transmit_power, 2 * self.ureg.watt)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import io
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, ephemeris, geometry, orbit
+
+class TestEphemeris(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+        self.elements = {'epoch': np.array([1.7e9]), 'semi_major_axis': np.array([7178137.0]),
+                         'eccentricity': np.array([0.001]), 'inclination': np.array([51.6]),
+                         'raan': np.array([20.0]), 'argument_of_perigee': np.array([0.0]),
+                         'mean_anomaly': np.array([0.0])}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _oem(self, times, frame='TEME'):
+        positions, velocities = orbit.propagate(self.elements, times)
+        lines = ['CCSDS_OEM_VERS = 2.0', 'CREATION_DATE = 2023-11-14T00:00:00', 'ORIGINATOR = TEST']
+        # two segments, the second one starting where the first one stops
+        half = len(times) // 2
+        for segment in (slice(0, half + 1), slice(half, len(times))):
+            lines += ['META_START', 'OBJECT_NAME = SAT', 'CENTER_NAME = EARTH', 'REF_FRAME = %s' % frame,
+                      'TIME_SYSTEM = UTC', 'META_STOP', 'COMMENT states in km and km/s']
+            for time, position, velocity in zip(times[segment], positions[0, segment], velocities[0, segment]):
+                stamp = np.datetime64(int(round(time * 1000)), 'ms')
+                lines.append('%s %s' % (stamp, ' '.join('%.9f' % value for value in np.concatenate(
+                    [position, velocity]) / 1000.0)))
+            lines += ['COVARIANCE_START', 'EPOCH = 2023-11-14T22:13:20', '1.0', 'COVARIANCE_STOP']
+        return '\n'.join(lines) + '\n'
+
+    def test_parse_epochs(self):
+        np.testing.assert_allclose(ephemeris.parse_epochs(['2023-11-14T22:13:20.5', '2023-11-14T22:13:21Z']),
+                                   [1.7e9 + 0.5, 1.7e9 + 1])
+        np.testing.assert_allclose(ephemeris.parse_epochs(['2023-318T22:13:20.5']), [1.7e9 + 0.5])
+        with self.assertRaises(ValueError):
+            ephemeris.parse_epochs(['yesterday'])
+
+    def test_read_and_resample(self):
+        times = 1.7e9 + np.arange(0.0, 3600.0, 60.0)
+        chunks = list(ephemeris.read_oem(io.StringIO(self._oem(times)), chunk_size=7))
+        self.assertTrue(all(len(chunk[1]) <= 7 for chunk in chunks))
+        self.assertEqual(sum(len(chunk[1]) for chunk in chunks), len(times) + 1)
+
+        resampled = list(ephemeris.resample(chunks, 10.0))
+        grid = np.concatenate([chunk[1] for chunk in resampled])
+        np.testing.assert_allclose(grid, 1.7e9 + np.arange(0.0, 3541.0, 10.0))
+        positions = np.concatenate([chunk[2] for chunk in resampled])
+        velocities = np.concatenate([chunk[3] for chunk in resampled])
+        expected_positions, expected_velocities = orbit.propagate(self.elements, grid)
+        np.testing.assert_allclose(positions, expected_positions[0], atol=2.0)
+        np.testing.assert_allclose(velocities, expected_velocities[0], atol=0.05)
+
+    def test_ingest_to_store(self):
+        times = 1.7e9 + np.arange(0.0, 86400.0, 60.0)
+        stations = ([0.0, 40.0], [30.0, -75.0], [0.0, 100.0])
+        store = ephemeris.ingest_oem(io.StringIO(self._oem(times)), self.lb_calc, stations,
+                                     self.directory, 20 * self.ureg.second, chunk_size=500)
+        grid = 1.7e9 + np.arange(0.0, 86341.0, 20.0)
+        self.assertEqual(store.shape, (len(grid), 2))
+        np.testing.assert_allclose(store.axis('time'), grid)
+
+        timeline = orbit.margin_timeline(self.lb_calc, self.elements, stations, grid)
+        np.testing.assert_allclose(store['elevation'][:], timeline['elevation'][0].T, atol=1e-3)
+        np.testing.assert_allclose(store['link_distance'][:], timeline['link_distance'][0].T, atol=2.0)
+        np.testing.assert_array_equal(store['is_visible'][:], timeline['is_visible'][0].T)
+        visible = store['is_visible'][:]
+        self.assertTrue(visible.any())
+        np.testing.assert_allclose(store['link_margin'][:][visible], timeline['link_margin'][0].T[visible], atol=1e-4)
+
+    def test_ingest_mean_of_j2000(self):
+        times = 1.7e9 + np.arange(0.0, 3600.0, 60.0)
+        stations = ([40.0], [-75.0], [100.0])
+        store = ephemeris.ingest_oem(io.StringIO(self._oem(times, 'EME2000')), self.lb_calc, stations,
+                                     self.directory, 60.0)
+        positions, velocities = orbit.propagate(self.elements, times)
+        fixed, _ = orbit.inertial_to_fixed(positions, velocities, times, 'J2000')
+        station = geometry.geodetic_to_ecef(40.0, -75.0, 100.0)
+        np.testing.assert_allclose(store['link_distance'][:, 0],
+                                   np.sqrt(np.sum((fixed[0] - station) ** 2, axis=-1)), atol=2.0)
+
+    def test_rejects_other_time_systems(self):
+        text = self._oem(1.7e9 + np.arange(0.0, 600.0, 60.0)).replace('TIME_SYSTEM = UTC', 'TIME_SYSTEM = TAI')
+        with self.assertRaises(ValueError):
+            list(ephemeris.read_oem(io.StringIO(text)))
+
+    def test_rejects_other_centers_and_frames(self):
+        text = self._oem(1.7e9 + np.arange(0.0, 600.0, 60.0))
+        for bad in (text.replace('CENTER_NAME = EARTH', 'CENTER_NAME = MOON'),
+                    text.replace('REF_FRAME = TEME', 'REF_FRAME = RTN'),
+                    text.replace('REF_FRAME = TEME\n', '')):
+            with self.assertRaises(ValueError):
+                list(ephemeris.read_oem(io.StringIO(bad)))
+
+    def test_rejects_short_data_lines(self):
+        lines = self._oem(1.7e9 + np.arange(0.0, 600.0, 60.0)).split('\n')
+        index = lines.index('COMMENT states in km and km/s') + 2
+        lines[index] = ' '.join(lines[index].split()[:5])
+        with self.assertRaisesRegex(ValueError, lines[index]):
+            list(ephemeris.read_oem(io.StringIO('\n'.join(lines))))
+
+if __name__ == '__main__':
+    unittest.main()
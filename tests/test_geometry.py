@@ -0,0 +1,65 @@
+import unittest
+import pint
+import numpy as np
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import geometry
+
+class TestGeometry(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+
+    def test_slant_range(self):
+        a = np.array([[0.0, 0.0, 0.0], [1.0, 2.0, 3.0]])
+        b = np.array([[3.0, 4.0, 0.0], [1.0, 2.0, 3.0]])
+        np.testing.assert_allclose(geometry.slant_range(a, b), [5.0, 0.0])
+
+    def test_slant_range_pint(self):
+        a = np.array([0.0, 0.0, 0.0]) * self.ureg.kilometer
+        b = np.array([3.0, 4.0, 0.0]) * self.ureg.kilometer
+        self.assertAlmostEqual(geometry.slant_range(a, b), 5000.0)
+        with self.assertRaises(TypeError):
+            geometry.slant_range(a, np.array([3.0, 4.0, 0.0]) * self.ureg.second)
+
+    def test_earth_blocked(self):
+        r = geometry.EARTH_RADIUS + 500e3
+        sat_a = np.array([[r, 0.0, 0.0], [r, 0.0, 0.0], [r, 0.0, 0.0]])
+        sat_b = np.array([[-r, 0.0, 0.0], [0.0, r, 0.0], [r * 0.9, r * 0.1, 0.0]])
+        np.testing.assert_array_equal(geometry.is_earth_blocked(sat_a, sat_b), [True, True, False])
+
+    def test_ground_station_horizon(self):
+        station = geometry.geodetic_to_ecef(0.0, 0.0, 0.0)
+        above = geometry.geodetic_to_ecef(0.0, 10.0, 800e3)
+        below = geometry.geodetic_to_ecef(0.0, 60.0, 800e3)
+        self.assertFalse(geometry.is_earth_blocked(station, above))
+        self.assertTrue(geometry.is_earth_blocked(station, below))
+        self.assertGreater(geometry.elevation_angle(station, above), 0)
+        self.assertLess(geometry.elevation_angle(station, below), 0)
+
+    def test_ground_slant_range_matches_run(self):
+        for index in (0, 1, 2, 3, 7, 8, 9):
+            tc_data = self.test_case_dataset[index]
+            lb_calc = LinkBudgetCalculator(self.ureg)
+            lb_calc.altitude_ground_station = tc_data.altitude_ground_station
+            lb_calc.altitude_satellite = tc_data.altitude_satellite
+            lb_calc.orbit_elevation_angle = tc_data.orbit_elevation_angle
+            lb_calc.downlink_frequency = tc_data.downlink_frequency
+            lb_calc.transmit_power = tc_data.transmit_power
+            lb_calc.noise_bandwidth = tc_data.noise_bandwidth
+            lb_calc.run()
+            distance = geometry.ground_slant_range(tc_data.orbit_elevation_angle,
+                                                   tc_data.altitude_ground_station,
+                                                   tc_data.altitude_satellite)
+            self.assertAlmostEqual(distance, lb_calc.link_distance.to('meter').magnitude, 3)
+
+    def test_ground_slant_range_consistent_with_positions(self):
+        station = geometry.geodetic_to_ecef(10.0, 20.0, 400.0)
+        satellite = geometry.geodetic_to_ecef(np.linspace(12.0, 30.0, 7), 25.0, 860e3)
+        elevation = geometry.elevation_angle(station, satellite)
+        np.testing.assert_allclose(geometry.ground_slant_range(elevation, 400.0, 860e3),
+                                   geometry.slant_range(station, satellite), rtol=1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import antenna, batch, interference
+from lib.calculator.geometry import geodetic_to_ecef, slant_range, is_earth_blocked
+
+class TestInterference(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+        rng = np.random.default_rng(7)
+        self.receivers = geodetic_to_ecef(rng.uniform(-60, 60, 20), rng.uniform(-180, 180, 20), 0.0)
+        self.interferers = geodetic_to_ecef(rng.uniform(-70, 70, 200), rng.uniform(-180, 180, 200), 550e3)
+        self.boresights = geodetic_to_ecef(rng.uniform(-70, 70, 200), rng.uniform(-180, 180, 200), 0.0)
+        # every victim is served by a satellite straight above it
+        self.transmitters = self.receivers * (1 + 550e3 / np.linalg.norm(self.receivers, axis=1))[:, np.newaxis]
+
+    def test_gaussian_beam_loss(self):
+        self.assertAlmostEqual(float(antenna.gaussian_beam_loss(5.0, 10.0)), -3.0)
+        self.assertEqual(float(antenna.gaussian_beam_loss(0.0, 10.0)), 0.0)
+        self.assertEqual(float(antenna.gaussian_beam_loss(90.0, 10.0)), antenna.DEFAULT_SIDELOBE_LEVEL)
+        self.assertAlmostEqual(float(antenna.gaussian_beam_loss(20.0, 10.0, None)), -48.0)
+        self.assertAlmostEqual(float(antenna.off_axis_angle([0, 0, 0], [1, 0, 0], [1, 1, 0])), 45.0)
+
+    def test_matches_brute_force(self):
+        serving = np.full(len(self.receivers), -1)
+        interferers = np.concatenate([self.interferers, self.transmitters[:1]])
+        boresights = np.concatenate([self.boresights, self.receivers[:1]])
+        serving[0] = len(interferers) - 1
+        results = interference.aggregate(self.lb_calc, self.receivers, self.transmitters, interferers,
+                                         boresights, 8.0, 40.0, interferer_eirp=40.0, serving=serving,
+                                         chunk_size=3)
+
+        columns = batch.columns_from_calculator(self.lb_calc)
+        wavelength = batch.downlink_wavelength(columns['downlink_frequency'])
+        expected = np.zeros(len(self.receivers))
+        for v, receiver in enumerate(self.receivers):
+            for i, position in enumerate(interferers):
+                if i == serving[v] or is_earth_blocked(receiver, position):
+                    continue
+                power = (40.0 + antenna.gaussian_beam_loss(antenna.off_axis_angle(position, boresights[i],
+                                                                                  receiver), 40.0)
+                         + batch.path_loss(slant_range(receiver, position), wavelength)
+                         + antenna.gaussian_beam_loss(antenna.off_axis_angle(receiver, self.transmitters[v],
+                                                                             position), 8.0)
+                         + columns['polarization_losses'] + columns['atmospheric_loss']
+                         + columns['receive_antenna_gain'] + columns['receiving_pointing_loss'])
+                expected[v] += 10 ** (power / 10)
+        np.testing.assert_allclose(results['interference_power'], 10 * np.log10(expected), rtol=1e-9)
+        self.assertTrue((results['interferer_count'] > 0).all())
+        self.assertTrue((results['interference_margin'] < results['link_margin']).all())
+        np.testing.assert_allclose(results['carrier_noise_interference'],
+                                   results['received_power'] - 10 * np.log10(
+                                       10 ** (results['minimum_detectable_signal'] / 10) + expected))
+
+    def test_no_interferer_in_view(self):
+        # a single interferer on the far side of the Earth from every victim
+        receivers = geodetic_to_ecef([0.0, 10.0], [0.0, 5.0], 0.0)
+        transmitters = geodetic_to_ecef([0.0, 10.0], [0.0, 5.0], 550e3)
+        interferers = geodetic_to_ecef([0.0], [180.0], 550e3)
+        results = interference.aggregate(self.lb_calc, receivers, transmitters, interferers, -interferers,
+                                         8.0, 40.0)
+        np.testing.assert_array_equal(results['interferer_count'], [0, 0])
+        self.assertTrue(np.isneginf(results['interference_power']).all())
+        np.testing.assert_allclose(results['interference_margin'], results['link_margin'])
+
+    def test_no_interferers(self):
+        results = interference.aggregate(self.lb_calc, self.receivers, self.transmitters, np.zeros((0, 3)),
+                                         np.zeros((0, 3)), 8.0, 40.0, serving=np.zeros(len(self.receivers)) - 1)
+        np.testing.assert_array_equal(results['interferer_count'], 0)
+        np.testing.assert_allclose(results['interference_margin'], results['link_margin'])
+
+    def test_blocked_victims(self):
+        # the second wanted satellite is on the far side of the Earth
+        receivers = geodetic_to_ecef([0.0, 0.0], [0.0, 0.0], 0.0)
+        transmitters = geodetic_to_ecef([0.0, 0.0], [0.0, 180.0], 550e3)
+        interferers = geodetic_to_ecef([5.0], [5.0], 550e3)
+        results = interference.aggregate(self.lb_calc, receivers, transmitters, interferers, receivers[:1],
+                                         8.0, 40.0, serving=[-1, 0])
+        np.testing.assert_array_equal(results['is_valid'], [True, False])
+        for name in ('link_margin', 'received_power', 'interference_margin', 'carrier_noise_interference'):
+            self.assertTrue(np.isfinite(results[name][0]))
+            self.assertTrue(np.isnan(results[name][1]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -98,6 +98,31 @@ class TestLinkBudget(unittest.TestCase):
         self.assertEqual(lb_calc.system_noise_figure, 0)
         self.assertEqual(lb_calc.noise_bandwidth, 0 * self.ureg.hertz)
 
+    def test_configure(self):
+        tc_data = self.test_case_dataset[0]
+        names = ('altitude_ground_station', 'altitude_satellite', 'orbit_elevation_angle', 'downlink_frequency',
+                 'target_energy_noise_ratio', 'implementation_loss', 'transmit_power', 'transmit_losses',
+                 'transmit_antenna_gain', 'transmit_pointing_loss', 'polarization_losses', 'atmospheric_loss',
+                 'receive_antenna_gain', 'receiving_pointing_loss', 'system_noise_figure', 'noise_bandwidth')
+        values = dict((name, getattr(tc_data, name)) for name in names)
+        lb_calc = LinkBudgetCalculator.from_mapping(self.ureg, values)
+        for name in names:
+            self.assertEqual(getattr(lb_calc, name), values[name])
+        lb_calc.run()
+        self.assertAlmostEqual(lb_calc.link_margin, tc_data.link_margin, 1)
+
+        # a rejected input leaves every input unchanged
+        with self.assertRaises(TypeError):
+            lb_calc.configure(altitude_satellite=1 * self.ureg.kilometer,
+                              downlink_frequency=1 * self.ureg.meter)
+        self.assertEqual(lb_calc.altitude_satellite, tc_data.altitude_satellite)
+        with self.assertRaises(TypeError):
+            lb_calc.configure(transmit_power=5.0)
+        with self.assertRaises(TypeError):
+            lb_calc.configure(not_an_input=5.0)
+        lb_calc.configure(values, orbit_elevation_angle=90 * self.ureg.degree)
+        self.assertEqual(lb_calc.orbit_elevation_angle, 90 * self.ureg.degree)
+
     def _test_dataset_item(self, item_number):        
         # get the test case data
         tc_data = self.test_case_dataset[item_number]
@@ -0,0 +1,132 @@
+import io
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, geometry, orbit
+
+ISS_TLE = """ISS (ZARYA)
+1 25544U 98067A   08264.51782528 -.00002182  00000-0 -11606-4 0  2927
+2 25544  51.6416 247.4627 0006703 130.5360 325.0288 15.72125391563537
+"""
+
+class TestOrbit(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+
+    def _elements(self, **values):
+        elements = {'epoch': 1.7e9, 'semi_major_axis': 7178137.0, 'eccentricity': 0.0, 'inclination': 0.0,
+                    'raan': 0.0, 'argument_of_perigee': 0.0, 'mean_anomaly': 0.0}
+        elements.update(values)
+        return dict((name, np.atleast_1d(np.asarray(value, dtype=float))) for name, value in elements.items())
+
+    def test_read_tle(self):
+        names, elements = orbit.read_tle(io.StringIO(ISS_TLE))
+        self.assertEqual(names, ['ISS (ZARYA)'])
+        self.assertAlmostEqual(elements['epoch'][0], 1221913540.1, 0)
+        self.assertAlmostEqual(elements['inclination'][0], 51.6416)
+        self.assertAlmostEqual(elements['eccentricity'][0], 0.0006703)
+        self.assertAlmostEqual(elements['semi_major_axis'][0] - orbit.EARTH_EQUATORIAL_RADIUS, 352.8e3, -3)
+        with self.assertRaises(ValueError):
+            orbit.read_tle(io.StringIO(ISS_TLE.replace('2927', '2928')))
+        truncated = ISS_TLE.replace('15.72125391563537', '15.7212539')
+        with self.assertRaisesRegex(ValueError, 'Truncated element set line: 2 25544'):
+            orbit.read_tle(io.StringIO(truncated))
+        csv_text = 'name,' + ','.join(orbit.ELEMENT_UNITS) + '\nsat,1.7e9,7e6,0.01,98,10,20,30\n'
+        names, elements = orbit.read_elements(io.StringIO(csv_text))
+        self.assertEqual(names, ['sat'])
+        self.assertEqual(elements['raan'][0], 10.0)
+
+    def test_two_body(self):
+        elements = self._elements(eccentricity=[0.0, 0.3], inclination=[30.0, 60.0], argument_of_perigee=[0.0, 40.0])
+        period = 2 * np.pi * np.sqrt(7178137.0 ** 3 / orbit.EARTH_MU)
+        times = 1.7e9 + np.linspace(0.0, period, 50)
+        positions, velocities = orbit.propagate(elements, times, j2=False)
+        self.assertEqual(positions.shape, (2, 50, 3))
+        np.testing.assert_allclose(positions[:, 0], positions[:, -1], atol=1e-3)
+        radius = np.linalg.norm(positions, axis=-1)
+        speed = np.linalg.norm(velocities, axis=-1)
+        energy = speed ** 2 / 2 - orbit.EARTH_MU / radius
+        np.testing.assert_allclose(energy, -orbit.EARTH_MU / (2 * 7178137.0), rtol=1e-9)
+        np.testing.assert_allclose(radius[1].min(), 7178137.0 * 0.7, rtol=1e-6)
+        np.testing.assert_allclose(np.gradient(positions[0], times, axis=0)[1:-1], velocities[0, 1:-1], rtol=1e-2)
+
+    def test_j2_sun_synchronous_drift(self):
+        elements = self._elements(inclination=98.6)
+        times = 1.7e9 + np.array([0.0, 86400.0])
+        positions, velocities = orbit.propagate(elements, times)
+        momentum = np.cross(positions[0], velocities[0])
+        raan = np.degrees(np.arctan2(momentum[:, 0], -momentum[:, 1]))
+        # the node of a sun-synchronous orbit drifts about 0.9856 degrees per day
+        self.assertAlmostEqual(raan[1] - raan[0], 0.9856, 1)
+        positions, velocities = orbit.propagate(elements, times, j2=False)
+        momentum = np.cross(positions[0], velocities[0])
+        raan = np.degrees(np.arctan2(momentum[:, 0], -momentum[:, 1]))
+        self.assertAlmostEqual(raan[1] - raan[0], 0.0, 9)
+
+    def test_geostationary_is_fixed(self):
+        radius = (orbit.EARTH_MU / orbit.EARTH_ROTATION_RATE ** 2) ** (1.0 / 3.0)
+        times = 1.7e9 + np.linspace(0.0, 86400.0, 25)
+        angle = orbit.sidereal_angle(times[:1])[0]
+        elements = self._elements(semi_major_axis=radius, epoch=times[0], mean_anomaly=np.degrees(angle))
+        positions, velocities = orbit.propagate(elements, times, j2=False)
+        fixed, fixed_velocities = orbit.inertial_to_fixed(positions, velocities, times)
+        self.assertLess(np.ptp(fixed[0, :, 0]), 2e3)
+        self.assertLess(np.abs(fixed_velocities).max(), 0.1)
+        self.assertAlmostEqual(fixed[0, 0, 0], radius, -1)
+
+    def test_inertial_frames(self):
+        # J2000 and ITRF states of the IAU 1976/FK5 reduction example of
+        # Vallado, 2004-04-06 07:51:28.386009 UTC, the difference left is
+        # UT1 - UTC and polar motion
+        times = np.array([1081237888.386009])
+        positions = np.array([[5102.5096, 6123.01152, 6378.1363]]) * 1e3
+        velocities = np.array([[-4.7432196, 0.7905366, 5.5337561]]) * 1e3
+        fixed, fixed_velocities = orbit.inertial_to_fixed(positions, velocities, times, 'J2000')
+        np.testing.assert_allclose(fixed[0], [-1033479.383, 7901295.2754, 6380356.5958], atol=500.0)
+        np.testing.assert_allclose(fixed_velocities[0], [-3225.636520, -2872.451450, 5531.924446], atol=0.5)
+        # the sidereal rotation alone misses precession and nutation
+        fixed, _ = orbit.inertial_to_fixed(positions, velocities, times, 'TEME')
+        self.assertGreater(np.linalg.norm(fixed[0] - [-1033479.383, 7901295.2754, 6380356.5958]), 5e3)
+        # mean of date is J2000 precessed, true of date is mean nutated
+        expected, _ = orbit.inertial_to_fixed(positions, velocities, times, 'J2000')
+        mean = np.einsum('tij,tj->ti', orbit.precession(times), positions)
+        true = np.einsum('tij,tj->ti', orbit.nutation(times)[0], mean)
+        np.testing.assert_allclose(orbit.inertial_to_fixed(mean, velocities, times, 'MOD')[0], expected, atol=1e-6)
+        np.testing.assert_allclose(orbit.inertial_to_fixed(true, velocities, times, 'TOD')[0], expected, atol=1e-6)
+        with self.assertRaises(ValueError):
+            orbit.inertial_to_fixed(positions, velocities, times, 'ITRF')
+
+    def test_margin_timeline(self):
+        names, elements = orbit.read_tle(io.StringIO(ISS_TLE))
+        stations = ([0.0, 45.0], [0.0, 10.0], [0.0, 400.0])
+        times = elements['epoch'][0] + np.arange(0.0, 86400.0, 30.0)
+        timeline = orbit.margin_timeline(self.lb_calc, elements, stations, times, chunk_size=1000)
+        self.assertEqual(timeline['link_margin'].shape, (1, 2, len(times)))
+        visible = timeline['is_visible']
+        self.assertTrue(visible.any() and not visible.all())
+        self.assertTrue(np.all(np.isnan(timeline['link_margin'][~visible])))
+
+        positions, velocities = orbit.propagate(elements, times)
+        fixed, _ = orbit.inertial_to_fixed(positions, velocities, times)
+        station = geometry.geodetic_to_ecef(45.0, 10.0, 400.0)
+        np.testing.assert_allclose(timeline['elevation'][0, 1], geometry.elevation_angle(station, fixed[0]),
+                                   atol=1e-9)
+        sample = np.flatnonzero(visible[0, 1])[0]
+        columns = batch.columns_from_calculator(self.lb_calc)
+        expected = batch.evaluate(columns, link_distance=timeline['link_distance'][0, 1, sample])
+        self.assertAlmostEqual(timeline['link_margin'][0, 1, sample], float(expected['link_margin']), 9)
+
+        timeline = orbit.margin_timeline(self.lb_calc, elements, stations, np.array([]))
+        for name in ('elevation', 'link_distance', 'link_margin', 'is_visible'):
+            self.assertEqual(timeline[name].shape, (1, 2, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import unittest
+import numpy as np
+import pint
+from multiprocessing import shared_memory
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, parallel
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(lb_calc, name, getattr(tc_data, name))
+        self.columns = batch.columns_from_calculator(lb_calc)
+        self.columns['orbit_elevation_angle'] = np.linspace(-10.0, 90.0, 101)[:, np.newaxis]
+        self.columns['altitude_satellite'] = np.linspace(300e3, 1500e3, 37)
+
+    def _check(self, results):
+        expected = batch.evaluate(self.columns)
+        self.assertEqual(results.shape, (101, 37))
+        for name in parallel.DEFAULT_OUTPUTS:
+            np.testing.assert_array_equal(results[name], expected[name])
+        self.assertEqual(results['is_valid'].dtype, bool)
+
+    def test_serial_and_processes(self):
+        with parallel.sweep(self.columns, chunk_size=500) as results:
+            self._check(results)
+        with parallel.sweep(self.columns, chunk_size=500, jobs=2) as results:
+            self._check(results)
+            name = results.spec[0]
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+    def test_scalar_inputs_and_link_distance(self):
+        columns = dict(self.columns, orbit_elevation_angle=45.0, altitude_satellite=860e3)
+        distance = np.linspace(500e3, 2000e3, 10)
+        with parallel.sweep(columns, link_distance=distance, chunk_size=3, outputs=('link_margin',)) as results:
+            np.testing.assert_array_equal(results['link_margin'],
+                                          batch.evaluate(columns, link_distance=distance)['link_margin'])
+            copies = results.copy()
+        with parallel.sweep(columns) as results:
+            self.assertEqual(results.shape, ())
+        np.testing.assert_array_equal(copies['link_margin'].shape, (10,))
+
+    def test_cleanup_on_failure(self):
+        blocks = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else None
+        with self.assertRaises(KeyError):
+            parallel.sweep(self.columns, outputs=('not_a_result',), jobs=2)
+        if blocks is not None:
+            self.assertEqual(set(os.listdir('/dev/shm')) - blocks, set())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import io
+import csv
+import json
+import unittest
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, pipeline
+
+class TestPipeline(unittest.TestCase):
+
+    HEADERS = ['name', 'altitude_ground_station[m]', 'altitude_satellite[km]', 'orbit_elevation_angle[deg]',
+               'downlink_frequency[MHz]', 'target_energy_noise_ratio', 'implementation_loss[dB]',
+               'transmit_power[W]', 'transmit_losses', 'transmit_antenna_gain', 'transmit_pointing_loss',
+               'polarization_losses', 'atmospheric_loss', 'receive_antenna_gain', 'receiving_pointing_loss',
+               'system_noise_figure', 'noise_bandwidth[kHz]']
+
+    UNITS = ['meter', 'kilometer', 'degree', 'megahertz', None, None, 'watt', None, None, None,
+             None, None, None, None, None, 'kilohertz']
+
+    VALID_CASES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 13)
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+
+    def _rows(self):
+        rows = []
+        for index in self.VALID_CASES:
+            tc_data = self.test_case_dataset[index]
+            row = [tc_data.name]
+            for header, units in zip(self.HEADERS[1:], self.UNITS):
+                value = getattr(tc_data, header.split('[')[0])
+                row.append(value.to(units).magnitude if units else value)
+            rows.append(row)
+        return rows
+
+    def _expected_margin(self, index):
+        tc_data = self.test_case_dataset[index]
+        lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(lb_calc, name, getattr(tc_data, name))
+        lb_calc.run()
+        return lb_calc.link_margin
+
+    def _check(self, records):
+        self.assertEqual(len(records), len(self.VALID_CASES))
+        for record, index in zip(records, self.VALID_CASES):
+            self.assertEqual(record['name'], self.test_case_dataset[index].name)
+            self.assertAlmostEqual(float(record['link_margin[dB]']), self._expected_margin(index), 6)
+
+    def test_csv(self):
+        source = io.StringIO()
+        writer = csv.writer(source)
+        writer.writerow(self.HEADERS)
+        writer.writerows(self._rows())
+        output = io.StringIO()
+        pipeline.run_pipeline(io.StringIO(source.getvalue()), output, 'csv', chunk_size=4, ureg=self.ureg)
+        self._check(list(csv.DictReader(io.StringIO(output.getvalue()))))
+
+    def test_jsonl_with_jobs(self):
+        source = '\n'.join(json.dumps(dict(zip(self.HEADERS, row))) for row in self._rows())
+        output = io.StringIO()
+        pipeline.run_pipeline(io.StringIO(source), output, 'jsonl', chunk_size=3, jobs=2, ureg=self.ureg)
+        self._check([json.loads(line) for line in output.getvalue().splitlines()])
+
+    def test_invalid_rows_are_flagged(self):
+        source = io.StringIO('downlink_frequency[MHz],noise_bandwidth[kHz],transmit_power[W],'
+                             'altitude_satellite[km],orbit_elevation_angle\n'
+                             '137.5,34,5,860,25\n'
+                             ',34,5,860,25\n')
+        output = io.StringIO()
+        pipeline.run_pipeline(source, output, 'csv', output_format='jsonl', ureg=self.ureg)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([record['is_valid'] for record in records], [True, False])
+        self.assertIsNone(records[1]['link_margin[dB]'])
+
+    def test_empty_input_keeps_header(self):
+        output_headers = [header for _, header in pipeline.output_headers()]
+        output = io.StringIO()
+        pipeline.run_pipeline(io.StringIO(''), output, 'csv', ureg=self.ureg)
+        self.assertEqual(list(csv.reader(io.StringIO(output.getvalue()))), [output_headers])
+        output = io.StringIO()
+        pipeline.run_pipeline(io.StringIO(','.join(self.HEADERS) + '\n'), output, 'csv', ureg=self.ureg)
+        self.assertEqual(list(csv.reader(io.StringIO(output.getvalue()))), [['name'] + output_headers])
+
+    def test_passthrough_only(self):
+        output = io.StringIO()
+        pipeline.run_pipeline(io.StringIO('name\na\nb\nc\n'), output, 'csv', ureg=self.ureg)
+        records = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual([record['name'] for record in records], ['a', 'b', 'c'])
+        self.assertEqual(len(set(record['link_margin[dB]'] for record in records)), 1)
+        output = io.StringIO()
+        source = '{"name": "a"}\n{"name": "b"}\n{"name": "c"}\n'
+        pipeline.run_pipeline(io.StringIO(source), output, 'jsonl', chunk_size=2, jobs=2, ureg=self.ureg)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([record['name'] for record in records], ['a', 'b', 'c'])
+
+    def test_duplicate_columns(self):
+        for headers in ('name,transmit_power[W],name\n', 'transmit_power[W],transmit_power[mW]\n'):
+            with self.assertRaisesRegex(ValueError, 'Duplicate column'):
+                pipeline.run_pipeline(io.StringIO(headers + '1,2,3\n'), io.StringIO(), 'csv', ureg=self.ureg)
+        source = '{"transmit_power[W]": 5}\n{"transmit_power[mW]": 5000}\n'
+        with self.assertRaisesRegex(ValueError, 'Duplicate column'):
+            pipeline.run_pipeline(io.StringIO(source), io.StringIO(), 'jsonl', ureg=self.ureg)
+
+    def test_column_units(self):
+        parser = pipeline.ColumnParser(self.ureg)
+        self.assertEqual(parser.parse('downlink_frequency[GHz]'), ('downlink_frequency', 1e9))
+        self.assertEqual(parser.parse('link_margin'), None)
+        with self.assertRaises(ValueError):
+            parser.parse('downlink_frequency[km]')
+        with self.assertRaises(ValueError):
+            parser.parse('atmospheric_loss[W]')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, polarization
+
+class TestPolarization(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+
+    def test_mismatch_loss(self):
+        # matched circular
+        self.assertAlmostEqual(float(polarization.mismatch_loss(0.0, 0.0)), 0.0)
+        # circular to linear, whatever the tilt
+        np.testing.assert_allclose(polarization.mismatch_loss(0.0, np.inf, [0.0, 30.0, 90.0]),
+                                   10 * np.log10(0.5))
+        # linear to linear
+        np.testing.assert_allclose(polarization.mismatch_loss(np.inf, np.inf, [0.0, 45.0, 60.0]),
+                                   20 * np.log10(np.cos(np.radians([0.0, 45.0, 60.0]))), atol=1e-12)
+        self.assertEqual(float(polarization.mismatch_loss(np.inf, np.inf, 90.0)), polarization.MAXIMUM_LOSS)
+        self.assertLess(float(polarization.mismatch_loss(0.0, 0.0, receive_handedness=polarization.LEFT_HAND,
+                                                         maximum_loss=None)), -100.0)
+        # 3 dB axial ratios, aligned and crossed
+        aligned = float(polarization.mismatch_loss(3.0, 3.0, 0.0))
+        crossed = float(polarization.mismatch_loss(3.0, 3.0, 90.0 * self.ureg.degree))
+        self.assertAlmostEqual(aligned, 0.0)
+        self.assertTrue(-1.0 < crossed < -0.4)
+
+    def test_tilt_angle(self):
+        los = np.array([[0.0, 0.0, 1.0]] * 3)
+        transmit = np.array([[1.0, 0.0, 0.0]] * 3)
+        receive = np.array([[1.0, 1.0, 5.0], [0.0, 1.0, 0.0], [-1.0, 0.0, 0.0]])
+        np.testing.assert_allclose(polarization.tilt_angle(los, transmit, receive), [45.0, -90.0, 0.0])
+
+    def test_feeds_batch(self):
+        tc_data = self.test_case_dataset[0]
+        lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(lb_calc, name, getattr(tc_data, name))
+        columns = batch.columns_from_calculator(lb_calc)
+        tilts = np.linspace(-90.0, 90.0, 181)
+        columns['polarization_losses'] = polarization.mismatch_loss(2.0, 30.0, tilts)
+        results = batch.evaluate(columns)
+        self.assertTrue(results['is_valid'].all())
+        self.assertEqual(np.argmax(results['link_margin']), 90)
+
+if __name__ == '__main__':
+    unittest.main()
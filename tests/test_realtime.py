@@ -0,0 +1,65 @@
+import gc
+import unittest
+import tracemalloc
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch
+from lib.calculator.realtime import RealtimeEvaluator
+
+class TestRealtimeEvaluator(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+
+    def test_matches_batch(self):
+        elevations = np.array([-5.0, 0.0, 5.0, 25.0, 60.0, 90.0])
+        evaluator = RealtimeEvaluator(self.lb_calc, len(elevations))
+        margin = evaluator.update_elevation(elevations)
+        self.assertIs(margin, evaluator.link_margin)
+        columns = batch.columns_from_calculator(self.lb_calc)
+        columns['orbit_elevation_angle'] = elevations
+        expected = batch.evaluate(columns)
+        np.testing.assert_array_equal(evaluator.is_valid, expected['is_valid'])
+        np.testing.assert_allclose(evaluator.link_margin, expected['link_margin'], atol=1e-9)
+        np.testing.assert_allclose(evaluator.received_power, expected['received_power'], atol=1e-9)
+
+        distances = np.array([1000e3, -1.0, 2000e3, 1500e3, 800e3, 860e3])
+        evaluator.update_link_distance(distances)
+        expected = batch.evaluate(columns, link_distance=distances)
+        np.testing.assert_allclose(evaluator.link_margin, expected['link_margin'], atol=1e-9)
+
+    def test_steady_state_allocates_nothing(self):
+        evaluator = RealtimeEvaluator(self.lb_calc, 64)
+        elevations = np.linspace(-10.0, 90.0, 64)
+        for _ in range(10):
+            evaluator.update_elevation(elevations)
+        gc.disable()
+        tracemalloc.start()
+        try:
+            collections = gc.get_count()[0]
+            before = tracemalloc.get_traced_memory()[0]
+            for _ in range(1000):
+                evaluator.update_elevation(elevations)
+                evaluator.update_link_distance(evaluator.link_distance)
+            after, peak = tracemalloc.get_traced_memory()
+            self.assertEqual(gc.get_count()[0], collections)
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+        self.assertLessEqual(after - before, 256)
+        self.assertLess(peak - before, 16 * 1024)
+
+    def test_rejects_invalid_configuration(self):
+        self.lb_calc.noise_bandwidth = 0 * self.ureg.hertz
+        with self.assertRaises(ValueError):
+            RealtimeEvaluator(self.lb_calc)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import pickle
+import unittest
+import concurrent.futures
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator, LinkBudgetInputs, LinkBudgetResult
+from lib.calculator import batch, records
+
+class TestRecords(unittest.TestCase):
+
+    VALID_CASES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 13)
+    INVALID_CASES = (10, 11, 12, 14, 15, 16)
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+
+    def _inputs(self, item_number):
+        tc_data = self.test_case_dataset[item_number]
+        return LinkBudgetInputs(**dict((name, getattr(tc_data, name)) for name in batch.INPUT_UNITS))
+
+    def test_evaluate_dataset(self):
+        for index in self.VALID_CASES:
+            tc_data = self.test_case_dataset[index]
+            result = records.evaluate(self._inputs(index))
+            self.assertIsInstance(result, LinkBudgetResult)
+            self.assertAlmostEqual(result.downlink_wavelength, tc_data.downlink_wavelength.to('meter').magnitude, 3)
+            self.assertAlmostEqual(result.link_distance, tc_data.link_distance.to('meter').magnitude, -5)
+            self.assertAlmostEqual(result.link_margin, tc_data.link_margin, 1)
+        for index in self.INVALID_CASES:
+            with self.assertRaises(ValueError):
+                records.evaluate(self._inputs(index))
+
+    def test_calculator_wraps_evaluate(self):
+        for index in self.VALID_CASES:
+            tc_data = self.test_case_dataset[index]
+            lb_calc = LinkBudgetCalculator(self.ureg)
+            for name in batch.INPUT_UNITS:
+                setattr(lb_calc, name, getattr(tc_data, name))
+            lb_calc.run()
+            result = records.evaluate(lb_calc.inputs)
+            self.assertEqual(lb_calc.inputs, self._inputs(index))
+            self.assertEqual(lb_calc.link_margin, result.link_margin)
+            self.assertEqual(lb_calc.link_distance.units, tc_data.altitude_satellite.units)
+
+    def test_immutable(self):
+        inputs = self._inputs(0)
+        with self.assertRaises(AttributeError):
+            inputs.downlink_frequency = 1.0
+        with self.assertRaises(AttributeError):
+            inputs.extra = 1.0
+        changed = inputs.replace(orbit_elevation_angle=90 * self.ureg.degree)
+        self.assertEqual(changed.orbit_elevation_angle, 90.0)
+        self.assertEqual(inputs.orbit_elevation_angle, 25.0)
+        self.assertEqual(pickle.loads(pickle.dumps(inputs)), inputs)
+        self.assertEqual(hash(pickle.loads(pickle.dumps(inputs))), hash(inputs))
+        with self.assertRaises(TypeError):
+            LinkBudgetInputs(downlink_frequency=1 * self.ureg.meter)
+        with self.assertRaises(TypeError):
+            LinkBudgetInputs(not_an_input=1.0)
+
+    def test_shared_between_threads(self):
+        inputs = self._inputs(0)
+        expected = records.evaluate(inputs)
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(records.evaluate, [inputs] * 200))
+        self.assertTrue(all(result == expected for result in results))
+
+if __name__ == '__main__':
+    unittest.main()
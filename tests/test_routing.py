@@ -0,0 +1,68 @@
+import unittest
+import pint
+import numpy as np
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, geometry
+from lib.calculator.routing import RelayRouter, SATELLITE, GROUND_STATION
+
+class TestRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        tc_data = LinkBudgetTestCaseDataset(self.ureg)[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+        rng = np.random.default_rng(3)
+        self.latitudes = rng.uniform(-30, 30, 40)
+        self.longitudes = rng.uniform(-60, 60, 40)
+        self.ground = geometry.geodetic_to_ecef([0.0, 20.0], [0.0, 30.0], 400.0)
+
+    def _satellites(self, offset):
+        return geometry.geodetic_to_ecef(self.latitudes, self.longitudes + offset, 860e3)
+
+    def test_routes_end_on_ground(self):
+        router = RelayRouter(self.lb_calc, self._satellites(0.0), self.ground, max_range=4000e3)
+        margins = router.bottleneck_margin
+        self.assertTrue(np.isfinite(margins).any())
+        for satellite in range(len(margins)):
+            path = router.route(satellite)
+            if not np.isfinite(margins[satellite]):
+                self.assertEqual(path, [])
+                continue
+            self.assertEqual(path[0], (SATELLITE, satellite))
+            self.assertEqual(path[-1][0], GROUND_STATION)
+            hops = [router.hop_margin(a, b) for a, b in zip(path[:-1], path[1:])]
+            self.assertAlmostEqual(min(hops), margins[satellite])
+
+    def test_direct_hop_margin_matches_run(self):
+        satellite = geometry.geodetic_to_ecef(0.0, 5.0, 860e3)
+        router = RelayRouter(self.lb_calc, satellite[np.newaxis], self.ground[:1])
+        distance = geometry.slant_range(satellite, self.ground[0])
+        self.lb_calc.orbit_elevation_angle = geometry.elevation_angle(self.ground[0], satellite) * self.ureg.degree
+        self.lb_calc.run()
+        self.assertAlmostEqual(self.lb_calc.link_distance.to('meter').magnitude, distance, 3)
+        self.assertAlmostEqual(router.bottleneck_margin[0], self.lb_calc.link_margin, 6)
+
+    def test_incremental_update_matches_rebuild(self):
+        router = RelayRouter(self.lb_calc, self._satellites(0.0), self.ground, max_range=4000e3)
+        for step in range(1, 6):
+            positions = self._satellites(2.0 * step)
+            router.update(positions)
+            rebuilt = RelayRouter(self.lb_calc, positions, self.ground, max_range=4000e3)
+            np.testing.assert_allclose(router.bottleneck_margin, rebuilt.bottleneck_margin)
+
+    def test_static_nodes_are_not_reevaluated(self):
+        positions = self._satellites(0.0)
+        router = RelayRouter(self.lb_calc, positions, self.ground, max_range=4000e3)
+        before = router.evaluated_hops
+        moved = positions.copy()
+        moved[0] = geometry.geodetic_to_ecef(self.latitudes[0], self.longitudes[0] + 1.0, 860e3)
+        router.update(moved)
+        self.assertEqual(router.evaluated_hops - before, len(positions) - 1 + len(self.ground))
+        rebuilt = RelayRouter(self.lb_calc, moved, self.ground, max_range=4000e3)
+        np.testing.assert_allclose(router.bottleneck_margin, rebuilt.bottleneck_margin)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, sensitivity
+
+class TestSensitivity(unittest.TestCase):
+
+    VALID_CASES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 13)
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        rows = []
+        for index in self.VALID_CASES:
+            tc_data = self.test_case_dataset[index]
+            lb_calc = LinkBudgetCalculator(self.ureg)
+            for name in batch.INPUT_UNITS:
+                setattr(lb_calc, name, getattr(tc_data, name))
+            rows.append(batch.columns_from_calculator(lb_calc))
+        self.columns = dict((name, np.array([row[name] for row in rows])) for name in batch.INPUT_UNITS)
+
+    def test_matches_finite_differences(self):
+        derivatives = sensitivity.jacobian(self.columns)
+        self.assertTrue(derivatives['is_valid'].all())
+        for name in batch.INPUT_UNITS:
+            step = 1e-6 * np.maximum(np.abs(self.columns[name]), 1.0)
+            low = dict(self.columns, **{name: self.columns[name] - step})
+            high = dict(self.columns, **{name: self.columns[name] + step})
+            low, high = batch.evaluate(low), batch.evaluate(high)
+            center = batch.evaluate(self.columns)
+            for output in sensitivity.SENSITIVITY_OUTPUTS:
+                # one sided where a step crosses a validation rule, e.g. losses at 0 dB
+                forward = (high[output] - center[output]) / step
+                backward = (center[output] - low[output]) / step
+                expected = np.where(np.isnan(forward), backward,
+                                    np.where(np.isnan(backward), forward, (forward + backward) / 2))
+                np.testing.assert_allclose(derivatives[output][name], expected, rtol=1e-4, atol=1e-9,
+                                           err_msg='%s / %s' % (output, name))
+
+    def test_invalid_rows_and_tornado(self):
+        columns = dict(self.columns)
+        columns['noise_bandwidth'] = columns['noise_bandwidth'].copy()
+        columns['noise_bandwidth'][0] = 0.0
+        derivatives = sensitivity.jacobian(columns)
+        self.assertFalse(derivatives['is_valid'][0])
+        self.assertTrue(np.isnan(derivatives['link_margin']['atmospheric_loss'][0]))
+        self.assertEqual(derivatives['link_margin']['atmospheric_loss'][1], 1.0)
+        self.assertEqual(derivatives['link_margin']['target_energy_noise_ratio'][1], -1.0)
+
+        bars = sensitivity.tornado(derivatives, {'atmospheric_loss': 100.0,
+                                                 'transmit_power': (-0.5, 0.5),
+                                                 'orbit_elevation_angle': 0.0})
+        self.assertEqual([bar[0] for bar in bars][-1], 'orbit_elevation_angle')
+        self.assertEqual(bars[0][0], 'atmospheric_loss')
+        np.testing.assert_array_equal(bars[0][1][1:], -100.0)
+        np.testing.assert_array_equal(bars[0][2][1:], 100.0)
+
+    def test_link_distance_override(self):
+        derivatives = sensitivity.jacobian(self.columns, link_distance=1000e3)
+        np.testing.assert_array_equal(derivatives['link_margin']['altitude_satellite'], 0.0)
+        np.testing.assert_allclose(derivatives['received_power']['downlink_frequency'],
+                                   -20 / (np.log(10) * self.columns['downlink_frequency']))
+
+if __name__ == '__main__':
+    unittest.main()
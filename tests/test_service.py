@@ -0,0 +1,90 @@
+import json
+import asyncio
+import unittest
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch
+from lib.calculator.service import LinkBudgetService, MicroBatcher
+
+class TestService(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        tc_data = LinkBudgetTestCaseDataset(self.ureg)[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+        self.lb_calc.run()
+        self.query = batch.columns_from_calculator(self.lb_calc)
+
+    def test_micro_batching(self):
+        async def scenario():
+            batcher = MicroBatcher(max_batch_size=16, max_wait=0.05)
+            batcher.start()
+            try:
+                results = await asyncio.gather(*[batcher.submit(self.query) for _ in range(40)])
+                return results, batcher.stats()
+            finally:
+                await batcher.stop()
+        results, stats = asyncio.run(scenario())
+        self.assertEqual(len(results), 40)
+        for result in results:
+            self.assertAlmostEqual(result['link_margin'], self.lb_calc.link_margin, 9)
+        self.assertEqual(stats['requests'], 40)
+        self.assertEqual(stats['batches'], 3)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertGreater(stats['latency_ms']['p99'], 0.0)
+
+    def test_http(self):
+        body = json.dumps({'downlink_frequency[MHz]': 137.5, 'noise_bandwidth[kHz]': 34,
+                           'transmit_power[W]': 5, 'altitude_satellite[km]': 860,
+                           'altitude_ground_station[m]': 400, 'orbit_elevation_angle': 25,
+                           'target_energy_noise_ratio': 20, 'implementation_loss': -1,
+                           'transmit_losses': -1, 'transmit_antenna_gain': 4, 'transmit_pointing_loss': -3,
+                           'atmospheric_loss': -0.75, 'receive_antenna_gain': 5.4,
+                           'receiving_pointing_loss': -3, 'system_noise_figure': 5})
+
+        async def request(port, method, path, payload=b'', length=None, connection='close'):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(('%s %s HTTP/1.1\r\nContent-Length: %s\r\nConnection: %s\r\n\r\n'
+                          % (method, path, len(payload) if length is None else length, connection)
+                          ).encode() + payload)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            head, _, data = response.partition(b'\r\n\r\n')
+            return int(head.split()[1]), json.loads(data)
+
+        async def scenario():
+            service = LinkBudgetService(port=0, max_wait=0.05, ureg=self.ureg, max_body_size=4096)
+            await service.start()
+            try:
+                responses = await asyncio.gather(*[request(service.port, 'POST', '/budget', body.encode())
+                                                   for _ in range(10)])
+                missing = await request(service.port, 'GET', '/nowhere')
+                invalid = await request(service.port, 'POST', '/budget', b'{not json')
+                # the server closes the connection it cannot delimit
+                malformed = await request(service.port, 'POST', '/budget', body.encode(), length='12abc',
+                                          connection='keep-alive')
+                large = await request(service.port, 'POST', '/budget', length=4097, connection='keep-alive')
+                stats = await request(service.port, 'GET', '/stats')
+                return responses, missing, invalid, malformed, large, stats
+            finally:
+                await service.stop()
+        responses, missing, invalid, malformed, large, stats = asyncio.run(scenario())
+        for status, payload in responses:
+            self.assertEqual(status, 200)
+            self.assertTrue(payload['is_valid'])
+            self.assertAlmostEqual(payload['link_margin[dB]'], self.lb_calc.link_margin, 9)
+        self.assertEqual(missing[0], 404)
+        self.assertEqual(invalid[0], 400)
+        self.assertEqual(malformed[0], 400)
+        self.assertIn('Content-Length', malformed[1]['error'])
+        self.assertEqual(large[0], 413)
+        self.assertEqual(stats[0], 200)
+        self.assertEqual(stats[1]['requests'], 10)
+        self.assertLess(stats[1]['batches'], 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from lib.calculator import batch
+from lib.calculator.store import ResultStore
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.elevations = np.array([5.0, 25.0, 45.0, 90.0])
+        self.frequencies = np.array([137.5e6, 435e6, 2.2e9])
+        self.columns = {'altitude_ground_station': 400.0, 'altitude_satellite': 860e3,
+                        'downlink_frequency': 137.5e6, 'target_energy_noise_ratio': 20.0,
+                        'implementation_loss': -1.0, 'transmit_power': 5.0,
+                        'noise_bandwidth': 34e3, 'system_noise_figure': 5.0}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_and_reopen(self):
+        axes = [('orbit_elevation_angle', self.elevations, 'degree'),
+                ('downlink_frequency', self.frequencies, 'hertz')]
+        with ResultStore.create(self.directory, axes, attributes={'case': 'sweep'}) as store:
+            self.assertEqual(store.shape, (4, 3))
+            for row, elevation in enumerate(self.elevations):
+                columns = dict(self.columns, orbit_elevation_angle=elevation,
+                               downlink_frequency=self.frequencies)
+                store.write(row, batch.evaluate(columns))
+
+        store = ResultStore.open(self.directory)
+        self.assertEqual(store.engine_version, batch.ENGINE_VERSION)
+        self.assertEqual(store.attributes, {'case': 'sweep'})
+        self.assertEqual(store.units('link_margin'), 'dB')
+        self.assertEqual(store.units('downlink_frequency'), 'hertz')
+        np.testing.assert_array_equal(store.axis('orbit_elevation_angle'), self.elevations)
+        self.assertIsInstance(store['link_margin'], np.memmap)
+        self.assertTrue(store['is_valid'][:].all())
+
+        columns = dict(self.columns, orbit_elevation_angle=self.elevations[1:3, np.newaxis],
+                       downlink_frequency=self.frequencies[1:])
+        expected = batch.evaluate(columns)
+        np.testing.assert_array_equal(store['link_margin'][1:3, 1:], expected['link_margin'])
+        np.testing.assert_array_equal(store['downlink_path_loss'][1:3, 1:], expected['downlink_path_loss'])
+        with self.assertRaises(ValueError):
+            store['link_margin'][0, 0] = 1.0
+
+    def test_selected_columns(self):
+        store = ResultStore.create(self.directory, [('sample', np.arange(10.0), '')],
+                                   columns={'link_margin': 'dB', 'is_valid': ''}, dtype=np.float32)
+        store.write(slice(2, 5), batch.evaluate(dict(self.columns, orbit_elevation_angle=np.full(3, 30.0))))
+        store.close()
+        store = ResultStore.open(self.directory)
+        self.assertEqual(store.columns, ['link_margin', 'is_valid'])
+        self.assertEqual(store['link_margin'].dtype, np.float32)
+        np.testing.assert_array_equal(store['is_valid'][:], [False] * 2 + [True] * 3 + [False] * 5)
+
+    def test_append(self):
+        store = ResultStore.create(self.directory, [('time', [], 'second'), ('elevation', self.elevations, 'degree')],
+                                   columns={'link_margin': 'dB', 'is_valid': ''})
+        self.assertEqual(store.shape, (0, 4))
+        for start in (0.0, 10.0):
+            results = batch.evaluate(dict(self.columns, orbit_elevation_angle=np.tile(self.elevations, (2, 1))))
+            store.append(results, [start, start + 5.0])
+        store.close()
+        store = ResultStore.open(self.directory)
+        self.assertEqual(store.shape, (4, 4))
+        np.testing.assert_array_equal(store.axis('time'), [0.0, 5.0, 10.0, 15.0])
+        expected = batch.evaluate(dict(self.columns, orbit_elevation_angle=self.elevations))
+        np.testing.assert_array_equal(store['link_margin'][3], expected['link_margin'])
+        self.assertTrue(store['is_valid'][:].all())
+        with self.assertRaises(ValueError):
+            store.append({}, [20.0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import math
+import random
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch
+from lib.calculator.surface import MarginSurface
+
+class TestMarginSurface(unittest.TestCase):
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+
+    def test_error_bound_versus_run(self):
+        surface = MarginSurface.compile(self.lb_calc, (5 * self.ureg.degree, 90 * self.ureg.degree),
+                                        (300 * self.ureg.kilometer, 1500 * self.ureg.kilometer), tolerance=0.01)
+        self.assertLessEqual(surface.error_bound, 0.01)
+        generator = random.Random(4)
+        for _ in range(200):
+            elevation = generator.uniform(5, 90)
+            altitude = generator.uniform(300e3, 1500e3)
+            frequency = generator.uniform(100e6, 3e9)
+            self.lb_calc.orbit_elevation_angle = elevation * self.ureg.degree
+            self.lb_calc.altitude_satellite = altitude * self.ureg.meter
+            self.lb_calc.downlink_frequency = frequency * self.ureg.hertz
+            self.lb_calc.run()
+            self.assertAlmostEqual(surface.margin(elevation, altitude, frequency), self.lb_calc.link_margin,
+                                   delta=surface.error_bound + 1e-9)
+            self.assertAlmostEqual(float(surface.margins(elevation, altitude, frequency)),
+                                   surface.margin(elevation, altitude, frequency), 9)
+
+    def test_error_bound_versus_dense_samples(self):
+        surface = MarginSurface.compile(self.lb_calc, (1.0, 90.0), (200e3, 36000e3), tolerance=0.05)
+        self.assertLessEqual(surface.error_bound, 0.05)
+        rng = np.random.default_rng(9)
+        elevations = np.concatenate([rng.uniform(1.0, 90.0, 200000), np.linspace(1.0, 90.0, 2001)])
+        altitudes = np.concatenate([rng.uniform(200e3, 36000e3, 200000), np.linspace(200e3, 36000e3, 2001)])
+        # the low elevation and low altitude corner, where curvature is highest
+        elevations = np.concatenate([elevations, rng.uniform(1.0, 3.0, 200000)])
+        altitudes = np.concatenate([altitudes, rng.uniform(200e3, 1000e3, 200000)])
+        columns = batch.columns_from_calculator(self.lb_calc)
+        columns.update(orbit_elevation_angle=elevations, altitude_satellite=altitudes)
+        exact = batch.evaluate(columns)['link_margin']
+        error = np.abs(surface.margins(elevations, altitudes, columns['downlink_frequency']) - exact)
+        self.assertLessEqual(error.max(), surface.error_bound)
+
+    def test_out_of_range(self):
+        surface = MarginSurface.compile(self.lb_calc, (10.0, 80.0), (400e3, 900e3), tolerance=0.05)
+        surface.margin(80.0, 900e3, 1e9)
+        with self.assertRaises(ValueError):
+            surface.margin(5.0, 500e3, 1e9)
+        with self.assertRaises(ValueError):
+            surface.margin(20.0, 500e3, 0.0)
+        margins = surface.margins([5.0, 20.0], 500e3, 1e9)
+        self.assertTrue(math.isnan(margins[0]))
+        self.assertAlmostEqual(margins[1], surface.margin(20.0, 500e3, 1e9), 9)
+        with self.assertRaises(ValueError):
+            MarginSurface.compile(self.lb_calc, (0.0, 80.0), (400e3, 900e3))
+        self.lb_calc.atmospheric_loss = 1.0
+        with self.assertRaises(ValueError):
+            MarginSurface.compile(self.lb_calc, (10.0, 80.0), (400e3, 900e3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import pint
+import numpy as np
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch
+from lib.calculator.table import LinkBudgetTable
+
+class TestLinkBudgetTable(unittest.TestCase):
+
+    VALID_CASES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 13)
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        self.calculators = []
+        for index in self.VALID_CASES:
+            tc_data = self.test_case_dataset[index]
+            lb_calc = LinkBudgetCalculator(self.ureg)
+            for name in batch.INPUT_UNITS:
+                setattr(lb_calc, name, getattr(tc_data, name))
+            self.calculators.append(lb_calc)
+
+    def test_rows_match_calculators(self):
+        table = LinkBudgetTable.from_calculators(self.calculators)
+        table.evaluate()
+        self.assertEqual(len(table), len(self.calculators))
+        for row, lb_calc in zip(table, self.calculators):
+            lb_calc.run()
+            self.assertTrue(row.is_valid)
+            self.assertAlmostEqual(row.downlink_frequency.to('hertz').magnitude,
+                                   lb_calc.downlink_frequency.to('hertz').magnitude, 3)
+            self.assertAlmostEqual(row.altitude_satellite.to('meter').magnitude,
+                                   lb_calc.altitude_satellite.to('meter').magnitude, 6)
+            self.assertAlmostEqual(row.link_distance.to('kilometer').magnitude,
+                                   lb_calc.link_distance.to('kilometer').magnitude, 6)
+            self.assertAlmostEqual(row.downlink_wavelength.magnitude, lb_calc.downlink_wavelength.magnitude)
+            self.assertAlmostEqual(row.link_margin, lb_calc.link_margin, 6)
+            self.assertAlmostEqual(row.minimum_detectable_signal, lb_calc.minimum_detectable_signal, 6)
+
+    def test_row_views_write_through(self):
+        table = LinkBudgetTable.from_columns(self.ureg, batch.columns_from_calculator(self.calculators[0]))
+        self.assertEqual(len(table), 1)
+        row = table[-1]
+        row.orbit_elevation_angle = 90 * self.ureg.degree
+        row.noise_bandwidth = 68 * self.ureg.kilohertz
+        self.assertEqual(table['noise_bandwidth'][0], 68e3)
+        table.evaluate()
+        self.assertAlmostEqual(row.link_distance.magnitude, 860e3 - 400, 3)
+        with self.assertRaises(AttributeError):
+            row.link_margin = 0.0
+        with self.assertRaises(AttributeError):
+            row.extra = 0.0
+        with self.assertRaises(TypeError):
+            row.downlink_frequency = 1 * self.ureg.meter
+        with self.assertRaises(IndexError):
+            table[1]
+
+    def test_from_mappings(self):
+        mappings = [dict((name, getattr(self.test_case_dataset[index], name)) for name in batch.INPUT_UNITS)
+                    for index in self.VALID_CASES]
+        table = LinkBudgetTable.from_mappings(self.ureg, mappings)
+        reference = LinkBudgetTable.from_calculators(self.calculators)
+        for name in batch.INPUT_UNITS:
+            np.testing.assert_allclose(table[name], reference[name], rtol=1e-12)
+        with self.assertRaises(TypeError):
+            LinkBudgetTable.from_mappings(self.ureg, [{'downlink_frequency': 1 * self.ureg.meter}])
+        with self.assertRaises(TypeError):
+            LinkBudgetTable.from_mappings(self.ureg, [{'not_an_input': 1.0}])
+
+    def test_memory_per_budget(self):
+        columns = batch.columns_from_calculator(self.calculators[0])
+        columns['orbit_elevation_angle'] = np.linspace(1.0, 90.0, 100000)
+        table = LinkBudgetTable.from_columns(self.ureg, columns)
+        table.evaluate()
+        fields = len(batch.INPUT_UNITS) + len(batch.OUTPUT_UNITS)
+        self.assertEqual(table.nbytes, len(table) * (fields * 8 + 1 + 4))
+        self.assertEqual(table.units('link_margin'), 'dB')
+        np.testing.assert_array_equal(table['link_margin'], batch.evaluate(columns)['link_margin'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, channels, duplex, validation
+
+class TestValidation(unittest.TestCase):
+
+    VALID_CASES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 13)
+    INVALID_CASES = (10, 11, 12, 14, 15, 16)
+
+    def setUp(self):
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+
+    def _calculator(self, item_number):
+        tc_data = self.test_case_dataset[item_number]
+        lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(lb_calc, name, getattr(tc_data, name))
+        return lb_calc
+
+    def _columns(self, indexes):
+        rows = [batch.columns_from_calculator(self._calculator(index)) for index in indexes]
+        return dict((name, np.array([row[name] for row in rows])) for name in batch.INPUT_UNITS)
+
+    def test_matches_run(self):
+        indexes = self.VALID_CASES + self.INVALID_CASES
+        columns = self._columns(indexes)
+        mask, reasons = validation.validate(columns)
+        for position, index in enumerate(indexes):
+            lb_calc = self._calculator(index)
+            message = validation.first_error(batch.columns_from_calculator(lb_calc))
+            if index in self.VALID_CASES:
+                lb_calc.run()
+                self.assertTrue(mask[position])
+                self.assertEqual(reasons[position], 0)
+                self.assertIsNone(message)
+            else:
+                with self.assertRaises(ValueError) as raised:
+                    lb_calc.run()
+                self.assertFalse(mask[position])
+                self.assertEqual(str(raised.exception), message)
+                self.assertEqual(validation.describe(reasons[position])[0], message)
+
+    def test_evaluate_computes_valid_rows(self):
+        indexes = self.VALID_CASES + self.INVALID_CASES
+        results = batch.evaluate(self._columns(indexes))
+        valid = np.isin(indexes, self.VALID_CASES)
+        np.testing.assert_array_equal(results['is_valid'], valid)
+        self.assertTrue(np.all(np.isnan(results['link_margin'][~valid])))
+        self.assertTrue(np.all(np.isfinite(results['link_margin'][valid])))
+        self.assertTrue(np.all(results['invalid_reasons'][~valid] != 0))
+        for position, index in enumerate(indexes):
+            if valid[position]:
+                self.assertAlmostEqual(results['link_margin'][position],
+                                       self.test_case_dataset[index].link_margin, 1)
+
+    def test_reasons(self):
+        columns = self._columns(self.VALID_CASES[:1] * 3)
+        columns['atmospheric_loss'][1] = 1.0
+        columns['noise_bandwidth'][1] = 0.0
+        columns['transmit_power'][2] = np.nan
+        mask, reasons = validation.validate(columns)
+        np.testing.assert_array_equal(mask, [True, False, False])
+        self.assertEqual(validation.describe(reasons[1]),
+                         ['Atmospheric Loss is positive', 'Noise Bandwidth is negative'])
+        self.assertIn('Input is not a number', validation.describe(reasons[2]))
+        self.assertEqual(validation.describe(reasons[0]), [])
+
+    def test_infeasible_geometry(self):
+        columns = self._columns(self.VALID_CASES[:1] * 2)
+        columns['altitude_ground_station'][1] = 1000e3
+        columns['altitude_satellite'][1] = 500e3
+        columns['orbit_elevation_angle'][1] = 10.0
+        lb_calc = self._calculator(self.VALID_CASES[0])
+        lb_calc.altitude_ground_station = 1000 * self.ureg.kilometer
+        lb_calc.altitude_satellite = 500 * self.ureg.kilometer
+        lb_calc.orbit_elevation_angle = 10 * self.ureg.degree
+        with self.assertRaises(ValueError):
+            lb_calc.run()
+
+        uplink = dict((name, columns[downlink_name]) for name, (downlink_name, _) in duplex.UPLINK_INPUTS.items())
+        for results in (batch.evaluate(columns), duplex.evaluate(dict(columns, **uplink)),
+                        channels.evaluate(columns, {'downlink_frequency': [137e6, 2.2e9]})):
+            np.testing.assert_array_equal(np.reshape(results['is_valid'], (2, -1)).all(axis=1), [True, False])
+            for reasons in np.ravel(results['invalid_reasons'])[np.ravel(~results['is_valid'])]:
+                self.assertEqual(validation.describe(reasons), ['Satellite Altitude not above Ground Station'])
+        self.assertFalse(duplex.evaluate(dict(columns, **uplink))['uplink_is_valid'][1])
+
+    def test_link_distance_override(self):
+        columns = self._columns(self.VALID_CASES[:1] * 2)
+        columns['altitude_satellite'][:] = 0.0
+        mask, reasons = validation.validate(columns, link_distance=np.array([1.0e6, -1.0]))
+        np.testing.assert_array_equal(mask, [True, False])
+        self.assertEqual(reasons[1], validation.INVALID_LINK_DISTANCE)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import io
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pint
+from .link_budget_test_case_dataset import LinkBudgetTestCaseDataset
+from lib.calculator import LinkBudgetCalculator
+from lib.calculator import batch, weather
+
+class TestWeather(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.ureg = pint.UnitRegistry()
+        self.test_case_dataset = LinkBudgetTestCaseDataset(self.ureg)
+        tc_data = self.test_case_dataset[0]
+        self.lb_calc = LinkBudgetCalculator(self.ureg)
+        for name in batch.INPUT_UNITS:
+            setattr(self.lb_calc, name, getattr(tc_data, name))
+        # two days of hourly observations
+        self.times = 1.7e9 + 3600.0 * np.arange(48)
+        self.temperature = 15.0 + 5.0 * np.sin(np.arange(48) / 4.0)
+        self.humidity = np.linspace(40.0, 90.0, 48)
+        self.rain = np.where((np.arange(48) > 20) & (np.arange(48) < 26), 12.0, 0.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _archive(self, iso=False):
+        lines = ['time,temperature,relative_humidity,rain_rate']
+        for time, temperature, humidity, rain in zip(self.times, self.temperature, self.humidity, self.rain):
+            stamp = str(np.datetime64(int(time), 's')) if iso else '%.1f' % time
+            lines.append('%s,%.17g,%.17g,%.17g' % (stamp, temperature, humidity, rain))
+        return weather.import_csv(io.StringIO('\n'.join(lines) + '\n'), self.directory, chunk_size=10)
+
+    def test_interpolate(self):
+        store = self._archive(iso=True)
+        np.testing.assert_array_equal(store.axis('time'), self.times)
+        times = np.linspace(self.times[0] - 600.0, self.times[-1] + 600.0, 500)
+        values = weather.interpolate(store, times)
+        inside = (times >= self.times[0]) & (times <= self.times[-1])
+        np.testing.assert_allclose(values['temperature'][inside],
+                                   np.interp(times[inside], self.times, self.temperature))
+        np.testing.assert_allclose(values['rain_rate'][inside], np.interp(times[inside], self.times, self.rain))
+        self.assertTrue(np.isnan(values['relative_humidity'][~inside]).all())
+
+        window = self.times[30] + np.arange(10) * 60.0
+        np.testing.assert_allclose(weather.interpolate(store, window)['relative_humidity'],
+                                   np.interp(window, self.times, self.humidity))
+
+    def test_rejects_unordered_archive(self):
+        archive = io.StringIO('time,rain_rate\n10,0\n5,1\n')
+        with self.assertRaises(ValueError):
+            weather.import_csv(archive, self.directory)
+        with self.assertRaises(ValueError):
+            weather.import_csv(io.StringIO('time,snow\n10,0\n'), self.directory)
+        # a short row must not drop the rain rates of its chunk
+        archive = io.StringIO('time,temperature,rain_rate\n10,5,1\n20,5\n30,5,3\n')
+        with self.assertRaisesRegex(ValueError, 'line 3'):
+            weather.import_csv(archive, self.directory)
+
+    def test_losses(self):
+        # about 0.5 dB/km for 25 mm/h at 10 GHz
+        self.assertAlmostEqual(float(weather.rain_specific_attenuation(10e9, 25.0)), 0.5, delta=0.01)
+        # no step where the alpha fits (25 GHz) and the k fits (54 GHz) change
+        for edge in (8.5e9, 25e9, 54e9):
+            below, above = weather.rain_specific_attenuation([edge * (1 - 1e-9), edge], 25.0)
+            self.assertAlmostEqual(above / below, 1.0, delta=0.02)
+        self.assertEqual(float(weather.rain_specific_attenuation(10e9 * self.ureg.hertz, 0.0)), 0.0)
+        zenith = float(weather.gas_attenuation(12e9, 7.5))
+        self.assertTrue(0.05 < zenith < 0.3)
+        self.assertTrue(np.isfinite(weather.gas_attenuation(53.9e9, 7.5)))
+        with self.assertRaises(ValueError):
+            weather.gas_attenuation([12e9, 54e9], 7.5)
+        self.assertAlmostEqual(float(weather.water_vapour_density(20.0, 100.0)), 17.3, delta=0.1)
+
+        dry = {'temperature': 15.0, 'relative_humidity': 50.0, 'rain_rate': 0.0}
+        wet = dict(dry, rain_rate=12.0)
+        losses = weather.atmospheric_loss(wet, 8.2e9, [10.0, 30.0, 90.0])
+        self.assertTrue((losses < weather.atmospheric_loss(dry, 8.2e9, [10.0, 30.0, 90.0])).all())
+        self.assertTrue((np.diff(losses) > 0).all())
+        self.assertGreater(float(weather.atmospheric_loss(wet, 8.2e9, 90.0, 1000.0)),
+                           float(weather.atmospheric_loss(wet, 8.2e9, 90.0)))
+
+    def test_pass_feeds_batch(self):
+        store = self._archive()
+        times = np.linspace(self.times[18], self.times[28], 200)
+        elevation = np.linspace(10.0, 80.0, 200)
+        columns = batch.columns_from_calculator(self.lb_calc)
+        columns['orbit_elevation_angle'] = elevation
+        columns['atmospheric_loss'] = weather.pass_losses(store, times, columns['downlink_frequency'], elevation)
+        results = batch.evaluate(columns)
+        self.assertTrue(results['is_valid'].all())
+        clear = batch.evaluate(dict(columns, atmospheric_loss=0.0))
+        np.testing.assert_allclose(clear['link_margin'] - results['link_margin'], -columns['atmospheric_loss'])
+
+if __name__ == '__main__':
+    unittest.main()